@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+
+
+from typing import Callable, List
+
+
+# make the common package importable when a benchmark is run as script
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+
+from common.cmdline import cmdarg, cmdvalue, parser
+
+
+
+def best( function: Callable, repeat: int = 3 ) -> float:
+    """
+    Returns the fastest of repeat runs of function in seconds
+    """
+    times = []
+    for _ in range( repeat ):
+        start = time.perf_counter()
+        function()
+        times.append( time.perf_counter() - start )
+    return min( times )
+
+
+def syntheticGrammar(
+        count: int,
+        withOptions: bool = False,
+        valueClass: type = cmdvalue.Value,
+        optionClass: type = cmdvalue.Option,
+        argumentClass: type = cmdarg.StringArgument
+    ) -> parser.ParserRegistry:
+    """
+    Returns a grammar of count string values, each set by the command --opt-<i>, values
+    accept the options "a" and "b" when withOptions is set. The classes of values, options
+    and arguments may be replaced, i.e. by variants to compare with.
+    """
+    ctx = parser.ParserRegistry()
+    for i in range( count ):
+        options = None
+        if withOptions:
+            options = [ optionClass( "a", "first option" ), optionClass( "b", "second option" ) ]
+        value = valueClass(
+            identifier   = "bench.value" + str( i ),
+            description  = "Synthetic value " + str( i ) + ".",
+            category     = "bench" + str( i % 16 ),
+            defaultValue = "",
+            options      = options
+        )
+        ctx.addValue( value )
+        ctx.addArgument( argumentClass( value.getIdentifier(), "opt-" + str( i ), "<value>" ) )
+    return ctx
+
+
+def commandLine( count: int, value: str = "a" ) -> List[ str ]:
+    """
+    Returns a command line setting the first count values of a synthetic grammar
+    """
+    args = []
+    for i in range( count ):
+        args.append( "--opt-" + str( i ) )
+        args.append( value )
+    return args
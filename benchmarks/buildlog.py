@@ -0,0 +1,127 @@
+"""
+Producer latency of build log writes with a fast, a slow and a stalled disk, compared with
+writing synchronously to a file on a slow disk. The disk is simulated by delaying flushes.
+"""
+import os
+import tempfile
+import time
+import benchutil
+
+
+from common.log import buildlog
+
+
+
+# lines written by the producer
+LINE_COUNT = 20000
+
+
+# lines written synchronously, each waits for the slow disk
+DIRECT_LINE_COUNT = 500
+
+
+# simulated time of a flush to a slow disk
+SLOW_FLUSH = 0.005
+
+
+# simulated time of a stalled disk, once
+STALL = 2.0
+
+
+
+
+# log file delaying each flush like a slow disk
+class SlowFile:
+    def __init__( self, file, delay: float, once: bool ):
+        """
+        Wraps file, flushes take delay seconds, only the first when once is set
+        """
+        self.file    = file
+        self.delay   = delay
+        self.once    = once
+        self.pending = True
+
+
+    def write( self, text: str ):
+        return self.file.write( text )
+
+
+    def tell( self ) -> int:
+        return self.file.tell()
+
+
+    def flush( self ):
+        if self.pending:
+            self.pending = not self.once
+            time.sleep( self.delay )
+        self.file.flush()
+
+
+    def close( self ):
+        self.file.close()
+
+
+
+
+def delayFlushes( log: buildlog.BuildLog, delay: float, once: bool ):
+    """
+    Delay the flushes of the writer thread of log by delay seconds, only the first when once is set
+    """
+    openFile = log._open
+
+    def slowOpen():
+        openFile()
+        log._file = SlowFile( log._file, delay, once )
+
+    log._open = slowOpen
+
+
+
+
+def produce( write, count: int ) -> list:
+    """
+    Write count lines, pausing every 100 lines like a compiler printing, returns the latency of each call
+    """
+    samples = []
+    for i in range( count ):
+        line = "compiling source file " + str( i )
+        start = time.perf_counter()
+        write( line )
+        samples.append( time.perf_counter() - start )
+        if i % 100 == 0:
+            time.sleep( 0.001 )
+    return samples
+
+
+def percentiles( samples: list ) -> str:
+    """
+    Returns median, 99th percentile and maximum of samples in microseconds
+    """
+    samples = sorted( samples )
+    return "%8.1f %9.1f %11.1f" % ( samples[ len( samples ) // 2 ] * 1e6, samples[ len( samples ) * 99 // 100 ] * 1e6, samples[-1] * 1e6 )
+
+
+def main():
+    print( "disk                        median       p99         max   dropped   (us per write)" )
+    with tempfile.TemporaryDirectory() as directory:
+        for name, delay, once in ( ( "fast", None, False ), ( "slow", SLOW_FLUSH, False ), ( "stalled", STALL, True ) ):
+            log = buildlog.BuildLog( directory, "bench-" + name )
+            if delay != None:
+                delayFlushes( log, delay, once )
+            samples = produce( log.writeLine, LINE_COUNT )
+            log.close()
+            print( "build log, %-15s %s %9d" % ( name, percentiles( samples ), log.dropped ) )
+
+        # the producer writes each line to the slow disk itself
+        with open( os.path.join( directory, "direct.log" ), "w", encoding = "utf-8" ) as f:
+            def direct( line: str ):
+                time.sleep( SLOW_FLUSH )
+                f.write( line + "\n" )
+                f.flush()
+            samples = produce( direct, DIRECT_LINE_COUNT )
+        print( "direct write, slow         %s %9s" % ( percentiles( samples ), "-" ) )
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Cost of a disabled log.debug() call compared with a plain no-op call, with and without a
+Lazy argument, and the cost of the same call when debug messages are enabled
+"""
+import timeit
+import benchutil
+
+
+from typing import List
+from common.log import format, logger, sink
+
+
+
+# calls per measurement
+CALL_COUNT = 1000000
+
+
+# calls per measurement of calls building a message
+SLOW_CALL_COUNT = 20000
+
+
+
+
+# sink discarding all lines
+class NullSink( sink.Sink ):
+    def _emit( self, lines: List[ str ] ):
+        pass
+
+
+
+
+def noop( *args, **kwargs ):
+    """
+    Function doing nothing
+    """
+    pass
+
+
+def expensiveDump() -> str:
+    """
+    Stands for a message argument expensive to build
+    """
+    return "\n".join( str( i ) for i in range( 100 ) )
+
+
+def perCall( statement: str, namespace: dict, count: int = CALL_COUNT ) -> float:
+    """
+    Returns the fastest time of a statement in nanoseconds per call
+    """
+    timer = timeit.Timer( statement, globals = namespace )
+    return min( timer.repeat( 3, count ) ) / count * 1e9
+
+
+def main():
+    formatter = format.Formatter( 120, sink = NullSink() )
+    disabled = logger.Logger( "info", formatter = formatter )
+    enabled = logger.Logger( "debug", formatter = formatter )
+    namespace = { "noop": noop, "disabled": disabled, "enabled": enabled, "logger": logger, "expensiveDump": expensiveDump, "value": 42 }
+
+    print( "call                                          ns per call" )
+    print( "noop( 'x %%s', value )                         %8.0f" % perCall( "noop( 'x %s', value )", namespace ) )
+    print( "disabled.debug( 'x %%s', value )               %8.0f" % perCall( "disabled.debug( 'x %s', value )", namespace ) )
+    print( "disabled.debug( 'x %%s', Lazy( dump ) )        %8.0f" % perCall( "disabled.debug( 'x %s', logger.Lazy( expensiveDump ) )", namespace ) )
+    print( "disabled.debug( 'x %%s', dump() )              %8.0f" % perCall( "disabled.debug( 'x %s', expensiveDump() )", namespace, SLOW_CALL_COUNT ) )
+    print( "enabled.debug( 'x %%s', value )                %8.0f" % perCall( "enabled.debug( 'x %s', value )", namespace, SLOW_CALL_COUNT ) )
+
+
+
+if __name__ == "__main__":
+    main()
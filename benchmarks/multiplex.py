@@ -0,0 +1,86 @@
+"""
+Producer time per line of concurrent jobs writing through the multiplexer, compared with jobs
+writing through one Formatter guarded by a shared lock. Lines go to a sink discarding them.
+"""
+import threading
+import time
+import benchutil
+
+
+from typing import List
+from common.log import format, multiplex, sink
+
+
+
+# lines written by each job
+LINE_COUNT = 20000
+
+
+
+
+# sink discarding all lines
+class NullSink( sink.Sink ):
+    def _emit( self, lines: List[ str ] ):
+        pass
+
+
+
+
+def runJobs( jobCount: int, writeLine ) -> float:
+    """
+    Run jobCount producers calling writeLine( job, line ), returns the time until all producers
+    finished divided by the number of lines written
+    """
+    ready = threading.Barrier( jobCount + 1 )
+
+    def produce( job: int ):
+        ready.wait()
+        for i in range( LINE_COUNT ):
+            writeLine( job, "compiling source file " + str( i ) + " of job " + str( job ) )
+
+    threads = [ threading.Thread( target = produce, args = ( j, ) ) for j in range( jobCount ) ]
+    for t in threads:
+        t.start()
+    ready.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return ( time.perf_counter() - start ) / ( jobCount * LINE_COUNT )
+
+
+def multiplexed( jobCount: int ) -> float:
+    """
+    Returns the producer time per line writing through the multiplexer
+    """
+    mux = multiplex.Multiplexer( format.Formatter( 120, sink = NullSink() ) )
+    streams = [ mux.job( "job" + str( j ) ) for j in range( jobCount ) ]
+    perLine = runJobs( jobCount, lambda job, line: streams[ job ].writeLine( line ) )
+    for s in streams:
+        s.end()
+    mux.close()
+    return perLine
+
+
+def locked( jobCount: int ) -> float:
+    """
+    Returns the producer time per line writing through a Formatter guarded by a shared lock
+    """
+    formatter = format.Formatter( 120, sink = NullSink() )
+    lock = threading.Lock()
+
+    def writeLine( job: int, line: str ):
+        with lock:
+            formatter.write( "[job" + str( job ) + "] " + line )
+
+    return runJobs( jobCount, writeLine )
+
+
+def main():
+    print( "jobs  multiplexer  shared lock + Formatter" )
+    for jobCount in ( 1, 8, 64 ):
+        print( "%4d  %8.1f us  %11.1f us" % ( jobCount, multiplexed( jobCount ) * 1e6, locked( jobCount ) * 1e6 ) )
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Throughput of N parses against one grammar on one thread and on thread pools, isolation of
+the parsed contexts is checked by tests/test_parser.py
+"""
+import concurrent.futures
+import time
+import benchutil
+
+
+from common.cmdline import cmdarg, cmdvalue, parser
+
+
+
+# values of the synthetic grammar, every parse sets them all
+VALUE_COUNT = 200
+
+
+# parses per run
+PARSE_COUNT = 2000
+
+
+def createGrammar() -> parser.ParserRegistry:
+    """
+    Returns the synthetic grammar with an additional list value set by --origin
+    """
+    grammar = benchutil.syntheticGrammar( VALUE_COUNT )
+    origins = cmdvalue.ListValue( "bench.origins", "Synthetic list value.", "bench", initialValue = [ "default" ] )
+    grammar.addValue( origins )
+    grammar.addArgument( cmdarg.StringArgument( origins, "origin", "<URL>" ) )
+    return grammar
+
+
+def main():
+    grammar = createGrammar()
+    args = benchutil.commandLine( VALUE_COUNT ) + [ "--origin", "a" ]
+    print( "threads   parses/s" )
+    for threads in ( 1, 4, 16 ):
+        start = time.perf_counter()
+        if threads == 1:
+            for _ in range( PARSE_COUNT ):
+                parser.Parser.parse( grammar, args )
+        else:
+            with concurrent.futures.ThreadPoolExecutor( max_workers = threads ) as pool:
+                list( pool.map( lambda _: parser.Parser.parse( grammar, args ), range( PARSE_COUNT ) ) )
+        print( "%7d  %9.0f" % ( threads, PARSE_COUNT / ( time.perf_counter() - start ) ) )
+
+
+
+if __name__ == "__main__":
+    main()
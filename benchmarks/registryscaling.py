@@ -0,0 +1,24 @@
+"""
+Registering and parsing synthetic grammars of growing size, time per argument stays flat
+when registration and parsing are linear in grammar and command line size
+"""
+import benchutil
+
+
+from common.cmdline import parser
+
+
+
+def main():
+    print( "arguments   register   per arg    parse all   per arg" )
+    for count in ( 1000, 10000, 40000 ):
+        register = benchutil.best( lambda: benchutil.syntheticGrammar( count ), 1 )
+        grammar = benchutil.syntheticGrammar( count )
+        args = benchutil.commandLine( count )
+        parse = benchutil.best( lambda: parser.Parser.parse( grammar, args ) )
+        print( "%9d  %7.0f ms  %6.2f us  %8.0f ms  %6.2f us" % ( count, register * 1e3, register / count * 1e6, parse * 1e3, parse / count * 1e6 ) )
+
+
+
+if __name__ == "__main__":
+    main()
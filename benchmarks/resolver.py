@@ -0,0 +1,121 @@
+"""
+Resolving a synthetic DAG of 200 modules in local bare repositories, each clone delayed by a
+simulated network latency. Compares a serial librarian, fetching level by level with 8 jobs
+and the resolver with 8 jobs, which fetches a module as soon as its first dependent is read.
+"""
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import benchutil
+
+
+from common.librarian import git, librarian as liblibrarian, manifest, resolver
+
+
+
+# modules of the synthetic graph
+MODULE_COUNT = 200
+
+
+# range of the simulated latency of a clone in seconds
+LATENCY = ( 0.02, 0.29 )
+
+
+def dependenciesOf( index: int ) -> list:
+    """
+    Returns the dependencies of module d<index>, a binary tree with additional diamond edges
+    """
+    deps = [ c for c in ( 2 * index + 1, 2 * index + 2 ) if c < MODULE_COUNT ]
+    if ( index % 7 == 0 ) and ( index + 10 < MODULE_COUNT ):
+        deps.append( index + 10 )
+    return [ "d" + str( d ) for d in deps ]
+
+
+def createOrigins( directory: str ):
+    """
+    Create a bare repository with a manifest for each module of the graph in directory
+    """
+    environment = dict( os.environ, GIT_AUTHOR_NAME = "bench", GIT_AUTHOR_EMAIL = "bench@localhost", GIT_COMMITTER_NAME = "bench", GIT_COMMITTER_EMAIL = "bench@localhost" )
+    work = os.path.join( directory, "work" )
+    for i in range( MODULE_COUNT ):
+        shutil.rmtree( work, ignore_errors = True )
+        os.makedirs( work )
+        with open( os.path.join( work, manifest.MANIFEST_FILE ), "w", encoding = "utf-8" ) as f:
+            json.dump( { "dependencies": dependenciesOf( i ) }, f )
+        for args in ( [ "init", "--quiet" ], [ "add", "." ], [ "commit", "--quiet", "-m", "d" + str( i ) ] ):
+            subprocess.run( [ "git" ] + args, cwd = work, env = environment, check = True )
+        subprocess.run( [ "git", "clone", "--quiet", "--bare", work, os.path.join( directory, "origins", "d" + str( i ) + ".git" ) ], check = True )
+    shutil.rmtree( work )
+    os.makedirs( os.path.join( directory, "root" ) )
+    with open( os.path.join( directory, "root", manifest.MANIFEST_FILE ), "w", encoding = "utf-8" ) as f:
+        json.dump( { "dependencies": [ "d0" ] }, f )
+
+
+def delayClones():
+    """
+    Delay git.clone by a latency fixed per module
+    """
+    rng = random.Random( 1 )
+    latency = { "d" + str( i ) + ".git": rng.uniform( *LATENCY ) for i in range( MODULE_COUNT ) }
+    clone = git.clone
+
+    def delayedClone( url: str, path: str, ref: str = None ):
+        time.sleep( latency.get( os.path.basename( url ), 0.0 ) )
+        clone( url, path, ref )
+
+    git.clone = delayedClone
+
+
+def levelByLevel( lib: liblibrarian.Librarian, rootDir: str ) -> int:
+    """
+    Fetch the graph one level at a time, returns the number of modules fetched
+    """
+    level = [ d.module for d in manifest.read( rootDir ) ]
+    seen = set( level )
+    count = 0
+    while len( level ) > 0:
+        results = lib.fetch( level )
+        count += len( results )
+        nextLevel = []
+        for r in results:
+            for d in manifest.read( r.path ):
+                if not d.module in seen:
+                    seen.add( d.module )
+                    nextLevel.append( d.module )
+        level = nextLevel
+    return count
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        createOrigins( directory )
+        delayClones()
+        origins = [ os.path.join( directory, "origins", "${module}.git" ) ]
+        rootDir = os.path.join( directory, "root" )
+        fetchedDir = os.path.join( directory, "fetched" )
+
+        def librarian( jobs: int ) -> liblibrarian.Librarian:
+            shutil.rmtree( fetchedDir, ignore_errors = True )
+            return liblibrarian.Librarian( fetchedDir, None, origins, "update", jobs )
+
+        start = time.perf_counter()
+        graph = resolver.Resolver( librarian( 1 ) ).resolve( "root", rootDir )
+        print( "serial (1 job)            %5.1f s  %d modules" % ( time.perf_counter() - start, len( graph.modules() ) - 1 ) )
+
+        start = time.perf_counter()
+        count = levelByLevel( librarian( 8 ), rootDir )
+        print( "level by level (8 jobs)   %5.1f s  %d modules" % ( time.perf_counter() - start, count ) )
+
+        start = time.perf_counter()
+        graph = resolver.Resolver( librarian( 8 ) ).resolve( "root", rootDir )
+        print( "resolver (8 jobs)         %5.1f s  %d modules" % ( time.perf_counter() - start, len( graph.modules() ) - 1 ) )
+        assert len( graph.failed() ) == 0
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Parsing a response file of 100k tokens, reports the parse time and the peak of memory traced
+while parsing. The file adds 50k origins, so most of the peak is the resulting origin list.
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+import benchutil
+
+
+from common import globalargs
+from common.cmdline import parser
+
+
+
+# tokens in the response file
+TOKEN_COUNT = 100000
+
+
+def main():
+    grammar = parser.ParserRegistry()
+    globalargs.GlobalArgs( tempfile.gettempdir() ).addToParser( grammar )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join( directory, "args.rsp" )
+        with open( path, "w", encoding = "utf-8" ) as f:
+            for i in range( TOKEN_COUNT // 2 ):
+                f.write( "--librarian-origins https://example.com/origin" + str( i ) + "/${module}.git\n" )
+        size = os.path.getsize( path )
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        ctx = parser.Parser.parse( grammar, [ "@" + path ] )
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    origins = ctx.resolve( "general.librarian.origins" )
+    print( "response file   %d tokens, %.1f MiB" % ( TOKEN_COUNT, size / 1024 / 1024 ) )
+    print( "parse time      %.2f s (traced)" % elapsed )
+    print( "peak traced     %.1f MiB" % ( peak / 1024 / 1024 ) )
+    print( "origins parsed  %d" % len( origins ) )
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Memory of a synthetic grammar of 20k values with options and 20k arguments, and the peak
+while parsing a command line setting all of them, both traced with tracemalloc. The slotted
+classes are compared with copies keeping their attributes in __dict__, the layout before
+__slots__ were added.
+"""
+import gc
+import tracemalloc
+import types
+import benchutil
+
+
+from common.cmdline import cmdarg, cmdvalue, parser
+
+
+
+# values and arguments of the synthetic grammar
+VALUE_COUNT = 20000
+
+
+# unslotted copies by slotted class
+_copies = {}
+
+
+
+
+def unslotted( cls: type ) -> type:
+    """
+    Returns a copy of a class and its bases without __slots__, instances keep their attributes in __dict__
+    """
+    if cls is object:
+        return object
+    copy = _copies.get( cls )
+    if copy != None:
+        return copy
+    namespace = {}
+    for name, member in vars( cls ).items():
+        if ( not name in ( "__slots__", "__dict__", "__weakref__" ) ) and not isinstance( member, types.MemberDescriptorType ):
+            namespace[ name ] = member
+    copy = type( cls.__name__, tuple( unslotted( b ) for b in cls.__bases__ ), namespace )
+
+    # zero argument super() of the copied methods needs to refer to the copy
+    for name, member in namespace.items():
+        if isinstance( member, types.FunctionType ) and ( "__class__" in member.__code__.co_freevars ):
+            closure = tuple(
+                types.CellType( copy ) if freeVar == "__class__" else cell
+                for freeVar, cell in zip( member.__code__.co_freevars, member.__closure__ )
+            )
+            setattr( copy, name, types.FunctionType( member.__code__, member.__globals__, member.__name__, member.__defaults__, closure ) )
+    _copies[ cls ] = copy
+    return copy
+
+
+def measure( **classes ):
+    """
+    Returns the memory of the synthetic grammar and the peak memory of parsing all its commands in bytes
+    """
+    gc.collect()
+    tracemalloc.start()
+    grammar = benchutil.syntheticGrammar( VALUE_COUNT, withOptions = True, **classes )
+    gc.collect()
+    grammarSize, _ = tracemalloc.get_traced_memory()
+
+    args = benchutil.commandLine( VALUE_COUNT, "a" )
+    gc.collect()
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    ctx = parser.Parser.parse( grammar, args )
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert ctx.resolve( "bench.value0" ) == "a"
+    return grammarSize, peak - base
+
+
+def main():
+    dictGrammar, dictPeak = measure(
+        valueClass    = unslotted( cmdvalue.Value ),
+        optionClass   = unslotted( cmdvalue.Option ),
+        argumentClass = unslotted( cmdarg.StringArgument )
+    )
+    slotGrammar, slotPeak = measure()
+
+    print( "                                          __dict__   __slots__" )
+    print( "grammar, %d values and arguments   %5.1f MiB   %5.1f MiB" % ( VALUE_COUNT, dictGrammar / 1024 / 1024, slotGrammar / 1024 / 1024 ) )
+    print( "peak parsing %d commands          %5.1f MiB   %5.1f MiB" % ( VALUE_COUNT, dictPeak / 1024 / 1024, slotPeak / 1024 / 1024 ) )
+
+
+
+if __name__ == "__main__":
+    main()
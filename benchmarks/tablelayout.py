@@ -0,0 +1,62 @@
+"""
+Writing 10k dependency status rows as N-column table, compared with the same rows written as
+2-column write( tuple ) calls. Lines go to a sink discarding them.
+"""
+import random
+import time
+import benchutil
+
+
+from typing import List
+from common.log import format, sink
+
+
+
+# rows of the table
+ROW_COUNT = 10000
+
+
+
+
+# sink discarding all lines
+class NullSink( sink.Sink ):
+    def _emit( self, lines: List[ str ] ):
+        pass
+
+
+
+
+def statusRows() -> List[ List[ object ] ]:
+    """
+    Returns rows of ( module, origin, mode, commit, status ), commits of failed modules are None
+    """
+    rng = random.Random( 1 )
+    rows = []
+    for i in range( ROW_COUNT ):
+        module = "module" + str( i )
+        failed = ( i % 50 == 0 )
+        commit = None if failed else "%040x" % rng.getrandbits( 160 )
+        status = "failed: repository not found in any origin" if failed else rng.choice( ( "cloned", "updated", "unchanged" ) )
+        rows.append( [ module, "https://github.com/pdaudio/" + module + ".git", "update", commit, status ] )
+    return rows
+
+
+def main():
+    rows = statusRows()
+    header = [ "module", "origin", "mode", "commit", "status" ]
+    for width in ( 200, 100 ):
+        formatter = format.Formatter( width, sink = NullSink(), warpCache = format.WarpCache() )
+        start = time.perf_counter()
+        formatter.writeTable( rows, header )
+        print( "writeTable, width %3d    %4.0f ms" % ( width, ( time.perf_counter() - start ) * 1e3 ) )
+
+    formatter = format.Formatter( 100, sink = NullSink(), warpCache = format.WarpCache() )
+    start = time.perf_counter()
+    for row in rows:
+        formatter.write( ( row[0], " ".join( str( c ) for c in row[ 1: ] ) ) )
+    print( "write( tuple ), width 100  %4.0f ms" % ( ( time.perf_counter() - start ) * 1e3 ) )
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Warping text at widths 40, 80 and 200: single lines of growing length, where time per MB stays
+flat when warping is linear in the length of the text, and multi-line log text compared with
+the character by character implementation warping each line before, which needs to produce
+the same lines
+"""
+import random
+import time
+import benchutil
+
+
+from typing import List
+from common.log import format
+
+
+
+# widths to warp at
+WIDTHS = ( 40, 80, 200 )
+
+
+# sizes of single lines in MB
+LINE_SIZES = ( 0.25, 0.5, 1.0, 2.0 )
+
+
+# size of the log text in MB
+LOG_SIZE = 0.5
+
+
+
+
+def randomText( length: int, rng: random.Random = None ) -> str:
+    """
+    Returns a line of random words with separators of at least length characters
+    """
+    rng = rng if rng != None else random.Random( 1 )
+    words = []
+    size = 0
+    while size < length:
+        word = "".join( rng.choice( "abcdefghijklmnopqrstuvwxyz" ) for _ in range( rng.randint( 1, 12 ) ) )
+        word += rng.choice( ( " ", " ", " ", "-", "/", ", " ) )
+        words.append( word )
+        size += len( word )
+    return "".join( words )
+
+
+def logText( length: int ) -> str:
+    """
+    Returns lines of a build log of at least length characters, short messages, long compiler
+    command lines, paths without break chars and empty lines
+    """
+    rng = random.Random( 2 )
+    lines = []
+    size = 0
+    while size < length:
+        kind = rng.random()
+        if kind < 0.5:
+            line = "compiling " + randomText( rng.randint( 10, 60 ), rng )
+        elif kind < 0.8:
+            line = "cc -O2 -Wall " + " ".join( "-I/usr/include/" + randomText( rng.randint( 5, 30 ), rng ).replace( " ", "" ) for _ in range( rng.randint( 2, 20 ) ) )
+        elif kind < 0.95:
+            line = "/".join( "dir" + str( rng.randint( 0, 999 ) ) for _ in range( rng.randint( 5, 60 ) ) )
+        else:
+            line = ""
+        lines.append( line )
+        size += len( line ) + 1
+    return "\n".join( lines )
+
+
+def baselineWarp( text: str, maximumWidth: int, settings: format.TextWarpSettings ) -> List[ str ]:
+    """
+    Returns the lines of text warped by the implementation before the offset based warping,
+    each step copies the rest of the line and scans it character by character
+    """
+    result = []
+    processingFirstLine = True
+    for line in text.replace( "\r", "" ).replace( "\t", " " ).split( "\n" ):
+        breakMode        = False
+        lineBegin        = True
+        lineBuffer       = ""
+        consumeSpace     = False
+        lineHasNoDataYet = True
+        while( True ):
+            if consumeSpace and lineBegin:
+                if line[0:1] in settings.spaceChars:
+                    line = line[1:]
+            consumeSpace = False
+
+            if lineBegin:
+                if breakMode:
+                    lineBuffer += settings.firstBreakPrefix if processingFirstLine else settings.followBreakPrefix
+                else:
+                    lineBuffer += settings.firstLinePrefix if processingFirstLine else settings.followLinePrefix
+                lineBegin        = False
+                lineHasNoDataYet = True
+
+            t = lineBuffer + line
+            if len( t ) <= maximumWidth:
+                result.append( t )
+                processingFirstLine = False
+                break
+
+            t = ""
+            for cIndex in range( len( line ) ):
+                c = line[ cIndex ]
+                if( c in settings.spaceChars ):
+                    if( cIndex == 0 ):
+                        t += c
+                    else:
+                        consumeSpace = True
+                        break
+                else:
+                    t += c
+            if len( lineBuffer + t ) <= maximumWidth:
+                line = line[ len( t ) : ]
+                lineBuffer += t
+                lineHasNoDataYet = False
+                continue
+
+            t = ""
+            for cIndex in range( len( line ) ):
+                c = line[ cIndex ]
+                if( c in settings.splitChars ):
+                    t += c
+                    consumeSpace = True
+                    break
+                else:
+                    t += c
+            if len( lineBuffer + t ) <= maximumWidth:
+                line = line[ len( t ) : ]
+                lineBuffer += t
+                lineHasNoDataYet = False
+                continue
+
+            if lineHasNoDataYet:
+                maxChars = maximumWidth - len( lineBuffer )
+                lineBuffer += line[0:maxChars]
+                line = line[maxChars:]
+
+            result.append( lineBuffer )
+            lineHasNoDataYet = False
+            breakMode        = True
+            lineBegin        = True
+            lineBuffer       = ""
+    return result
+
+
+def timed( function, *args ):
+    """
+    Returns the result of function( *args ) and its run time in seconds
+    """
+    start = time.perf_counter()
+    result = function( *args )
+    return result, time.perf_counter() - start
+
+
+def main():
+    settings = format.TextWarpSettings()
+
+    print( "single line   width      lines     time    per MB" )
+    for megabytes in LINE_SIZES:
+        text = randomText( int( megabytes * 1000 * 1000 ) )
+        for width in WIDTHS:
+            lines, elapsed = timed( format._warp, text, width, settings )
+            print( "%7.2f MB  %6d  %9d  %6.2f s  %6.2f s" % ( megabytes, width, len( lines ), elapsed, elapsed / megabytes ) )
+
+    text = logText( int( LOG_SIZE * 1000 * 1000 ) )
+    print()
+    print( "log text      width      lines     time  baseline  same output" )
+    for width in WIDTHS:
+        lines, elapsed = timed( format._warp, text, width, settings )
+        baseline, baselineElapsed = timed( baselineWarp, text, width, settings )
+        same = list( lines ) == baseline
+        print( "%7.2f MB  %6d  %9d  %6.2f s  %6.2f s  %s" % ( LOG_SIZE, width, len( lines ), elapsed, baselineElapsed, "yes" if same else "NO" ) )
+        assert same, "warped log text differs from the baseline at width " + str( width )
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import json
+import os
+
+
+from typing import Dict, List
+from . import commandtrie
+from . import frozen
+
+
+
+# version of the argument index format
+FORMAT_VERSION = 1
+
+
+# file name of the argument index within the cache directory
+INDEX_FILE = "argindex.json"
+
+
+
+
+# index of the argument metadata of all loaded modules
+class ArgumentIndex:
+    def __init__( self, cacheDir: str ):
+        """
+        Creates an empty argument index stored in cacheDir. Modules are only known after their
+        loader stored their arguments, modules not loaded yet are reported by missing().
+        """
+        self.path = os.path.join( cacheDir, INDEX_FILE )
+        self.entries = {}
+        self.trie = None
+
+
+    @staticmethod
+    def load( cacheDir: str ) -> 'ArgumentIndex':
+        """
+        Load the argument index of a cache directory, an unreadable index is treated as empty
+        """
+        index = ArgumentIndex( cacheDir )
+        try:
+            with open( index.path, "r", encoding = "utf-8" ) as f:
+                content = json.load( f )
+            if content.get( "version" ) == FORMAT_VERSION:
+                for module in content[ "modules" ]:
+                    entry = content[ "modules" ][ module ]
+                    index.entries[ module ] = ( entry[ "key" ], frozen.FrozenGrammar.fromData( entry[ "grammar" ] ) )
+        except ( OSError, ValueError, KeyError, TypeError ):
+            index.entries = {}
+        return index
+
+
+    def save( self ):
+        """
+        Write the argument index
+        """
+        modules = {}
+        for module in self.entries:
+            key, grammar = self.entries[ module ]
+            modules[ module ] = { "key": key, "grammar": grammar.toData() }
+        tmpPath = self.path + "." + str( os.getpid() ) + ".tmp"
+        with open( tmpPath, "w", encoding = "utf-8" ) as f:
+            json.dump( { "version": FORMAT_VERSION, "modules": modules }, f, separators = ( ",", ":" ) )
+        os.replace( tmpPath, self.path )
+
+
+    def store( self, module: str, key: str, registry ) -> bool:
+        """
+        Store the argument metadata of a loaded module, returns true when the index was updated.
+        Called for each module as it is loaded, key changes with the sources registering the arguments.
+        """
+        entry = self.entries.get( module )
+        if ( entry != None ) and ( entry[0] == key ):
+            return False
+        self.entries[ module ] = ( key, registry.freeze() )
+        self.trie = None
+        self.save()
+        return True
+
+
+    def modules( self ) -> List[ str ]:
+        """
+        Returns the names of all indexed modules
+        """
+        return list( self.entries )
+
+
+    def missing( self, modules: List[ str ] ) -> List[ str ]:
+        """
+        Returns the modules not present in the index
+        """
+        return [ m for m in modules if not m in self.entries ]
+
+
+    def commandTrie( self ) -> commandtrie.CommandTrie:
+        """
+        Returns a trie of the commands of all indexed modules, entries are the owning modules
+        and each command is tagged by its modules
+        """
+        if self.trie == None:
+            trie = commandtrie.CommandTrie()
+            for module in self.entries:
+                grammar = self.entries[ module ][1]
+                for cmd in grammar.commands:
+                    modules = trie.find( cmd )
+                    if modules == None:
+                        modules = []
+                    modules.append( module )
+                    trie.insert( cmd, modules, ( module, ) )
+            self.trie = trie
+        return self.trie
+
+
+    def modulesOfCommands( self, commands: List[ str ] ) -> Dict[ str, List[ str ] ]:
+        """
+        Returns the indexed modules registering each command, an empty list for commands of no indexed module
+        """
+        trie = self.commandTrie()
+        result = {}
+        for cmd in commands:
+            modules = trie.find( cmd )
+            result[ cmd ] = list( modules ) if modules != None else []
+        return result
+
+
+    def createRegistry( self, modules: List[ str ] = None ):
+        """
+        Create a parser registry from the argument metadata of indexed modules,
+        values and commands registered by multiple modules are taken from the first module
+        """
+        values = {}
+        commands = {}
+        for module in ( modules if modules != None else self.entries ):
+            entry = self.entries.get( module )
+            if entry == None:
+                continue
+            grammar = entry[1]
+            for vKey in grammar.values:
+                values.setdefault( vKey, grammar.values[ vKey ] )
+            for cmd in grammar.commands:
+                commands.setdefault( cmd, grammar.commands[ cmd ] )
+        return frozen.FrozenGrammar( values, commands ).createRegistry()
@@ -1,30 +1,47 @@
 from typing import Union, List
 
 from .cmdvalue import Value
-from .exceptions import CmdLineUnexpectedArgumentCount, CmdLineCommandTwice, CmdLineInvalidOption
+from .exceptions import CmdLineUnexpectedArgumentCount, CmdLineCommandTwice, CmdLineInvalidOption, CmdLineInvalidNumber
 
 
 
 class _ParsedValues:
+    __slots__ = ( "value", "argIndex", "argument", "args" )
+
     def __init__(
             self,
             value: Value,
             argIndex: int,
-            allArgs: List[ str ],
+            argument: str,
             args: List[ str ]
         ):
         """
         Values from parser
         """
+        self.set( value, argIndex, argument, args )
+
+
+    def set(
+            self,
+            value: Value,
+            argIndex: int,
+            argument: str,
+            args: List[ str ]
+        ):
+        """
+        Set values from parser, the parser reuses a single instance for all commands
+        """
         self.value = value
         self.argIndex = argIndex
-        self.allArgs = allArgs
+        self.argument = argument
         self.args = args
 
 
 
 
 class Argument:
+    __slots__ = ( "command", "valueBinding" )
+
     def __init__(
             self,
             valueBinding: Union[ str, Value ],
@@ -66,8 +83,8 @@ class Argument:
         Validate parameter usage
         """
         if ctx.value.unqiue:
-            if( ctx.value.isSet() ):
-                raise CmdLineCommandTwice( ctx.argIndex, ctx.allArgs, self.getCommand() )
+            if( ctx.value.isParsed() ):
+                raise CmdLineCommandTwice( ctx.argIndex, ctx.argument, self.getCommand() )
 
 
     def _assertValueCount( self, ctx: _ParsedValues, count: int ):
@@ -75,7 +92,7 @@ class Argument:
         Assert to have N values
         """
         if len( ctx.args ) != count:
-            raise CmdLineUnexpectedArgumentCount( ctx.argIndex, ctx.allArgs, self.getCommand(), count, len( ctx.args ) )
+            raise CmdLineUnexpectedArgumentCount( ctx.argIndex, ctx.argument, self.getCommand(), count, len( ctx.args ) )
 
 
     def parse( self, ctx: _ParsedValues ):
@@ -88,6 +105,8 @@ class Argument:
 
 
 class FlagArgument( Argument ):
+    __slots__ = ( "data", )
+
     def __init__(
             self,
             valueBinding: Union[ str, Value ],
@@ -109,6 +128,8 @@ class FlagArgument( Argument ):
 
 
 class StringArgument( Argument ):
+    __slots__ = ( "argName", )
+
     def __init__(
             self,
             valueBinding: Union[ str, Value ],
@@ -136,5 +157,36 @@ class StringArgument( Argument ):
                     optionFound = True
                     break
             if( optionFound == False ):
-                raise CmdLineInvalidOption( ctx.argIndex, ctx.allArgs, self.getCommand(), ctx.args[0] )
+                raise CmdLineInvalidOption( ctx.argIndex, ctx.argument, self.getCommand(), ctx.args[0] )
         ctx.value.onParse( ctx.args[0] )
+
+
+
+
+class IntegerArgument( StringArgument ):
+    __slots__ = ( "minimum", )
+
+    def __init__(
+            self,
+            valueBinding: Union[ str, Value ],
+            command: str,
+            argName: str,
+            minimum: int = None
+        ):
+        """
+        Create a new integer parser argument
+        """
+        super().__init__( valueBinding, command, argName )
+        self.minimum = minimum
+
+
+    def parse( self, ctx: _ParsedValues ):
+        self._validate( ctx )
+        self._assertValueCount( ctx, 1 )
+        try:
+            number = int( ctx.args[0] )
+        except ValueError:
+            raise CmdLineInvalidNumber( ctx.argIndex, ctx.argument, self.getCommand(), ctx.args[0] )
+        if ( self.minimum != None ) and ( number < self.minimum ):
+            raise CmdLineInvalidNumber( ctx.argIndex, ctx.argument, self.getCommand(), ctx.args[0], self.minimum )
+        ctx.value.onParse( number )
@@ -1,3 +1,6 @@
+import copy
+
+
 from typing import List
 
 
@@ -5,19 +8,26 @@ from typing import List
 
 # option of command value
 class Option:
+    __slots__ = ( "option", "description" )
+
     def __init__( self, option: str, description ):
         """
         Create a new option for OptionValue
         """
         self.option      = option
         self.description = description
-        pass
 
 
 
 
 # value of command parameter
 class Value:
+    __slots__ = (
+        "identifier", "description", "category",
+        "_isSet", "_isParsed", "_isOverwrite", "_data", "_default", "_defaultNode",
+        "expected", "unqiue", "options"
+    )
+
     def __init__(
             self,
             identifier: str,
@@ -39,6 +49,7 @@ class Value:
         self.description = description
         self.category = category
         self._isSet = False
+        self._isParsed = False
         self._isOverwrite = False
         self._data = None
         self._default = defaultValue
@@ -54,10 +65,11 @@ class Value:
 
     def create( self ):
         """
-        Creates a storage item for a commandline value
+        Creates a storage item for a commandline value, inheriting the state of this value
         """
-        n = type( self )( identifier = self.identifier, description = self.description, category = self.category )
-        n._defaultNode = self
+        n = copy.copy( self )
+        n._defaultNode = self._defaultNode if self._defaultNode != None else self
+        n._isParsed = False
         return n
 
 
@@ -94,6 +106,14 @@ class Value:
         return self._isSet
 
 
+    def isParsed( self ):
+        """
+        Returns true when set by the parse of the context holding this value, values inherited
+        from a parent context may be set again
+        """
+        return self._isParsed
+
+
     def getDefault( self ):
         """
         Returns the default value of this commandline parameter
@@ -120,6 +140,23 @@ class Value:
         """
         self._data = data
         self._isSet = True
+        self._isParsed = True
+
+
+    def applyLayer( self, lower, entry ):
+        """
+        Returns the value of a settings layer entry applied on top of the value of a lower layer
+        """
+        return entry
+
+
+    def applyParsed( self, lower ):
+        """
+        Returns the value set by parser or overwrite applied on top of the value of a lower layer
+        """
+        if self._isOverwrite or self._isSet:
+            return self._data
+        return lower
 
 
     def getIdentifier( self ):
@@ -160,6 +197,8 @@ class Value:
 
 # list value of command parameter
 class ListValue( Value ):
+    __slots__ = ( "_edits", )
+
     def __init__(
             self,
             identifier: str,
@@ -183,22 +222,74 @@ class ListValue( Value ):
             unique = False
         )
         self._data = [] + initialValue
+        self._edits = []
 
 
-    def onParse( self, data ):
+    def create( self ):
+        n = super().create()
+        if n._data != None:
+            n._data = [] + n._data
+        n._edits = [] + n._edits
+        return n
+
+
+    @staticmethod
+    def _applyEntry( data: list, dStr: str ) -> list:
         """
-        Sets the value of this command line parameter
+        Applies a single entry to a list, returns the modified list
         """
-        # insert entry into list
-        dStr = str( data )
         if( dStr == "=" ):
-            self._data = []
+            return []
         elif( dStr.startswith( "=" ) ):
-            self._data = [ dStr[1:] ]
+            return [ dStr[1:] ]
         elif( dStr.startswith( "+" ) ):
-            self._data = [ dStr[1:] ] + self._data
+            data.insert( 0, dStr[1:] )
         else:
-            self._data.append( dStr )
+            data.append( dStr )
+        return data
+
+
+    def onParse( self, data ):
+        """
+        Sets the value of this command line parameter
+        """
+        # start from the default list when not set before
+        if not self._isSet:
+            self._data = [] + self.get()
+
+        # insert entry into list, keep entry to apply it on top of other settings layers
+        dStr = str( data )
+        self._data = ListValue._applyEntry( self._data, dStr )
+        self._edits.append( dStr )
 
         # value is set from command line
         self._isSet = True
+        self._isParsed = True
+
+
+    def applyLayer( self, lower, entry ):
+        """
+        Returns the value of a settings layer entry applied on top of the value of a lower layer,
+        a list replaces the lower value, whitespace separated entries of a string are inserted like
+        command line entries
+        """
+        if isinstance( entry, ( list, tuple ) ):
+            return [ str( e ) for e in entry ]
+        data = [] + ( lower if lower != None else [] )
+        for dStr in str( entry ).split():
+            data = ListValue._applyEntry( data, dStr )
+        return data
+
+
+    def applyParsed( self, lower ):
+        """
+        Returns the entries set by parser or overwrite applied on top of the value of a lower layer
+        """
+        if self._isOverwrite:
+            return self._data
+        if not self._isSet:
+            return lower
+        data = [] + ( lower if lower != None else [] )
+        for dStr in self._edits:
+            data = ListValue._applyEntry( data, dStr )
+        return data
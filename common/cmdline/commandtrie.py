@@ -0,0 +1,141 @@
+from typing import List, Tuple
+
+
+
+# node of command trie
+class _TrieNode:
+    __slots__ = ( "children", "command", "entry", "count", "single", "tags" )
+
+    def __init__( self ):
+        """
+        Creates an empty trie node
+        """
+        self.children = {}
+        self.command  = None
+        self.entry    = None
+        self.count    = 0
+        self.single   = None
+        self.tags     = set()
+
+
+
+
+# prefix tree of commands
+class CommandTrie:
+    def __init__( self ):
+        """
+        Creates an empty command trie
+        """
+        self.root = _TrieNode()
+
+
+    def insert( self, command: str, entry, tags = () ):
+        """
+        Insert a command with its entry and tags to filter suggestions, i.e. category or module
+        """
+        # count new commands only
+        existing = self._findNode( command )
+        isNew = ( existing == None ) or ( existing.command == None )
+
+        node = self.root
+        path = [ node ]
+        for c in command:
+            child = node.children.get( c )
+            if child == None:
+                child = _TrieNode()
+                node.children[ c ] = child
+            node = child
+            path.append( node )
+        node.command = command
+        node.entry = entry
+
+        # update subtree information
+        for n in path:
+            if isNew:
+                n.count += 1
+            n.single = node
+            n.tags.update( tags )
+
+
+    def _findNode( self, prefix: str ) -> _TrieNode:
+        """
+        Returns the node of a prefix or None
+        """
+        node = self.root
+        for c in prefix:
+            node = node.children.get( c )
+            if node == None:
+                return None
+        return node
+
+
+    def find( self, command: str ):
+        """
+        Returns the entry of a command or None
+        """
+        node = self._findNode( command )
+        if node == None:
+            return None
+        return node.entry
+
+
+    def complete( self, prefix: str ) -> Tuple[ str, object, int ]:
+        """
+        Returns ( command, entry, matchCount ) for an exact command or unambiguous prefix,
+        command and entry are None when no or multiple commands start with the prefix
+        """
+        node = self._findNode( prefix )
+        if node == None:
+            return ( None, None, 0 )
+        if node.command != None:
+            return ( node.command, node.entry, 1 )
+        if node.count == 1:
+            return ( node.single.command, node.single.entry, 1 )
+        return ( None, None, node.count )
+
+
+    def startingWith( self, prefix: str, limit: int = None ) -> List[ str ]:
+        """
+        Returns the commands starting with a prefix in lexical order
+        """
+        result = []
+        node = self._findNode( prefix )
+        if node == None:
+            return result
+        pending = [ node ]
+        while ( len( pending ) > 0 ) and ( ( limit == None ) or ( len( result ) < limit ) ):
+            n = pending.pop()
+            if n.command != None:
+                result.append( n.command )
+            for c in sorted( n.children, reverse = True ):
+                pending.append( n.children[ c ] )
+        return result
+
+
+    def suggest( self, word: str, maxDistance: int = 2, limit: int = 5, tag = None ) -> List[ str ]:
+        """
+        Returns commands within an edit distance of word, closest first,
+        only subtrees within the distance bound and holding the tag are visited
+        """
+        found = []
+        firstRow = list( range( len( word ) + 1 ) )
+
+        def visit( node: _TrieNode, c: str, previousRow: List[ int ] ):
+            row = [ previousRow[0] + 1 ]
+            for i in range( 1, len( word ) + 1 ):
+                cost = 0 if word[ i - 1 ] == c else 1
+                row.append( min( row[ i - 1 ] + 1, previousRow[ i ] + 1, previousRow[ i - 1 ] + cost ) )
+            if ( node.command != None ) and ( row[-1] <= maxDistance ):
+                found.append( ( row[-1], node.command ) )
+            if min( row ) <= maxDistance:
+                for cc in node.children:
+                    child = node.children[ cc ]
+                    if ( tag == None ) or ( tag in child.tags ):
+                        visit( child, cc, row )
+
+        for c in self.root.children:
+            child = self.root.children[ c ]
+            if ( tag == None ) or ( tag in child.tags ):
+                visit( child, c, firstRow )
+        found.sort()
+        return [ cmd for _, cmd in found[ 0:limit ] ]
@@ -6,15 +6,16 @@ class CmdLineException( Exception ):
             self,
             what: str,
             argumentId: int,
-            arguments: List[ str ]
+            argument: str
         ):
         """
-        Creates a new command line parse exception
+        Creates a new command line parse exception, argument is the offending token at
+        position argumentId of the expanded command line
         """
         super().__init__( what )
         self.what = what
         self.argumentId = argumentId
-        self.arguments = arguments
+        self.argument = argument
 
 
 
@@ -23,17 +24,16 @@ class CmdLineNoArgumentExpected( CmdLineException ):
     def __init__(
             self,
             argumentId: int,
-            arguments: List[ str ]
+            argument: str
         ):
         """
         Creates a new argument not expected exception
         """
-        super().__init__( "argument not expected", argumentId, arguments )
+        super().__init__( "argument not expected", argumentId, argument )
 
 
     def __str__( self ):
-        argstr = self.arguments[ self.argumentId ]
-        return "argument '" + argstr + "' @" + str( self.argumentId ) + " not expected"
+        return "argument '" + self.argument + "' @" + str( self.argumentId ) + " not expected"
 
 
 
@@ -42,17 +42,21 @@ class CmdLineUnknownCommand( CmdLineException ):
     def __init__(
             self,
             argumentId: int,
-            arguments: List[ str ]
+            argument: str,
+            suggestions: List[ str ] = None
         ):
         """
         Creates an unkown argument exception
         """
-        super().__init__( "command not found", argumentId, arguments )
+        super().__init__( "command not found", argumentId, argument )
+        self.suggestions = suggestions if suggestions != None else []
 
 
     def __str__( self ):
-        argstr = self.arguments[ self.argumentId ]
-        return "command '" + argstr + "' @" + str( self.argumentId ) + " is unknown"
+        s = "command '" + self.argument + "' @" + str( self.argumentId ) + " is unknown"
+        if len( self.suggestions ) > 0:
+            s += ", did you mean --" + " or --".join( self.suggestions ) + "?"
+        return s
 
 
 
@@ -61,7 +65,7 @@ class CmdLineUnexpectedArgumentCount( CmdLineException ):
     def __init__(
             self,
             argumentId: int,
-            arguments: List[ str ],
+            argument: str,
             command: str,
             expectedCount: int,
             gotCount: int
@@ -69,7 +73,7 @@ class CmdLineUnexpectedArgumentCount( CmdLineException ):
         """
         Creates an unexpected argument count exception
         """
-        super().__init__( "unexpected argument count", argumentId, arguments )
+        super().__init__( "unexpected argument count", argumentId, argument )
         self.command = command
         self.expectedCount = expectedCount
         self.gotCount = gotCount
@@ -85,13 +89,13 @@ class CmdLineCommandTwice( CmdLineException ):
     def __init__(
             self,
             argumentId: int,
-            arguments: List[ str ],
+            argument: str,
             command: str
         ):
         """
         Creates a command issued twice exception
         """
-        super().__init__( "command issued twice", argumentId, arguments )
+        super().__init__( "command issued twice", argumentId, argument )
         self.command = command
 
 
@@ -105,13 +109,13 @@ class CmdLineMissingCommand( CmdLineException ):
     def __init__(
             self,
             argumentId: int,
-            arguments: List[ str ],
+            argument: str,
             commands
         ):
         """
         Creates a command missing exception
         """
-        super().__init__( "command missing", argumentId, arguments )
+        super().__init__( "command missing", argumentId, argument )
         self.commands = commands
 
 
@@ -134,17 +138,101 @@ class CmdLineInvalidOption( CmdLineException ):
     def __init__(
             self,
             argumentId: int,
-            arguments: List[ str ],
+            argument: str,
             command,
             optionValue
         ):
         """
         Creates an invalid commad option
         """
-        super().__init__( "invalid option", argumentId, arguments )
+        super().__init__( "invalid option", argumentId, argument )
         self.command = command
         self.optionValue = optionValue
 
 
     def __str__( self ):
         return "command '--" + self.command + "' has no option '" + str( self.optionValue ) + "'"
+
+
+
+
+class CmdLineInvalidNumber( CmdLineException ):
+    def __init__(
+            self,
+            argumentId: int,
+            argument: str,
+            command,
+            numberValue,
+            minimum: int = None
+        ):
+        """
+        Creates an invalid number exception
+        """
+        super().__init__( "invalid number", argumentId, argument )
+        self.command = command
+        self.numberValue = numberValue
+        self.minimum = minimum
+
+
+    def __str__( self ):
+        if self.minimum != None:
+            return "command '--" + self.command + "' expects a number of at least " + str( self.minimum ) + ", got '" + str( self.numberValue ) + "'"
+        return "command '--" + self.command + "' expects a number, got '" + str( self.numberValue ) + "'"
+
+
+
+
+class CmdLineInterpolationCycle( CmdLineException ):
+    def __init__(
+            self,
+            cycle: List[ str ]
+        ):
+        """
+        Creates a cyclic value reference exception
+        """
+        super().__init__( "cyclic value reference", None, None )
+        self.cycle = cycle
+
+
+    def __str__( self ):
+        return "values '" + "' -> '".join( self.cycle ) + "' reference each other"
+
+
+
+
+class CmdLineResponseFile( CmdLineException ):
+    def __init__(
+            self,
+            path: str,
+            reason: str
+        ):
+        """
+        Creates a response file exception
+        """
+        super().__init__( "invalid response file", None, None )
+        self.path = path
+        self.reason = reason
+
+
+    def __str__( self ):
+        return "response file '@" + self.path + "' " + self.reason
+
+
+
+
+class CmdLineAmbiguousCommand( CmdLineException ):
+    def __init__(
+            self,
+            argumentId: int,
+            argument: str,
+            candidates: List[ str ]
+        ):
+        """
+        Creates an ambiguous abbreviated command exception
+        """
+        super().__init__( "command ambiguous", argumentId, argument )
+        self.candidates = candidates
+
+
+    def __str__( self ):
+        return "command '" + self.argument + "' @" + str( self.argumentId ) + " is ambiguous, candidates: --" + ", --".join( self.candidates )
@@ -0,0 +1,297 @@
+import collections.abc
+import hashlib
+import json
+import os
+import sys
+
+
+from typing import Callable, List
+from . import cmdarg
+from . import cmdvalue
+
+
+
+# version of the serialized grammar format, part of every cache key
+FORMAT_VERSION = 1
+
+
+# serialized kinds of values and arguments
+_valueKinds = {
+    cmdvalue.Value: "value",
+    cmdvalue.ListValue: "list"
+}
+_argumentKinds = {
+    cmdarg.FlagArgument: "flag",
+    cmdarg.StringArgument: "string",
+    cmdarg.IntegerArgument: "integer"
+}
+
+
+
+
+# table of a registry created from a frozen grammar, entries are created on first access
+class _LazyTable( collections.abc.MutableMapping ):
+    def __init__( self, keys, create: Callable ):
+        """
+        Creates a table of keys, the entry of a key is created by create( key ) when first accessed
+        """
+        self.known   = dict.fromkeys( keys )
+        self.entries = {}
+        self.create  = create
+
+
+    def __getitem__( self, key ):
+        entry = self.entries.get( key )
+        if entry == None:
+            if not key in self.known:
+                raise KeyError( key )
+            # threads creating the same entry all get the entry stored first
+            entry = self.entries.setdefault( key, self.create( key ) )
+        return entry
+
+
+    def __setitem__( self, key, entry ):
+        self.known[ key ] = None
+        self.entries[ key ] = entry
+
+
+    def __delitem__( self, key ):
+        del self.known[ key ]
+        self.entries.pop( key, None )
+
+
+    def __contains__( self, key ) -> bool:
+        return key in self.known
+
+
+    def __iter__( self ):
+        return iter( self.known )
+
+
+    def __len__( self ) -> int:
+        return len( self.known )
+
+
+
+
+# compiled, immutable form of a parser registry
+class FrozenGrammar:
+    def __init__( self, values: dict, commands: dict ):
+        """
+        Creates a compiled grammar from value and command tables
+
+        values maps an identifier to ( kind, description, category, default, expected, unique, options ),
+        commands maps a command to ( kind, value identifier, argument data ).
+        """
+        self.values = {}
+        for vKey in values:
+            kind, description, category, default, expected, unique, options = values[ vKey ]
+            if options != None:
+                options = tuple( ( sys.intern( o[0] ), o[1] ) for o in options )
+            self.values[ sys.intern( vKey ) ] = ( sys.intern( kind ), description, sys.intern( category ), default, bool( expected ), bool( unique ), options )
+
+        self.commands = {}
+        for cmd in commands:
+            kind, vKey, data = commands[ cmd ]
+            self.commands[ sys.intern( cmd ) ] = ( sys.intern( kind ), sys.intern( vKey ), data )
+
+        # accepted option sets by value identifier
+        self.optionSets = {}
+        for vKey in self.values:
+            options = self.values[ vKey ][6]
+            if options != None:
+                self.optionSets[ vKey ] = frozenset( o[0] for o in options )
+
+        # commands by value identifier and identifiers of expected values
+        self.commandsByValue = {}
+        for cmd in self.commands:
+            self.commandsByValue.setdefault( self.commands[ cmd ][1], [] ).append( cmd )
+        self.expectedValues = [ vKey for vKey in self.values if self.values[ vKey ][4] ]
+
+
+    @staticmethod
+    def compile( registry ) -> 'FrozenGrammar':
+        """
+        Compile the values and arguments of a parser registry
+        """
+        values = {}
+        for vKey in registry.values:
+            value = registry.values[ vKey ]
+            kind = _valueKinds.get( type( value ) )
+            if kind == None:
+                raise TypeError( "can not freeze command line value of type " + type( value ).__name__ )
+            options = None
+            if value.getOptions() != None:
+                options = [ ( o.option, o.description ) for o in value.getOptions() ]
+            values[ vKey ] = ( kind, value.description, value.getCategory(), value.getDefault(), value.expected, value.unqiue, options )
+
+        commands = {}
+        for cmd in registry.commands:
+            arg = registry.commands[ cmd ]
+            kind = _argumentKinds.get( type( arg ) )
+            if kind == None:
+                raise TypeError( "can not freeze command line argument of type " + type( arg ).__name__ )
+            if kind == "flag":
+                data = arg.data
+            elif kind == "integer":
+                data = [ arg.argName, arg.minimum ]
+            else:
+                data = arg.argName
+            commands[ arg.getCommand() ] = ( kind, arg.getValueBinding(), data )
+        return FrozenGrammar( values, commands )
+
+
+    def createRegistry( self ):
+        """
+        Create a parser registry running off the compiled grammar, values and arguments are
+        created when first used and the command trie when first searched
+        """
+        from .parser import ParserRegistry
+        registry = ParserRegistry()
+        registry.values = _LazyTable( self.values, self.createValue )
+        registry.commands = _LazyTable( self.commands, self.createArgument )
+        registry.commandTrie = None
+        registry.argumentsByValue = _LazyTable( self.commandsByValue, lambda vKey: [ registry.commands[ cmd ] for cmd in self.commandsByValue[ vKey ] ] )
+        registry.expectedValues = _LazyTable( self.expectedValues, lambda vKey: registry.values[ vKey ] )
+        registry.frozen = self
+        return registry
+
+
+    def createValue( self, vKey: str ) -> cmdvalue.Value:
+        """
+        Create the value of an identifier
+        """
+        kind, description, category, default, expected, unique, options = self.values[ vKey ]
+        if kind == "list":
+            return cmdvalue.ListValue(
+                identifier   = vKey,
+                description  = description,
+                category     = category,
+                initialValue = list( default ),
+                expected     = expected
+            )
+        return cmdvalue.Value(
+            identifier   = vKey,
+            description  = description,
+            category     = category,
+            defaultValue = default,
+            expected     = expected,
+            unique       = unique,
+            options      = [ cmdvalue.Option( o[0], o[1] ) for o in options ] if options != None else None
+        )
+
+
+    def createArgument( self, cmd: str ) -> cmdarg.Argument:
+        """
+        Create the argument of a command
+        """
+        kind, vKey, data = self.commands[ cmd ]
+        if kind == "flag":
+            return cmdarg.FlagArgument( vKey, cmd, data )
+        if kind == "integer":
+            return cmdarg.IntegerArgument( vKey, cmd, data[0], data[1] )
+        return cmdarg.StringArgument( vKey, cmd, data )
+
+
+    def addToRegistry( self, registry ):
+        """
+        Add the values and arguments of the compiled grammar to a parser registry
+        """
+        for vKey in self.values:
+            registry.addValue( self.createValue( vKey ) )
+        for cmd in self.commands:
+            registry.addArgument( self.createArgument( cmd ) )
+
+
+    def toData( self ) -> dict:
+        """
+        Returns the grammar as JSON compatible data
+        """
+        return { "version": FORMAT_VERSION, "values": self.values, "commands": self.commands }
+
+
+    @staticmethod
+    def fromData( content: dict ) -> 'FrozenGrammar':
+        """
+        Restore a grammar from JSON compatible data
+        """
+        if content.get( "version" ) != FORMAT_VERSION:
+            raise ValueError( "unsupported grammar format version " + str( content.get( "version" ) ) )
+        return FrozenGrammar( content[ "values" ], content[ "commands" ] )
+
+
+    def serialize( self ) -> str:
+        """
+        Serialize the grammar into a compact string
+        """
+        return json.dumps( self.toData(), separators = ( ",", ":" ) )
+
+
+    @staticmethod
+    def deserialize( data: str ) -> 'FrozenGrammar':
+        """
+        Restore a grammar from its serialized string
+        """
+        return FrozenGrammar.fromData( json.loads( data ) )
+
+
+    def hash( self ) -> str:
+        """
+        Returns a content hash of the compiled grammar
+        """
+        return hashlib.sha256( self.serialize().encode( "utf-8" ) ).hexdigest()
+
+
+
+
+def grammarKey( modules: List, *extra: str ) -> str:
+    """
+    Returns a cache key from the source files of the modules registering a grammar and extra key strings,
+    source files are identified by path, size and modification time to not read them on every start
+    """
+    h = hashlib.sha256( str( FORMAT_VERSION ).encode( "utf-8" ) )
+    for module in modules:
+        h.update( module.__name__.encode( "utf-8" ) )
+        path = getattr( module, "__file__", None )
+        if path != None:
+            st = os.stat( path )
+            h.update( repr( ( os.path.abspath( path ), st.st_size, st.st_mtime_ns ) ).encode( "utf-8" ) )
+    for e in extra:
+        h.update( str( e ).encode( "utf-8" ) )
+    return h.hexdigest()
+
+
+def _grammarPath( cacheDir: str, key: str ) -> str:
+    """
+    Returns the cache file path of a grammar
+    """
+    return os.path.join( cacheDir, "grammar-" + key + ".json" )
+
+
+def contains( cacheDir: str, key: str ) -> bool:
+    """
+    Returns true when a grammar is cached
+    """
+    return os.path.isfile( _grammarPath( cacheDir, key ) )
+
+
+def load( cacheDir: str, key: str ) -> FrozenGrammar:
+    """
+    Load a cached grammar, returns None when not cached or unreadable
+    """
+    try:
+        with open( _grammarPath( cacheDir, key ), "r", encoding = "utf-8" ) as f:
+            return FrozenGrammar.deserialize( f.read() )
+    except ( OSError, ValueError, KeyError, TypeError ):
+        return None
+
+
+def store( cacheDir: str, key: str, grammar: FrozenGrammar ) -> None:
+    """
+    Store a grammar into the cache directory
+    """
+    path = _grammarPath( cacheDir, key )
+    tmpPath = path + "." + str( os.getpid() ) + ".tmp"
+    with open( tmpPath, "w", encoding = "utf-8" ) as f:
+        f.write( grammar.serialize() )
+    os.replace( tmpPath, path )
@@ -0,0 +1,53 @@
+import re
+
+
+from typing import Callable
+
+
+
+# reference to another value: ${name}
+_referencePattern = re.compile( r"\$\{([^}]+)\}" )
+
+
+
+
+def hasReferences( data ) -> bool:
+    """
+    Returns true when a value contains references to other values
+    """
+    if isinstance( data, str ):
+        return "${" in data
+    if isinstance( data, ( list, tuple ) ):
+        for entry in data:
+            if isinstance( entry, str ) and ( "${" in entry ):
+                return True
+    return False
+
+
+def _toString( data ) -> str:
+    """
+    Convert a referenced value to its text
+    """
+    if data == None:
+        return ""
+    if isinstance( data, ( list, tuple ) ):
+        return " ".join( str( e ) for e in data )
+    return str( data )
+
+
+def substitute( data, lookup: Callable ):
+    """
+    Replace references in a string or the strings of a list,
+    lookup returns the referenced value or raises KeyError to keep an unknown reference
+    """
+    def replace( match ):
+        try:
+            return _toString( lookup( match.group( 1 ) ) )
+        except KeyError:
+            return match.group( 0 )
+
+    if isinstance( data, str ):
+        return _referencePattern.sub( replace, data )
+    if isinstance( data, ( list, tuple ) ):
+        return [ _referencePattern.sub( replace, e ) if isinstance( e, str ) else e for e in data ]
+    return data
@@ -0,0 +1,105 @@
+import json
+import os
+import re
+
+
+from typing import Dict
+from . import cmdvalue
+
+
+
+# settings layers between defaults and command line, lowest precedence first
+LAYER_ORDER = ( "config", "environment" )
+
+
+# prefix of environment variables to set values
+ENVIRONMENT_PREFIX = "PDBUILD_"
+
+
+# values interpreted as boolean true or false
+_trueStrings = ( "1", "true", "yes", "on" )
+_falseStrings = ( "0", "false", "no", "off", "" )
+
+
+
+
+# source of values layered between defaults and command line
+class Layer:
+    def __init__( self, name: str, entries: dict = None, source: str = None ):
+        """
+        Creates a new settings layer from entries by value identifier
+        """
+        self.name    = name
+        self.entries = entries if entries != None else {}
+        self.source  = source if source != None else name
+
+
+    def validate( self, values: Dict[ str, cmdvalue.Value ] ):
+        """
+        Validate entries against options of known values, entries of unknown values are kept
+        """
+        for vKey in self.entries:
+            value = values.get( vKey )
+            if ( value == None ) or ( value.getOptions() == None ):
+                continue
+            entry = self.entries[ vKey ]
+            if not str( entry ) in ( o.option for o in value.getOptions() ):
+                raise ValueError( self.source + ": option '" + str( entry ) + "' is not valid for " + vKey )
+
+
+
+
+def environmentName( identifier: str ) -> str:
+    """
+    Returns the name of the environment variable setting a value
+    """
+    return ENVIRONMENT_PREFIX + re.sub( "[^A-Za-z0-9]", "_", identifier ).upper()
+
+
+def _convertString( value: cmdvalue.Value, data: str ):
+    """
+    Convert a string to the type of the value default
+    """
+    default = value.getDefault()
+    if isinstance( default, bool ):
+        if data.lower() in _trueStrings:
+            return True
+        if data.lower() in _falseStrings:
+            return False
+        raise ValueError( environmentName( value.getIdentifier() ) + ": '" + data + "' is not a boolean" )
+    if isinstance( default, int ):
+        return int( data )
+    return data
+
+
+def fromEnvironment( values: Dict[ str, cmdvalue.Value ], environ = None ) -> Layer:
+    """
+    Creates a layer from PDBUILD_* environment variables
+    """
+    environ = environ if environ != None else os.environ
+    entries = {}
+    for vKey in values:
+        data = environ.get( environmentName( vKey ) )
+        if data == None:
+            continue
+        value = values[ vKey ]
+        if isinstance( value, cmdvalue.ListValue ):
+            entries[ vKey ] = data
+        else:
+            entries[ vKey ] = _convertString( value, data )
+    return Layer( "environment", entries )
+
+
+def fromConfigFile( path: str ) -> Layer:
+    """
+    Creates a layer from a JSON config file mapping value identifiers to values,
+    an empty layer is returned when the file does not exist
+    """
+    try:
+        with open( path, "r", encoding = "utf-8" ) as f:
+            entries = json.load( f )
+    except FileNotFoundError:
+        return Layer( "config", {}, path )
+    if not isinstance( entries, dict ):
+        raise ValueError( path + ": config file needs to contain an object of settings" )
+    return Layer( "config", entries, path )
@@ -1,12 +1,21 @@
 from multiprocessing.dummy import Value
+import hashlib
+import itertools
+import os
+import shlex
 import sys
 
 
 from typing import List
 from . import cmdarg
 from . import cmdvalue
+from . import commandtrie
 from . import exceptions
+from . import frozen
+from . import interpolate
+from . import layers
 from ..log import format
+from ..log import sink
 
 
 
@@ -17,8 +26,31 @@ class ParserRegistry:
         register parser values and arguments
         """
         self.values = {}
-        self.arguments = []
+
+        # values modified by a parser context, copied from the grammar on first write
         self.data = None
+        self.parent = None
+
+        # settings layers between defaults and command line, merged view of all layers
+        self.layers = {}
+        self._version = 0
+        self._parentStamp = None
+        self._merged = {}
+        self._resolved = {}
+        self._dependents = {}
+
+        # lookup indices, maintained while registering, a registry created from a frozen grammar
+        # creates their entries when first used
+        self.commands = {}
+        self.commandTrie = commandtrie.CommandTrie()
+        self.argumentsByValue = {}
+        self.expectedValues = {}
+
+        # commands not found by parser
+        self.unknownCommands = []
+
+        # compiled grammar, reset whenever the grammar changes
+        self.frozen = None
 
 
     def addValue( self, value: cmdvalue.Value ):
@@ -27,20 +59,63 @@ class ParserRegistry:
         """
         vKey = value.getIdentifier()
         if vKey in self.values:
-            # already registered
-            pass
+            # already registered, only the same value may be registered again
+            if self.values[ vKey ] is not value:
+                raise KeyError( "command line key " + vKey + " is already registered" )
         else:
             # need to register value
             self.values[ vKey ] = value
+            self.frozen = None
+            self._invalidate()
+            if value.expected:
+                self.expectedValues[ vKey ] = value
 
 
     def addArgument( self, arg: cmdarg.Argument ):
         """
         Add a command to the commandline parser
         """
-        # TODO: check not registering twice
-        # TODO: check if referred value is known
-        self.arguments.append( arg )
+        # check not registering twice
+        cmd = arg.getCommand()
+        if cmd in self.commands:
+            raise KeyError( "command line argument --" + cmd + " is already registered" )
+
+        # check if referred value is known
+        vKey = arg.getValueBinding()
+        if not vKey in self.values:
+            raise KeyError( "command line key " + vKey + " bound to --" + cmd + " is unknown" )
+
+        # register argument, a trie not built yet includes it when built
+        self.frozen = None
+        self.commands[ cmd ] = arg
+        if self.commandTrie != None:
+            self.commandTrie.insert( cmd, arg, ( self.values[ vKey ].getCategory(), ) )
+        if vKey in self.argumentsByValue:
+            self.argumentsByValue[ vKey ].append( arg )
+        else:
+            self.argumentsByValue[ vKey ] = [ arg ]
+
+
+    def getCommandTrie( self ) -> commandtrie.CommandTrie:
+        """
+        Returns the prefix tree of all commands, built on first use by a registry created from a frozen grammar
+        """
+        if self.commandTrie == None:
+            trie = commandtrie.CommandTrie()
+            for cmd in self.commands:
+                arg = self.commands[ cmd ]
+                trie.insert( cmd, arg, ( self.values[ arg.getValueBinding() ].getCategory(), ) )
+            self.commandTrie = trie
+        return self.commandTrie
+
+
+    def freeze( self ) -> frozen.FrozenGrammar:
+        """
+        Returns the grammar compiled into its immutable form
+        """
+        if self.frozen == None:
+            self.frozen = frozen.FrozenGrammar.compile( self )
+        return self.frozen
 
 
     def valueKeys( self ) -> List[ str ]:
@@ -57,16 +132,139 @@ class ParserRegistry:
         """
         Returns a value by identifier
         """
+        if ( self.data != None ) and ( valueIdent in self.data ):
+            return self.data[ valueIdent ]
+        if self.parent != None:
+            return self.parent.get( valueIdent )
         if valueIdent in self.values:
             return self.values[ valueIdent ]
         return None
 
 
+    def _invalidate( self, valueIdent: str = None ):
+        """
+        Invalidate resolved values, all values or a single value and the values referring to it
+        """
+        self._version += 1
+        if valueIdent == None:
+            self._merged = {}
+            self._resolved = {}
+            self._dependents = {}
+            return
+        pending = [ valueIdent ]
+        while len( pending ) > 0:
+            vKey = pending.pop()
+            self._merged.pop( vKey, None )
+            self._resolved.pop( vKey, None )
+            pending.extend( self._dependents.pop( vKey, () ) )
+
+
+    def _stamp( self ):
+        """
+        Returns the versions of this registry and its parents
+        """
+        if self.parent != None:
+            return self.parent._stamp() + ( self._version, )
+        return ( self._version, )
+
+
+    def _checkParent( self ):
+        """
+        Invalidate all resolved values when a parent context changed
+        """
+        if self.parent != None:
+            stamp = self.parent._stamp()
+            if self._parentStamp != stamp:
+                self._invalidate()
+                self._parentStamp = stamp
+
+
+    def _merge( self, valueIdent: str ):
+        """
+        Returns the value merged from defaults, settings layers and command line
+        """
+        if valueIdent in self._merged:
+            return self._merged[ valueIdent ]
+        value = self.values[ valueIdent ]
+        result = value.getDefault()
+        for name in layers.LAYER_ORDER:
+            layer = self.layers.get( name )
+            if ( layer != None ) and ( valueIdent in layer.entries ):
+                result = value.applyLayer( result, layer.entries[ valueIdent ] )
+        result = self.get( valueIdent ).applyParsed( result )
+        self._merged[ valueIdent ] = result
+        return result
+
+
+    def _findReference( self, name: str ) -> str:
+        """
+        Returns the value identifier of a ${name} reference, by identifier or by command
+        """
+        if name in self.values:
+            return name
+        cmd = self.commands.get( name )
+        if cmd != None:
+            return cmd.getValueBinding()
+        raise KeyError( name )
+
+
+    def _resolve( self, valueIdent: str, stack: List[ str ] ):
+        """
+        Resolve a value and the values it refers to, memoizing the results
+        """
+        if valueIdent in self._resolved:
+            return self._resolved[ valueIdent ]
+        if valueIdent in stack:
+            raise exceptions.CmdLineInterpolationCycle( stack[ stack.index( valueIdent ): ] + [ valueIdent ] )
+
+        result = self._merge( valueIdent )
+        if interpolate.hasReferences( result ):
+            stack.append( valueIdent )
+
+            def lookup( name: str ):
+                ref = self._findReference( name )
+                refData = self._resolve( ref, stack )
+                self._dependents.setdefault( ref, set() ).add( valueIdent )
+                return refData
+
+            result = interpolate.substitute( result, lookup )
+            stack.pop()
+        self._resolved[ valueIdent ] = result
+        return result
+
+
+    def setLayer( self, layer: layers.Layer ) -> None:
+        """
+        Set a settings layer by its name, entries are validated against the known values
+        """
+        if not layer.name in layers.LAYER_ORDER:
+            raise KeyError( "settings layer " + layer.name + " is unknown" )
+        layer.validate( self.values )
+        self.layers[ layer.name ] = layer
+        self._invalidate()
+
+
+    def _getWritable( self, valueIdent: str ) -> cmdvalue.Value:
+        """
+        Returns a value by identifier to modify, a context copies the value on first write
+        """
+        self._invalidate( valueIdent )
+        if self.data == None:
+            return self.get( valueIdent )
+        r = self.data.get( valueIdent )
+        if r == None:
+            r = self.get( valueIdent )
+            if r != None:
+                r = r.create()
+                self.data[ valueIdent ] = r
+        return r
+
+
     def overwrite( self, valueIdent: str, value ) -> None:
         """
         Sets a value by identifier
         """
-        r = self.get( valueIdent )
+        r = self._getWritable( valueIdent )
         if r != None:
             r.overwrite( value )
         else:
@@ -75,17 +273,18 @@ class ParserRegistry:
 
     def resolve( self, valueIdent: str ):
         """
-        Resolves default or value by key
+        Resolves value by key from command line, settings layers or default,
+        ${name} references to other values by identifier or command are replaced
         """
-        r = self.get( valueIdent )
-        if r != None:
-            return r.get()
-        return None
+        self._checkParent()
+        if not valueIdent in self.values:
+            return None
+        return self._resolve( valueIdent, [] )
 
 
     def isSet( self, valueIdent: str ):
         """
-        Check if key is set
+        Check if key is set by command line
         """
         r = self.get( valueIdent )
         if r != None:
@@ -96,14 +295,21 @@ class ParserRegistry:
     def createContext( self ):
         """
         Create parser context
+
+        The context shares the grammar and stores modified values only. A context
+        created from another context inherits its values, copying them on write,
+        and the settings layers set at creation.
         """
         copy = ParserRegistry()
         copy.values = self.values
-        copy.arguments = self.arguments
+        copy.commands = self.commands
+        copy.commandTrie = self.commandTrie
+        copy.argumentsByValue = self.argumentsByValue
+        copy.expectedValues = self.expectedValues
+        copy.frozen = self.frozen
         copy.data = {}
-        for vKey in self.values:
-            value = self.values[ vKey ]
-            copy.data[ value.getIdentifier() ] = value.create()
+        copy.parent = self if self.data != None else None
+        copy.layers = dict( self.layers )
         return copy
 
 
@@ -129,24 +335,45 @@ class ParserRegistry:
         return value.getDescription()
 
 
-    def printHelp( self, maxWidth: int = 80 ):
+    def _helpFormatter( self, maxWidth: int, output: sink.Sink ) -> format.Formatter:
         """
-        Print help for commandline
+        Create console formatter for help
         """
-        # console formatter
         fmtDefault = format.TextWarpSettings()
         fmtKey = format.TextWarpSettings().indent( "  " )
         fmtValue = format.TextWarpSettings().indent( "  " )
-        formatter = format.Formatter(
+        return format.Formatter(
             maxWidth,
             fmtDefault,
             fmtKey,
             fmtValue,
             leftWeight = 0.4,
-            rightWeight = 0.6
+            rightWeight = 0.6,
+            sink = output
         )
 
-        # collect categories to print, collect parse command by value
+
+    def _helpKey( self, formatter: format.Formatter ) -> str:
+        """
+        Returns the cache key of rendered help for a formatter
+        """
+        h = hashlib.sha256( self.freeze().hash().encode( "utf-8" ) )
+        h.update( repr( (
+            formatter.maxWidth,
+            formatter.defaultWarpSettings.fingerprint(),
+            formatter.tableWarpSettingsLeft.fingerprint(),
+            formatter.tableWarpSettingsRight.fingerprint(),
+            formatter.leftWeight,
+            formatter.rightWeight
+        ) ).encode( "utf-8" ) )
+        return h.hexdigest()
+
+
+    def _renderHelp( self, formatter: format.Formatter, lines: sink.MemorySink ):
+        """
+        Render help for commandline, yields the lines written to the formatter output after each value
+        """
+        # collect categories to print
         categoryOrder = []
         categories = {}
         for vk in self.values:
@@ -157,15 +384,6 @@ class ParserRegistry:
                 categoryOrder.append( v.getCategory() )
                 categories[ v.getCategory() ] = [ v ]
 
-        # collect arguments by value binding
-        cmdsByValue = {}
-        for arg in self.arguments:
-            valBinding = arg.getValueBinding()
-            if valBinding in cmdsByValue:
-                cmdsByValue[ valBinding ].append( arg )
-            else:
-                cmdsByValue[ valBinding ] = [ arg ]
-
         # iterate categories and print
         firstCategory = True
         for cIndex in categoryOrder:
@@ -176,7 +394,7 @@ class ParserRegistry:
             category = categories[ cIndex ]
             for value in category:
                 # find arguments to set option
-                cmds = cmdsByValue[ value.getIdentifier() ] if value.getIdentifier() in cmdsByValue else []
+                cmds = self.argumentsByValue.get( value.getIdentifier(), [] )
 
                 if len( cmds ) > 0:
                     # need to write category?
@@ -195,6 +413,51 @@ class ParserRegistry:
                     descText = self._formatDescription( value )
                     formatter.write( ( cmdText, descText ) )
 
+                    # emit lines of value
+                    yield from lines.takeLines()
+
+
+    def renderHelp( self, maxWidth: int = 80, cacheDir: str = None ):
+        """
+        Returns a generator of help lines for commandline,
+        rendered help is cached in cacheDir by grammar, width and text warp settings
+        """
+        lines = sink.MemorySink()
+        formatter = self._helpFormatter( maxWidth, lines )
+        if cacheDir == None:
+            yield from self._renderHelp( formatter, lines )
+            return
+
+        # stream cached help
+        path = os.path.join( cacheDir, "help-" + self._helpKey( formatter ) + ".txt" )
+        try:
+            with open( path, "r", encoding = "utf-8" ) as f:
+                for line in f:
+                    yield line[:-1]
+            return
+        except FileNotFoundError:
+            pass
+
+        # render and store help, an aborted rendering is not stored
+        tmpPath = path + "." + str( os.getpid() ) + ".tmp"
+        try:
+            with open( tmpPath, "w", encoding = "utf-8" ) as f:
+                for line in self._renderHelp( formatter, lines ):
+                    f.write( line + "\n" )
+                    yield line
+            os.replace( tmpPath, path )
+        finally:
+            if os.path.exists( tmpPath ):
+                os.remove( tmpPath )
+
+
+    def printHelp( self, maxWidth: int = 80, cacheDir: str = None ):
+        """
+        Print help for commandline
+        """
+        for line in self.renderHelp( maxWidth, cacheDir ):
+            print( line )
+
 
 
 
@@ -212,6 +475,9 @@ class Parser:
         self.context = grammar.createContext()
         self.args = args
 
+        # parse state reused for all commands
+        self._parsedValues = cmdarg._ParsedValues( None, None, None, None )
+
 
     @staticmethod
     def parse(
@@ -220,92 +486,129 @@ class Parser:
             ignoreUnknown: bool = False
         ) -> ParserRegistry:
         """
-        Parse command line
+        Parse command line, arguments starting with '@' are expanded from response files
         """
         p = Parser( grammar, args if args != None else sys.argv[1:] )
         return p._parse( ignoreUnknown )
 
 
-    def _parseCommand( self, cmd: str, index: int, args: List[ str ] ):
+    def _parseCommand( self, cmd: str, index: int, args: List[ str ], abbreviate: bool ):
         """
-        Parse single command
+        Parse single command, an unambiguous non-empty prefix of a command is accepted when abbreviate is set
         """
         # find command to parse
-        cmdInstance = None
-        for arg in self.grammar.arguments:
-            if arg.getCommand() == cmd:
-                cmdInstance = arg
-                break
+        cmdInstance = self.grammar.commands.get( cmd )
+        if ( cmdInstance == None ) and abbreviate and ( cmd != "" ):
+            _, cmdInstance, count = self.grammar.getCommandTrie().complete( cmd )
+            if count > 1:
+                raise exceptions.CmdLineAmbiguousCommand( index, "--" + cmd, self.grammar.getCommandTrie().startingWith( cmd, 10 ) )
 
         # abort if command is not found
         if cmdInstance == None:
             return False
 
-        # find associated value
-        valueInstance = None
-        if cmdInstance.getValueBinding() in self.grammar.values:
-            valueInstance = self.grammar.values[ cmdInstance.getValueBinding() ]
+        # find associated value of parse context
+        valueInstance = self.context._getWritable( cmdInstance.getValueBinding() )
 
         # assert value instance is present
         assert valueInstance != None, "can not find value attached to --" + cmdInstance.getCommand()
 
         # parse command
-        cmdInstance.parse( cmdarg._ParsedValues( valueInstance, index, self.args, args ) )
+        self._parsedValues.set( valueInstance, index, "--" + cmd, args )
+        cmdInstance.parse( self._parsedValues )
         return True
 
 
+    @staticmethod
+    def _readResponseFile( path: str ):
+        """
+        Read tokens of a response file line by line, tokens may be quoted within a line
+        """
+        with open( path, "r", encoding = "utf-8" ) as f:
+            for line in f:
+                if ( '"' in line ) or ( "'" in line ) or ( "\\" in line ):
+                    yield from shlex.split( line )
+                else:
+                    yield from line.split()
+
+
+    def _tokens( self, args, includes: List[ str ] ):
+        """
+        Returns a generator of command line tokens, lazily expanding @path response files,
+        paths within response files are relative to the including file
+        """
+        baseDir = os.path.dirname( includes[-1] ) if len( includes ) > 0 else None
+        for arg in args:
+            if ( len( arg ) < 2 ) or ( arg[0] != "@" ):
+                yield arg
+                continue
+
+            # expand response file
+            path = arg[1:]
+            if baseDir != None:
+                path = os.path.join( baseDir, path )
+            path = os.path.abspath( path )
+            if path in includes:
+                raise exceptions.CmdLineResponseFile( arg[1:], "includes itself" )
+            try:
+                yield from self._tokens( Parser._readResponseFile( path ), includes + [ path ] )
+            except OSError as e:
+                raise exceptions.CmdLineResponseFile( arg[1:], "can not be read: " + str( e.strerror ) )
+
+
     def _generateValueMissingException( self, value: Value ):
         """
         Generate value missing exception
         """
-        commands = []
-        for cmd in self.grammar.arguments:
-            if( cmd.getValueBinding() == value.getIdentifier() ):
-                commands.append( cmd )
-        raise exceptions.CmdLineMissingCommand( None, self.args, commands )
+        commands = self.grammar.argumentsByValue.get( value.getIdentifier(), [] )
+        raise exceptions.CmdLineMissingCommand( None, None, commands )
 
 
     def _parse( self, ignoreUnknown: bool ) -> ParserRegistry:
         """
         Parse command line
         """
-        # process each argument
-        argIndex = 0
-        unknownFound = False 
-        unknownCommandIndex = None
-        while argIndex < len( self.args ):
-            arg = self.args[argIndex]
-            if arg.startswith( "--" ):
-                # found command, extract argument list and parse
+        # abbreviated commands are only accepted when all commands are known
+        abbreviate = not ignoreUnknown
+
+        # process each argument in a single pass, grouping arguments by command
+        unknownCommand = None
+        unknownIndex = None
+        cmd = None
+        cmdIndex = None
+        argList = []
+        argIndex = -1
+        for arg in itertools.chain( self._tokens( self.args, [] ), [ None ] ):
+            argIndex += 1
+            if ( arg != None ) and ( not arg.startswith( "--" ) ):
+                # found argument, not allowed before a command was found
+                if cmd == None:
+                    raise exceptions.CmdLineNoArgumentExpected( argIndex, arg )
+                argList.append( arg )
+                continue
+
+            # found next command or end of line, parse pending command
+            if cmd != None:
+                if( self._parseCommand( cmd, cmdIndex, argList, abbreviate ) == False ):
+                    self.context.unknownCommands.append( cmd )
+                    if unknownCommand == None:
+                        unknownCommand = cmd
+                        unknownIndex = cmdIndex
+            if arg != None:
                 cmd = arg[2:]
+                cmdIndex = argIndex
                 argList = []
-                argCounter = 1
-                while( ( argIndex + argCounter ) < len ( self.args ) ):
-                    a = self.args[ argIndex + argCounter ]
-                    if a.startswith( "--" ):
-                        break
-                    argList.append( a )
-                    argCounter += 1
-                if( self._parseCommand( cmd, argIndex, argList ) == False ):
-                    unknownFound = True
-                    if unknownCommandIndex == None:
-                        unknownCommandIndex = argIndex
-                argIndex += argCounter
-            else:
-                # found argument, not allowed before a command was found
-                raise exceptions.CmdLineNoArgumentExpected( argIndex, self.args )
 
         # check if command line parameter is missing?
-        for vKey in self.context.values:
-            v = self.context.values[ vKey ]
-            if v.expected:
-                if not v.isSet():
-                    raise self._generateValueMissingException( v )
+        for vKey in self.context.expectedValues:
+            if not self.context.isSet( vKey ):
+                raise self._generateValueMissingException( self.context.expectedValues[ vKey ] )
 
         # check for unknown command line options?
-        if unknownFound:
+        if unknownCommand != None:
             if ignoreUnknown != True:
-                raise exceptions.CmdLineUnknownCommand( unknownCommandIndex, self.args )
+                suggestions = self.grammar.getCommandTrie().suggest( unknownCommand, 2, 3 )
+                raise exceptions.CmdLineUnknownCommand( unknownIndex, "--" + unknownCommand, suggestions )
 
         # return parsed context
         return self.context
@@ -11,6 +11,64 @@ from ..cmdline import parser
 
 
 
+# category of general build settings
+GENERAL_CATEGORY = "General build settings:"
+
+
+
+
+# settings locating the cache directory, resolved on their own before the cached grammar is loaded
+class CacheLocationArgs:
+    def __init__( self, defaultWorkspacePath: str, category: str = GENERAL_CATEGORY ):
+        """
+        Workspace and cache directory commandline arguments used by pd build.
+        """
+
+        # workspace directory
+        self.workspace = cmdvalue.Value(
+            identifier   = "general.workspace-dir",
+            description  = "Set workspace path. By default the workspace is set to the parent directory of the module where the build script is invoked with /.workspace appended.",
+            category     = category,
+            defaultValue = defaultWorkspacePath + '/.workspace',
+            expected     = False,
+            unique       = True
+        )
+
+        self.workspace_Argument = cmdarg.StringArgument(
+            self.workspace,
+            "workspace-dir",
+            "<dir>"
+        )
+
+        # cache directory
+        self.cachePath = cmdvalue.Value(
+            identifier   = "general.cache-dir",
+            description  = "Set path of cache. By default the build log is set to '${workspace-dir}/.cache'.",
+            category     = category,
+            defaultValue = '${workspace-dir}/.cache',
+            expected     = False,
+            unique       = True
+        )
+
+        self.cachePath_Argument = cmdarg.StringArgument(
+            self.cachePath,
+            "cache-dir",
+            "<dir>"
+        )
+
+
+    def addToParser( self, ctx: parser.ParserRegistry ):
+        """
+        Add parameters to commandline parser registry
+        """
+        ctx.addValue( self.workspace )
+        ctx.addArgument( self.workspace_Argument )
+
+        ctx.addValue( self.cachePath )
+        ctx.addArgument( self.cachePath_Argument )
+
+
+
 
 class GlobalArgs:
     def __init__( self, defaultWorkspacePath: str ):
@@ -19,7 +77,7 @@ class GlobalArgs:
         """
 
         # general category
-        self.generalCategory = "General build settings:"
+        self.generalCategory = GENERAL_CATEGORY
 
         # show general help?
         self.generalHelp = cmdvalue.Value(
@@ -36,6 +94,21 @@ class GlobalArgs:
             "help"
         )
 
+        # show help of the project to build?
+        self.buildHelp = cmdvalue.Value(
+            identifier   = "general.buildhelp",
+            description  = "Show help for command line arguments of the project to build.",
+            category     = self.generalCategory,
+            defaultValue = False,
+            unique       = False,
+            expected     = False
+        )
+
+        self.buildHelp_Argument = cmdarg.FlagArgument(
+            self.buildHelp,
+            "build-help"
+        )
+
         # directory of module where the build script is invoked
         self.initialModule = cmdvalue.Value(
             identifier   = "general.initialmodule-dir",
@@ -57,26 +130,16 @@ class GlobalArgs:
         )
 
         # workspace directory
-        self.workspace = cmdvalue.Value(
-            identifier   = "general.workspace-dir",
-            description  = "Set workspace path. By default the workspace is set to the parent directory of the module where the build script is invoked with /.workspace appended.",
-            category     = self.generalCategory,
-            defaultValue = defaultWorkspacePath + '/.workspace',
-            expected     = False,
-            unique       = True
-        )
-
-        self.workspace_Argument = cmdarg.StringArgument(
-            self.workspace,
-            "workspace-dir",
-            "<dir>"
-        )
+        cacheLocation = CacheLocationArgs( defaultWorkspacePath, self.generalCategory )
+        self.workspace = cacheLocation.workspace
+        self.workspace_Argument = cacheLocation.workspace_Argument
 
         # build log directory
         self.buildlogPath = cmdvalue.Value(
             identifier   = "general.buildlog-dir",
             description  = "Set build log path. By default the build log is set to '${workspace-dir}/.buildlog'.",
             category     = self.generalCategory,
+            defaultValue = '${workspace-dir}/.buildlog',
             expected     = False,
             unique       = True
         )
@@ -92,6 +155,7 @@ class GlobalArgs:
             identifier   = "general.fetched-dir",
             description  = "Set path to fetch dependencies. By default the build log is set to '${workspace-dir}/.fetched'.",
             category     = self.generalCategory,
+            defaultValue = '${workspace-dir}/.fetched',
             expected     = False,
             unique       = True
         )
@@ -103,18 +167,30 @@ class GlobalArgs:
         )
 
         # cache directory
-        self.cachePath = cmdvalue.Value(
-            identifier   = "general.cache-dir",
-            description  = "Set path of cache. By default the build log is set to '${workspace-dir}/.cache'.",
+        self.cachePath = cacheLocation.cachePath
+        self.cachePath_Argument = cacheLocation.cachePath_Argument
+
+        # log level
+        self.logLevel = cmdvalue.Value(
+            identifier   = "general.log-level",
+            description  = "Minimum level of messages written to the console and the build log.",
             category     = self.generalCategory,
+            defaultValue = "info",
             expected     = False,
-            unique       = True
+            unique       = True,
+            options      =
+            [
+                cmdvalue.Option( "debug",   "show all messages including build system internals." ),
+                cmdvalue.Option( "info",    "show progress messages, warnings and errors." ),
+                cmdvalue.Option( "warning", "show warnings and errors." ),
+                cmdvalue.Option( "error",   "show errors only." )
+            ]
         )
 
-        self.cachePath_Argument = cmdarg.StringArgument(
-            self.cachePath,
-            "cache-dir",
-            "<dir>"
+        self.logLevel_Argument = cmdarg.StringArgument(
+            self.logLevel,
+            "log-level",
+            "<level>",
         )
 
         # librarian mode
@@ -131,7 +207,8 @@ class GlobalArgs:
                 cmdvalue.Option( "fetch",  "fetch only missing dependencies." ),
                 cmdvalue.Option( "update", "update dependent repositories if no local changes are present." ),
                 cmdvalue.Option( "force",  "update dependent repositories, stash local changes if present." ),
-                cmdvalue.Option( "asis",   "ignore version constraints on local repositories, only fetch other dependencies." )
+                cmdvalue.Option( "asis",   "ignore version constraints on local repositories, only fetch other dependencies." ),
+                cmdvalue.Option( "relock", "update dependent repositories ignoring the lock file, then rewrite the lock file." )
             ]
         )
 
@@ -141,6 +218,39 @@ class GlobalArgs:
             "<mode>",
         )
 
+        # librarian parallel jobs
+        self.librarianjobs = cmdvalue.Value(
+            identifier   = "general.librarian.jobs",
+            description  = "Number of dependencies the librarian checks out in parallel.",
+            category     = self.generalCategory,
+            defaultValue = 4,
+            expected     = False,
+            unique       = True
+        )
+
+        self.librarianjobs_Argument = cmdarg.IntegerArgument(
+            self.librarianjobs,
+            "librarian-jobs",
+            "<count>",
+            minimum = 1
+        )
+
+        # librarian mirror store
+        self.librarianmirror = cmdvalue.Value(
+            identifier   = "general.librarian.mirror-dir",
+            description  = "Set path of a machine wide store of bare mirrors, dependencies are cloned borrowing the objects of the mirrors. By default no mirror store is used.",
+            category     = self.generalCategory,
+            defaultValue = "",
+            expected     = False,
+            unique       = True
+        )
+
+        self.librarianmirror_Argument = cmdarg.StringArgument(
+            self.librarianmirror,
+            "librarian-mirror-dir",
+            "<dir>"
+        )
+
         # librarian search paths
         self.librariansearch = cmdvalue.ListValue(
             identifier   = "general.librarian.origins",
@@ -169,6 +279,9 @@ class GlobalArgs:
         ctx.addValue( self.generalHelp )
         ctx.addArgument( self.generalHelp_Argument )
 
+        ctx.addValue( self.buildHelp )
+        ctx.addArgument( self.buildHelp_Argument )
+
         ctx.addValue( self.initialModule )
         ctx.addValue( self.localRepos )
 
@@ -184,8 +297,17 @@ class GlobalArgs:
         ctx.addValue( self.cachePath )
         ctx.addArgument( self.cachePath_Argument )
         
+        ctx.addValue( self.logLevel )
+        ctx.addArgument( self.logLevel_Argument )
+
         ctx.addValue( self.librarianmode )
         ctx.addArgument( self.librarianmode_Argument )
         
+        ctx.addValue( self.librarianjobs )
+        ctx.addArgument( self.librarianjobs_Argument )
+
+        ctx.addValue( self.librarianmirror )
+        ctx.addArgument( self.librarianmirror_Argument )
+
         ctx.addValue( self.librariansearch )
         ctx.addArgument( self.librariansearch_Argument )
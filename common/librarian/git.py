@@ -0,0 +1,288 @@
+import os
+import subprocess
+
+
+from typing import List
+
+
+
+# git executable, may be overwritten by the PDBUILD_GIT environment variable
+GIT = os.environ.get( "PDBUILD_GIT", "git" )
+
+
+# environment of git processes, never ask for credentials on the terminal
+_gitEnvironment = dict( os.environ, GIT_TERMINAL_PROMPT = "0" )
+
+
+
+
+class GitError( Exception ):
+    def __init__(
+            self,
+            args: List[ str ],
+            returnCode: int,
+            output: str
+        ):
+        """
+        Creates a failed git command exception
+        """
+        super().__init__( "git command failed" )
+        self.command = args
+        self.returnCode = returnCode
+        self.output = output
+
+
+    def __str__( self ):
+        lines = self.output.strip().split( "\n" )
+        return "'git " + " ".join( self.command ) + "' failed with exit code " + str( self.returnCode ) + ": " + lines[-1]
+
+
+
+
+def run( args: List[ str ], cwd: str = None ) -> str:
+    """
+    Run git with args and return its output, raises GitError when git fails
+    """
+    try:
+        process = subprocess.run(
+            [ GIT ] + args,
+            cwd = cwd,
+            env = _gitEnvironment,
+            stdin = subprocess.DEVNULL,
+            stdout = subprocess.PIPE,
+            stderr = subprocess.STDOUT,
+            universal_newlines = True
+        )
+    except OSError as e:
+        raise GitError( args, -1, str( e ) )
+    if process.returncode != 0:
+        raise GitError( args, process.returncode, process.stdout )
+    return process.stdout
+
+
+def isRepository( path: str ) -> bool:
+    """
+    Returns true when path is the top level directory of a git working tree
+    """
+    return os.path.exists( os.path.join( path, ".git" ) )
+
+
+def isBareRepository( path: str ) -> bool:
+    """
+    Returns true when path is a bare git repository
+    """
+    return os.path.isfile( os.path.join( path, "HEAD" ) ) and os.path.isdir( os.path.join( path, "objects" ) )
+
+
+def clone( url: str, path: str, ref: str = None ):
+    """
+    Clone url into path and check out ref, by default the remote HEAD
+    """
+    run( [ "clone", "--quiet", url, path ] )
+    if ref != None:
+        checkout( path, ref )
+
+
+def cloneMirror( url: str, path: str ):
+    """
+    Create a bare mirror of url in path
+    """
+    run( [ "clone", "--quiet", "--mirror", url, path ] )
+
+
+def updateMirror( path: str ):
+    """
+    Fetch all refs of a mirror, refs removed at the origin are kept so objects used by
+    repositories borrowing from the mirror stay available
+    """
+    run( [ "remote", "update" ], path )
+
+
+def cloneShared( source: str, path: str, url: str, ref: str = None ):
+    """
+    Clone a local repository into path borrowing its objects, the origin of the clone is set to url
+    """
+    run( [ "clone", "--quiet", "--shared", source, path ] )
+    run( [ "remote", "set-url", "origin", url ], path )
+    if ref != None:
+        checkout( path, ref )
+
+
+def setConfig( path: str, key: str, value: str ):
+    """
+    Set a repository configuration value
+    """
+    run( [ "config", key, value ], path )
+
+
+def fetch( path: str ):
+    """
+    Fetch all branches and tags of the origin
+    """
+    run( [ "fetch", "--quiet", "--tags", "origin" ], path )
+
+
+def checkout( path: str, ref: str ):
+    """
+    Check out a branch, tag or commit
+    """
+    run( [ "checkout", "--quiet", ref ], path )
+
+
+def isBranch( path: str, ref: str ) -> bool:
+    """
+    Returns true when ref names a local branch or a branch of the origin
+    """
+    for name in ( "refs/heads/" + ref, "refs/remotes/origin/" + ref ):
+        try:
+            run( [ "show-ref", "--verify", "--quiet", name ], path )
+            return True
+        except GitError:
+            pass
+    return False
+
+
+def defaultBranch( path: str ) -> str:
+    """
+    Returns the name of the branch HEAD of the origin points to, None when unknown
+    """
+    try:
+        name = run( [ "symbolic-ref", "--quiet", "--short", "refs/remotes/origin/HEAD" ], path ).strip()
+    except GitError:
+        return None
+    return name[ len( "origin/" ): ] if name.startswith( "origin/" ) else None
+
+
+def isDetached( path: str ) -> bool:
+    """
+    Returns true when HEAD points to a commit instead of a branch, read without running git
+    """
+    try:
+        with open( os.path.join( _gitDir( path ), "HEAD" ), "r", encoding = "utf-8" ) as f:
+            return not f.read().startswith( "ref:" )
+    except OSError:
+        return False
+
+
+def hasUpstream( path: str ) -> bool:
+    """
+    Returns true when the checked out branch tracks a remote branch
+    """
+    try:
+        run( [ "rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}" ], path )
+        return True
+    except GitError:
+        return False
+
+
+def fastForward( path: str ):
+    """
+    Fast forward the checked out branch to its upstream
+    """
+    run( [ "merge", "--quiet", "--ff-only", "@{u}" ], path )
+
+
+def isClean( path: str ) -> bool:
+    """
+    Returns true when the working tree has no local changes, untracked files are ignored
+    """
+    return run( [ "status", "--porcelain", "--untracked-files=no" ], path ).strip() == ""
+
+
+def changedFiles( path: str, files: List[ str ] = None ) -> List[ str ]:
+    """
+    Returns the tracked files with local changes, of all files or of the given files only
+    """
+    args = [ "--literal-pathspecs", "status", "--porcelain", "-z", "--untracked-files=no" ]
+    if files != None:
+        args += [ "--" ] + files
+    entries = run( args, path ).split( "\0" )
+    changed = []
+    i = 0
+    while i < len( entries ):
+        entry = entries[ i ]
+        i += 1
+        if len( entry ) < 4:
+            continue
+        changed.append( entry[3:] )
+        # renames and copies are followed by their source path
+        if entry[0] in "RC":
+            changed.append( entries[ i ] )
+            i += 1
+    return changed
+
+
+def trackedFiles( path: str ) -> List[ str ]:
+    """
+    Returns the paths of all files tracked by the index relative to the working tree
+    """
+    return [ f for f in run( [ "ls-files", "-z" ], path ).split( "\0" ) if f != "" ]
+
+
+def stash( path: str ):
+    """
+    Stash local changes
+    """
+    run( [ "stash", "push", "--quiet", "--message", "pdbuild librarian" ], path )
+
+
+def head( path: str ) -> str:
+    """
+    Returns the commit id checked out
+    """
+    return run( [ "rev-parse", "HEAD" ], path ).strip()
+
+
+def _gitDir( path: str ) -> str:
+    """
+    Returns the git directory of a working tree, following a .git file of linked worktrees
+    """
+    dotGit = os.path.join( path, ".git" )
+    if os.path.isfile( dotGit ):
+        with open( dotGit, "r", encoding = "utf-8" ) as f:
+            content = f.read().strip()
+        if content.startswith( "gitdir:" ):
+            return os.path.join( path, content[ len( "gitdir:" ): ].strip() )
+    return dotGit
+
+
+def gitPath( path: str, name: str ) -> str:
+    """
+    Returns the absolute path of a file within the git directory of a working tree, i.e. the
+    index of a linked worktree or submodule
+    """
+    return os.path.join( path, run( [ "rev-parse", "--git-path", name ], path ).strip() )
+
+
+def readHead( path: str ) -> str:
+    """
+    Returns the commit id checked out by reading HEAD and refs directly, without running git,
+    None when HEAD can not be resolved this way
+    """
+    try:
+        gitDir = _gitDir( path )
+        with open( os.path.join( gitDir, "HEAD" ), "r", encoding = "utf-8" ) as f:
+            content = f.read().strip()
+        if not content.startswith( "ref:" ):
+            return content
+        ref = content[ len( "ref:" ): ].strip()
+
+        # refs of linked worktrees are stored in the common git directory
+        commonDir = gitDir
+        commonFile = os.path.join( gitDir, "commondir" )
+        if os.path.isfile( commonFile ):
+            with open( commonFile, "r", encoding = "utf-8" ) as f:
+                commonDir = os.path.join( gitDir, f.read().strip() )
+
+        refPath = os.path.join( commonDir, ref )
+        if os.path.isfile( refPath ):
+            with open( refPath, "r", encoding = "utf-8" ) as f:
+                return f.read().strip()
+        with open( os.path.join( commonDir, "packed-refs" ), "r", encoding = "utf-8" ) as f:
+            for line in f:
+                parts = line.strip().split( " " )
+                if ( len( parts ) == 2 ) and ( parts[1] == ref ):
+                    return parts[0]
+    except OSError:
+        pass
+    return None
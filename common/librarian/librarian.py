@@ -0,0 +1,267 @@
+import concurrent.futures
+import os
+import shutil
+
+
+from typing import Dict, List
+from . import git
+from . import mirror
+from . import origincache
+from . import statindex
+from ..log import status as logstatus
+
+
+
+# librarian modes, see general.librarian.mode
+MODES = ( "none", "fetch", "update", "force", "asis", "relock" )
+
+
+# placeholder of the module name in origins
+MODULE_PLACEHOLDER = "${module}"
+
+
+# git messages of repositories not present at an origin
+_notFoundMessages = ( "does not exist", "not found", "could not read from remote repository" )
+
+
+
+
+# outcome of fetching a single module
+class FetchResult:
+    __slots__ = ( "module", "path", "action", "origin", "commit", "message" )
+
+    def __init__(
+            self,
+            module: str,
+            path: str,
+            action: str,
+            origin: str = None,
+            commit: str = None,
+            message: str = None
+        ):
+        """
+        Creates the result of a module, action is one of "cloned", "updated", "unchanged",
+        "modified" ( not updated because of local changes ), "missing" or "failed"
+        """
+        self.module  = module
+        self.path    = path
+        self.action  = action
+        self.origin  = origin
+        self.commit  = commit
+        self.message = message
+
+
+    def isAvailable( self ) -> bool:
+        """
+        Returns true when the module is checked out
+        """
+        return not self.action in ( "missing", "failed" )
+
+
+    def __repr__( self ):
+        return "FetchResult( " + self.module + ", " + self.action + " )"
+
+
+
+
+# checks out dependent modules
+class Librarian:
+    def __init__(
+            self,
+            fetchedDir: str,
+            localReposDir: str,
+            origins: List[ str ],
+            mode: str = "update",
+            jobs: int = 4,
+            status: logstatus.StatusBoard = None,
+            originCache: origincache.OriginCache = None,
+            mirrorStore: mirror.MirrorStore = None,
+            statIndex: statindex.StatIndex = None
+        ):
+        """
+        Creates a librarian checking out modules into fetchedDir, modules found as repository
+        in localReposDir are used from there. Missing modules are cloned from the first origin
+        providing them, ${module} in an origin is replaced by the module name. Up to jobs modules
+        are processed in parallel. The origin cache lets warm runs clone from the origin found
+        before without probing the other origins. With a mirror store clones borrow the objects
+        of machine wide mirrors. The stat index avoids running git to find local changes of
+        repositories unchanged since the last check.
+        """
+        assert mode in MODES, "unknown librarian mode '" + str( mode ) + "'"
+        self.fetchedDir    = fetchedDir
+        self.localReposDir = localReposDir
+        self.origins       = list( origins )
+        self.mode          = mode
+        self.jobs          = max( 1, jobs )
+        self.status        = status
+        self.originCache   = originCache
+        self.mirrorStore   = mirrorStore
+        self.statIndex     = statIndex
+
+
+    def modulePath( self, module: str ) -> str:
+        """
+        Returns the path of a module, a local repository takes precedence over the fetched directory
+        """
+        if self.localReposDir != None:
+            localPath = os.path.join( self.localReposDir, module )
+            if git.isRepository( localPath ):
+                return localPath
+        return os.path.join( self.fetchedDir, module )
+
+
+    def isLocal( self, path: str ) -> bool:
+        """
+        Returns true when path is a local repository
+        """
+        return ( self.localReposDir != None ) and ( os.path.dirname( path ) == os.path.normpath( self.localReposDir ) )
+
+
+    def originUrls( self, module: str ) -> List[ str ]:
+        """
+        Returns the URLs to search for a module in order
+        """
+        return [ o.replace( MODULE_PLACEHOLDER, module ) for o in self.origins ]
+
+
+    def fetch( self, modules: List[ str ], refs: Dict[ str, str ] = None ) -> List[ FetchResult ]:
+        """
+        Check out modules according to the librarian mode, refs optionally maps a module to the
+        branch, tag or commit to check out. Returns one result per module in the order of modules,
+        independent of the order jobs finish.
+        """
+        refs = refs if refs != None else {}
+        unique = list( dict.fromkeys( modules ) )
+        if self.status != None:
+            self.status.queue( len( unique ) )
+        if ( self.jobs == 1 ) or ( len( unique ) < 2 ):
+            results = [ self.fetchModule( m, refs.get( m ) ) for m in unique ]
+        else:
+            with concurrent.futures.ThreadPoolExecutor( max_workers = self.jobs, thread_name_prefix = "librarian" ) as pool:
+                results = list( pool.map( lambda m: self.fetchModule( m, refs.get( m ) ), unique ) )
+        self.saveCaches()
+        return results
+
+
+    def saveCaches( self ):
+        """
+        Write the origin cache and the stat index
+        """
+        if self.originCache != None:
+            self.originCache.save()
+        if self.statIndex != None:
+            self.statIndex.save()
+
+
+    def isClean( self, path: str ) -> bool:
+        """
+        Returns true when a repository has no local changes, from the stat index when available
+        """
+        if self.statIndex != None:
+            return self.statIndex.isClean( path )
+        return git.isClean( path )
+
+
+    def fetchModule( self, module: str, ref: str ) -> FetchResult:
+        """
+        Check out a single module, errors are reported by the result
+        """
+        if self.status != None:
+            self.status.start( module )
+        path = self.modulePath( module )
+        try:
+            if git.isRepository( path ):
+                result = self._updateModule( module, path, ref )
+            else:
+                result = self._cloneModule( module, path, ref )
+        except git.GitError as e:
+            result = FetchResult( module, path, "failed", message = str( e ) )
+        if self.status != None:
+            self.status.finish( module, not result.isAvailable() )
+        return result
+
+
+    def _cloneModule( self, module: str, path: str, ref: str ) -> FetchResult:
+        """
+        Clone a missing module from the first origin providing it
+        """
+        if self.mode == "none":
+            return FetchResult( module, path, "missing", message = "not fetched in librarian mode 'none'" )
+        urls = self.originUrls( module )
+        order = list( range( len( urls ) ) )
+
+        # try the origin found before first, skip modules no origin provided
+        if self.originCache != None:
+            found, origin = self.originCache.lookup( module )
+            if found and ( origin == None ):
+                return FetchResult( module, path, "failed", message = "not found in any origin, cached result" )
+            if found and ( origin < len( urls ) ):
+                order.remove( origin )
+                order.insert( 0, origin )
+
+        errors = []
+        for index in order:
+            created = not os.path.exists( path )
+            try:
+                if self.mirrorStore != None:
+                    self.mirrorStore.clone( urls[ index ], path, ref )
+                else:
+                    git.clone( urls[ index ], path, ref )
+            except git.GitError as e:
+                # a clone without the ref stays behind, remove it for the next origin
+                if created and os.path.exists( path ):
+                    shutil.rmtree( path )
+                errors.append( e )
+                continue
+            if self.originCache != None:
+                self.originCache.store( module, index )
+            return FetchResult( module, path, "cloned", urls[ index ], git.head( path ) )
+        if len( errors ) == 0:
+            return FetchResult( module, path, "failed", message = "no origins to search" )
+
+        # remember modules no origin provides, other errors may be temporary
+        if self.originCache != None:
+            if all( any( m in e.output.lower() for m in _notFoundMessages ) for e in errors ):
+                self.originCache.store( module, None )
+            else:
+                self.originCache.invalidate( module )
+        return FetchResult( module, path, "failed", message = str( errors[-1] ) )
+
+
+    def _updateModule( self, module: str, path: str, ref: str ) -> FetchResult:
+        """
+        Update a checked out module as the librarian mode requires
+        """
+        if ( self.mode in ( "none", "fetch" ) ) or ( ( self.mode == "asis" ) and self.isLocal( path ) ):
+            return FetchResult( module, path, "unchanged", commit = git.head( path ) )
+
+        # already at the requested commit?
+        if ( ref != None ) and ( git.readHead( path ) == ref ):
+            return FetchResult( module, path, "unchanged", commit = ref )
+
+        # local repositories stay on their branch, a commit or tag differing from HEAD is only reported
+        local = self.isLocal( path )
+        if local and ( ref != None ) and not git.isBranch( path, ref ):
+            commit = git.head( path )
+            return FetchResult( module, path, "unchanged", commit = commit, message = "local repository kept at " + commit + " instead of '" + ref + "'" )
+
+        # update, force and relock mode, asis mode for fetched repositories
+        message = None
+        if not self.isClean( path ):
+            if self.mode != "force":
+                return FetchResult( module, path, "modified", commit = git.head( path ), message = "local changes present, not updated" )
+            git.stash( path )
+            message = "local changes stashed"
+        before = git.head( path )
+        git.fetch( path )
+        if ref != None:
+            git.checkout( path, ref )
+        elif ( not local ) and git.isDetached( path ):
+            # checkouts pinned to a commit return to the default branch to pick up new commits
+            branch = git.defaultBranch( path )
+            if branch != None:
+                git.checkout( path, branch )
+        if git.hasUpstream( path ):
+            git.fastForward( path )
+        commit = git.head( path )
+        return FetchResult( module, path, "updated" if commit != before else "unchanged", commit = commit, message = message )
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+
+
+from typing import Dict
+from . import git
+from . import librarian as liblibrarian
+from . import manifest
+from . import resolver
+
+
+
+# version of the lock file format
+FORMAT_VERSION = 1
+
+
+# file name of the lock file within the initial module directory
+LOCK_FILE = "pdmodule.lock"
+
+
+
+
+def manifestDigest( moduleDir: str ) -> str:
+    """
+    Returns a digest of the manifest of a module, None when the module has no manifest
+    """
+    try:
+        with open( os.path.join( moduleDir, manifest.MANIFEST_FILE ), "rb" ) as f:
+            return hashlib.sha256( f.read() ).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+
+
+# commits of all dependencies resolved by a previous run
+class Lockfile:
+    def __init__( self, moduleDir: str ):
+        """
+        Creates an empty lock file of the module in moduleDir
+        """
+        self.path         = os.path.join( moduleDir, LOCK_FILE )
+        self.manifest     = None
+        self.dependencies = []
+        self.modules      = {}
+
+
+    @staticmethod
+    def load( moduleDir: str ) -> 'Lockfile':
+        """
+        Load the lock file of a module, a missing or unreadable lock file is empty
+        """
+        lock = Lockfile( moduleDir )
+        try:
+            with open( lock.path, "r", encoding = "utf-8" ) as f:
+                content = json.load( f )
+            if content.get( "version" ) == FORMAT_VERSION:
+                lock.manifest = content[ "manifest" ]
+                lock.dependencies = list( content[ "dependencies" ] )
+                for module in content[ "modules" ]:
+                    entry = content[ "modules" ][ module ]
+                    lock.modules[ module ] = ( str( entry[ "commit" ] ), list( entry[ "dependencies" ] ) )
+        except ( OSError, ValueError, KeyError, TypeError ):
+            lock.manifest = None
+            lock.dependencies = []
+            lock.modules = {}
+        return lock
+
+
+    def isEmpty( self ) -> bool:
+        """
+        Returns true when no dependencies are locked
+        """
+        return ( self.manifest == None ) and ( len( self.modules ) == 0 )
+
+
+    def commits( self ) -> Dict[ str, str ]:
+        """
+        Returns the locked commit of each module
+        """
+        return { m: self.modules[ m ][0] for m in self.modules }
+
+
+    def update( self, graph: resolver.DependencyGraph, moduleDir: str ) -> bool:
+        """
+        Lock the commits of all modules of a resolved dependency graph, returns true when the lock changed
+        """
+        before = ( self.manifest, self.dependencies, self.modules )
+        self.manifest = manifestDigest( moduleDir )
+        self.dependencies = graph.dependencies( graph.root )
+        self.modules = {}
+        for module in graph.modules():
+            if module == graph.root:
+                continue
+            self.modules[ module ] = ( graph.result( module ).commit, graph.dependencies( module ) )
+        return before != ( self.manifest, self.dependencies, self.modules )
+
+
+    def save( self ):
+        """
+        Write the lock file
+        """
+        modules = {}
+        for module in sorted( self.modules ):
+            commit, dependencies = self.modules[ module ]
+            modules[ module ] = { "commit": commit, "dependencies": dependencies }
+        tmpPath = self.path + "." + str( os.getpid() ) + ".tmp"
+        with open( tmpPath, "w", encoding = "utf-8" ) as f:
+            json.dump( { "version": FORMAT_VERSION, "manifest": self.manifest, "dependencies": self.dependencies, "modules": modules }, f, indent = 2 )
+            f.write( "\n" )
+        os.replace( tmpPath, self.path )
+
+
+    def matches( self, librarian: liblibrarian.Librarian, moduleDir: str ) -> bool:
+        """
+        Returns true when the manifest is unchanged and every locked module is checked out at its
+        locked commit, checked by reading HEAD refs without running git
+        """
+        if self.isEmpty() or ( self.manifest != manifestDigest( moduleDir ) ):
+            return False
+        for module in self.modules:
+            if git.readHead( librarian.modulePath( module ) ) != self.modules[ module ][0]:
+                return False
+        return True
+
+
+    def graph( self, librarian: liblibrarian.Librarian, rootModule: str ) -> resolver.DependencyGraph:
+        """
+        Returns the dependency graph recorded by the lock file, all modules unchanged at their locked commit
+        """
+        results = {}
+        for module in self.modules:
+            results[ module ] = liblibrarian.FetchResult( module, librarian.modulePath( module ), "unchanged", commit = self.modules[ module ][0] )
+        dependencies = { m: self.modules[ m ][1] for m in self.modules }
+        dependencies[ rootModule ] = self.dependencies
+        return resolver.DependencyGraph.fromLocked( rootModule, dependencies, results )
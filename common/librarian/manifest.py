@@ -0,0 +1,82 @@
+import json
+import os
+
+
+from typing import List
+
+
+
+# file name of the module manifest within a module directory
+MANIFEST_FILE = "pdmodule.json"
+
+
+
+
+class ManifestError( ValueError ):
+    def __init__( self, path: str, reason: str ):
+        """
+        Creates an invalid manifest exception
+        """
+        super().__init__( "invalid module manifest" )
+        self.path = path
+        self.reason = reason
+
+
+    def __str__( self ):
+        return "module manifest '" + self.path + "' " + self.reason
+
+
+
+
+# dependency of a module on another module
+class Dependency:
+    __slots__ = ( "module", "ref" )
+
+    def __init__( self, module: str, ref: str = None ):
+        """
+        Creates a dependency on module, optionally at a branch, tag or commit
+        """
+        self.module = module
+        self.ref    = ref
+
+
+    def __repr__( self ):
+        return "Dependency( " + self.module + ( ", " + self.ref if self.ref != None else "" ) + " )"
+
+
+
+
+def read( moduleDir: str ) -> List[ Dependency ]:
+    """
+    Returns the dependencies listed by the manifest of a module, a module without manifest has no dependencies.
+    The manifest is a JSON object with a "dependencies" list, an entry is either the module name
+    or an object { "module": <name>, "ref": <branch, tag or commit> }
+    """
+    path = os.path.join( moduleDir, MANIFEST_FILE )
+    try:
+        with open( path, "r", encoding = "utf-8" ) as f:
+            content = json.load( f )
+    except FileNotFoundError:
+        return []
+    except OSError as e:
+        raise ManifestError( path, "can not be read: " + str( e ) )
+    except ValueError as e:
+        raise ManifestError( path, "is no valid JSON: " + str( e ) )
+
+    if not isinstance( content, dict ):
+        raise ManifestError( path, "needs to be a JSON object" )
+    entries = content.get( "dependencies", [] )
+    if not isinstance( entries, list ):
+        raise ManifestError( path, "needs a list of dependencies" )
+    dependencies = []
+    for entry in entries:
+        if isinstance( entry, str ):
+            dependencies.append( Dependency( entry ) )
+        elif isinstance( entry, dict ) and isinstance( entry.get( "module" ), str ):
+            ref = entry.get( "ref" )
+            if ( ref != None ) and not isinstance( ref, str ):
+                raise ManifestError( path, "has an invalid ref of dependency '" + entry[ "module" ] + "'" )
+            dependencies.append( Dependency( entry[ "module" ], ref ) )
+        else:
+            raise ManifestError( path, "has an invalid dependency entry " + json.dumps( entry ) )
+    return dependencies
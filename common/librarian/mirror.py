@@ -0,0 +1,107 @@
+import contextlib
+import hashlib
+import os
+import re
+import shutil
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+from . import git
+
+
+
+# characters replaced in mirror directory names
+_unsafeNameChars = re.compile( r"[^A-Za-z0-9._-]" )
+
+
+
+
+# machine wide store of bare mirrors shared by workspaces
+class MirrorStore:
+    def __init__( self, directory: str ):
+        """
+        Creates a mirror store in directory. Checkouts borrow the objects of the mirror instead of
+        copying them, concurrent updates of a mirror by other threads or processes are serialized
+        by a lock file next to the mirror. Each mirror is updated at most once per store instance.
+        """
+        self.directory = directory
+        self.lock      = threading.Lock()
+        self.updated   = set()
+        os.makedirs( directory, exist_ok = True )
+
+
+    def mirrorPath( self, url: str ) -> str:
+        """
+        Returns the path of the mirror of url
+        """
+        name = _unsafeNameChars.sub( "_", url.rstrip( "/" ).split( "/" )[-1] )
+        digest = hashlib.sha1( url.encode( "utf-8" ) ).hexdigest()[ 0:12 ]
+        if not name.endswith( ".git" ):
+            name += ".git"
+        return os.path.join( self.directory, digest + "-" + name )
+
+
+    @contextlib.contextmanager
+    def _locked( self, path: str ):
+        """
+        Hold the lock of a mirror. The lock file may be removed while the lock is held, a
+        process waiting on the removed file locks the new lock file instead.
+        """
+        lockPath = path + ".lock"
+        while True:
+            f = open( lockPath, "a" )
+            if fcntl != None:
+                fcntl.flock( f.fileno(), fcntl.LOCK_EX )
+            try:
+                if os.stat( lockPath ).st_ino == os.fstat( f.fileno() ).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            f.close()
+        try:
+            yield
+        finally:
+            if fcntl != None:
+                fcntl.flock( f.fileno(), fcntl.LOCK_UN )
+            f.close()
+
+
+    def update( self, url: str ) -> str:
+        """
+        Create or update the mirror of url and return its path, raises git.GitError when url can not be mirrored
+        """
+        path = self.mirrorPath( url )
+        with self.lock:
+            if path in self.updated:
+                return path
+        with self._locked( path ):
+            if git.isBareRepository( path ):
+                git.updateMirror( path )
+            else:
+                # create the mirror under a temporary name, a failed clone leaves no mirror behind
+                tmpPath = path + "." + str( os.getpid() ) + "." + str( threading.get_ident() ) + ".tmp"
+                try:
+                    git.cloneMirror( url, tmpPath )
+                    git.setConfig( tmpPath, "gc.pruneExpire", "never" )
+                    os.replace( tmpPath, path )
+                except git.GitError:
+                    # no mirror of url, origins probed in vain leave no lock file behind
+                    os.remove( path + ".lock" )
+                    raise
+                finally:
+                    shutil.rmtree( tmpPath, ignore_errors = True )
+        with self.lock:
+            self.updated.add( path )
+        return path
+
+
+    def clone( self, url: str, path: str, ref: str = None ):
+        """
+        Clone url into path borrowing the objects of its mirror, raises git.GitError on failure
+        """
+        git.cloneShared( self.update( url ), path, url, ref )
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+from typing import List, Tuple
+
+
+
+# version of the origin cache format
+FORMAT_VERSION = 1
+
+
+# file name of the origin cache within the cache directory
+CACHE_FILE = "origincache.json"
+
+
+# seconds an origin found for a module is remembered
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+# seconds a module not found in any origin is remembered
+DEFAULT_NEGATIVE_TTL = 3600
+
+
+
+
+def originsKey( origins: List[ str ] ) -> str:
+    """
+    Returns the key of a resolved origin list, any edit of the list changes the key
+    """
+    return hashlib.sha256( json.dumps( list( origins ) ).encode( "utf-8" ) ).hexdigest()
+
+
+
+
+# remembers which origin provides a module
+class OriginCache:
+    def __init__(
+            self,
+            cacheDir: str,
+            origins: List[ str ],
+            ttl: float = DEFAULT_TTL,
+            negativeTtl: float = DEFAULT_NEGATIVE_TTL
+        ):
+        """
+        Creates the origin cache of the resolved origin list, entries stored for another origin
+        list are dropped on load. Entries map a module to the index of its origin, or to None when
+        no origin provides the module.
+        """
+        self.path        = os.path.join( cacheDir, CACHE_FILE )
+        self.key         = originsKey( origins )
+        self.ttl         = ttl
+        self.negativeTtl = negativeTtl
+        self.lock        = threading.Lock()
+        self.entries     = {}
+        self.changed     = False
+        self.hits        = 0
+        self.misses      = 0
+        self._load()
+
+
+    def _load( self ):
+        """
+        Read the cache file, an unreadable file or another origin list is treated as empty cache
+        """
+        try:
+            with open( self.path, "r", encoding = "utf-8" ) as f:
+                content = json.load( f )
+            if ( content.get( "version" ) == FORMAT_VERSION ) and ( content.get( "key" ) == self.key ):
+                for module in content[ "modules" ]:
+                    origin, stored = content[ "modules" ][ module ]
+                    self.entries[ module ] = ( origin, float( stored ) )
+            else:
+                self.changed = True
+        except ( OSError, ValueError, KeyError, TypeError ):
+            self.entries = {}
+
+
+    def lookup( self, module: str ) -> Tuple[ bool, int ]:
+        """
+        Returns ( found, origin index ), the index is None for modules no origin provides
+        """
+        with self.lock:
+            entry = self.entries.get( module )
+            if entry != None:
+                origin, stored = entry
+                ttl = self.ttl if origin != None else self.negativeTtl
+                if time.time() - stored < ttl:
+                    self.hits += 1
+                    return ( True, origin )
+                del self.entries[ module ]
+                self.changed = True
+            self.misses += 1
+            return ( False, None )
+
+
+    def store( self, module: str, origin: int ):
+        """
+        Remember the origin index of a module, None when no origin provides the module
+        """
+        with self.lock:
+            self.entries[ module ] = ( origin, time.time() )
+            self.changed = True
+
+
+    def invalidate( self, module: str ):
+        """
+        Forget the origin of a module
+        """
+        with self.lock:
+            if self.entries.pop( module, None ) != None:
+                self.changed = True
+
+
+    def save( self ):
+        """
+        Write the cache when it changed
+        """
+        with self.lock:
+            if not self.changed:
+                return
+            modules = { m: list( self.entries[ m ] ) for m in self.entries }
+            self.changed = False
+        tmpPath = self.path + "." + str( os.getpid() ) + ".tmp"
+        with open( tmpPath, "w", encoding = "utf-8" ) as f:
+            json.dump( { "version": FORMAT_VERSION, "key": self.key, "modules": modules }, f, separators = ( ",", ":" ) )
+        os.replace( tmpPath, self.path )
@@ -0,0 +1,246 @@
+import concurrent.futures
+
+
+from typing import Dict, List, Tuple
+from . import librarian as liblibrarian
+from . import manifest
+
+
+
+class DependencyCycle( Exception ):
+    def __init__( self, cycle: List[ str ] ):
+        """
+        Creates a cyclic dependency exception
+        """
+        super().__init__( "cyclic dependency" )
+        self.cycle = cycle
+
+
+    def __str__( self ):
+        return "modules '" + "' -> '".join( self.cycle ) + "' depend on each other"
+
+
+
+
+# module within the dependency graph
+class _Node:
+    __slots__ = ( "module", "ref", "result", "dependencies", "error" )
+
+    def __init__( self, module: str, ref: str ):
+        """
+        Creates a node of a module requested at ref
+        """
+        self.module       = module
+        self.ref          = ref
+        self.result       = None
+        self.dependencies = []
+        self.error        = None
+
+
+
+
+# dependency DAG of the modules of a project
+class DependencyGraph:
+    def __init__( self, root: str ):
+        """
+        Creates a graph of the dependencies of the root module
+        """
+        self.root      = root
+        self.nodes     = { root: _Node( root, None ) }
+        self.conflicts = {}
+
+
+    @staticmethod
+    def fromLocked( root: str, dependencies: Dict[ str, List[ str ] ], results: Dict[ str, liblibrarian.FetchResult ] ) -> 'DependencyGraph':
+        """
+        Creates a graph from recorded dependencies and results without reading manifests
+        """
+        graph = DependencyGraph( root )
+        for module in dependencies:
+            node = graph.nodes.get( module )
+            if node == None:
+                node = _Node( module, None )
+                graph.nodes[ module ] = node
+            node.dependencies = list( dependencies[ module ] )
+            node.result = results.get( module )
+        return graph
+
+
+    def dependencies( self, module: str ) -> List[ str ]:
+        """
+        Returns the direct dependencies of a module in manifest order
+        """
+        return list( self.nodes[ module ].dependencies )
+
+
+    def result( self, module: str ) -> liblibrarian.FetchResult:
+        """
+        Returns the fetch result of a module, None for the root module
+        """
+        return self.nodes[ module ].result
+
+
+    def failed( self ) -> List[ str ]:
+        """
+        Returns the modules that could not be checked out or have an invalid manifest
+        """
+        return [ m for m in self.modules() if ( self.nodes[ m ].error != None ) or ( ( self.nodes[ m ].result != None ) and not self.nodes[ m ].result.isAvailable() ) ]
+
+
+    def error( self, module: str ) -> str:
+        """
+        Returns the reason a module failed or None
+        """
+        node = self.nodes[ module ]
+        if node.error != None:
+            return node.error
+        if ( node.result != None ) and not node.result.isAvailable():
+            return node.result.message
+        return None
+
+
+    def modules( self ) -> List[ str ]:
+        """
+        Returns all modules breadth first from the root in manifest order, independent of the fetch order
+        """
+        order = [ self.root ]
+        seen = { self.root }
+        i = 0
+        while i < len( order ):
+            for dep in self.nodes[ order[ i ] ].dependencies:
+                if not dep in seen:
+                    seen.add( dep )
+                    order.append( dep )
+            i += 1
+        return order
+
+
+    def cycles( self ) -> List[ List[ str ] ]:
+        """
+        Returns one path for each dependency cycle, starting and ending at the same module
+        """
+        found = []
+        state = {}
+        for start in self.modules():
+            if start in state:
+                continue
+            # iterative depth first search, the stack holds the current path
+            state[ start ] = 1
+            stack = [ ( start, iter( self.nodes[ start ].dependencies ) ) ]
+            while len( stack ) > 0:
+                module, children = stack[-1]
+                child = next( children, None )
+                if child == None:
+                    state[ module ] = 2
+                    stack.pop()
+                elif state.get( child ) == 1:
+                    path = [ m for m, _ in stack ]
+                    found.append( path[ path.index( child ): ] + [ child ] )
+                elif not child in state:
+                    state[ child ] = 1
+                    stack.append( ( child, iter( self.nodes[ child ].dependencies ) ) )
+        return found
+
+
+    def buildOrder( self ) -> List[ str ]:
+        """
+        Returns all modules, each after its dependencies, raises DependencyCycle for cyclic dependencies
+        """
+        cycles = self.cycles()
+        if len( cycles ) > 0:
+            raise DependencyCycle( cycles[0] )
+        order = []
+        done = set()
+        for start in self.modules():
+            if start in done:
+                continue
+            stack = [ ( start, iter( self.nodes[ start ].dependencies ) ) ]
+            while len( stack ) > 0:
+                module, children = stack[-1]
+                child = next( children, None )
+                if child == None:
+                    stack.pop()
+                    if not module in done:
+                        done.add( module )
+                        order.append( module )
+                elif not child in done:
+                    stack.append( ( child, iter( self.nodes[ child ].dependencies ) ) )
+        return order
+
+
+
+
+# discovers and checks out the transitive dependencies of a module
+class Resolver:
+    def __init__( self, librarian: liblibrarian.Librarian ):
+        """
+        Creates a resolver checking out modules with the librarian, using up to librarian.jobs
+        parallel jobs. A module is fetched as soon as the manifest of its first dependent module
+        was read, without waiting for other modules of the same level.
+        """
+        self.librarian = librarian
+
+
+    def _fetch( self, module: str, ref: str ) -> Tuple[ liblibrarian.FetchResult, List[ manifest.Dependency ], str ]:
+        """
+        Fetch a module and read its manifest, runs on a worker thread, all errors are returned
+        """
+        try:
+            result = self.librarian.fetchModule( module, ref )
+        except Exception as e:
+            # i.e. OSError of a full disk, reported as failed module instead of aborting the resolve
+            if self.librarian.status != None:
+                self.librarian.status.finish( module, True )
+            return ( liblibrarian.FetchResult( module, None, "failed", message = str( e ) ), [], None )
+        if not result.isAvailable():
+            return ( result, [], None )
+        try:
+            return ( result, manifest.read( result.path ), None )
+        except Exception as e:
+            # ManifestError of an invalid manifest or any error reading it
+            return ( result, [], str( e ) )
+
+
+    def resolve( self, rootModule: str, rootDir: str, pinned: Dict[ str, str ] = None ) -> DependencyGraph:
+        """
+        Check out all modules the root module in rootDir depends on, each module is fetched once,
+        modules required by multiple modules with different refs are fetched at the first ref
+        and reported as conflict. Modules in pinned are checked out at the pinned commit
+        instead of the ref of the manifest.
+        """
+        graph = DependencyGraph( rootModule )
+        pinned = pinned if pinned != None else {}
+        pending = {}
+
+        with concurrent.futures.ThreadPoolExecutor( max_workers = self.librarian.jobs, thread_name_prefix = "resolver" ) as pool:
+
+            def addDependencies( node: _Node, dependencies: List[ manifest.Dependency ] ):
+                for dep in dependencies:
+                    if dep.module in node.dependencies:
+                        continue
+                    node.dependencies.append( dep.module )
+                    child = graph.nodes.get( dep.module )
+                    if child == None:
+                        child = _Node( dep.module, dep.ref )
+                        graph.nodes[ dep.module ] = child
+                        if self.librarian.status != None:
+                            self.librarian.status.queue()
+                        pending[ pool.submit( self._fetch, dep.module, pinned.get( dep.module, dep.ref ) ) ] = child
+                    elif ( dep.ref != child.ref ) and ( dep.ref != None ):
+                        # diamond with diverging refs, keep the first ref
+                        graph.conflicts.setdefault( dep.module, [ child.ref ] ).append( dep.ref )
+
+            try:
+                addDependencies( graph.nodes[ rootModule ], manifest.read( rootDir ) )
+            except manifest.ManifestError as e:
+                graph.nodes[ rootModule ].error = str( e )
+
+            while len( pending ) > 0:
+                finished, _ = concurrent.futures.wait( pending, return_when = concurrent.futures.FIRST_COMPLETED )
+                for future in finished:
+                    node = pending.pop( future )
+                    node.result, dependencies, node.error = future.result()
+                    addDependencies( node, dependencies )
+
+        self.librarian.saveCaches()
+        return graph
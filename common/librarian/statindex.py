@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+
+
+from typing import Dict, List
+from . import git
+
+
+
+# version of the stat index format
+FORMAT_VERSION = 2
+
+
+# file name of the stat index within the cache directory
+INDEX_FILE = "statindex.json"
+
+
+# files modified this many seconds before a fingerprint may change unnoticed on coarse timestamps
+RACY_SECONDS = 2.0
+
+
+# changed files passed to git by name, more changed files are classified by checking all files
+PATHSPEC_FILES = 256
+
+
+
+
+def _fileStat( path: str ) -> List[ int ]:
+    """
+    Returns [ size, mtime, inode ] of a file or None when it is missing
+    """
+    try:
+        st = os.lstat( path )
+    except OSError:
+        return None
+    return [ st.st_size, st.st_mtime_ns, st.st_ino ]
+
+
+
+
+# fingerprint of a repository, stats of the git index and of each tracked file
+class _Entry:
+    __slots__ = ( "head", "indexPath", "indexStat", "files", "dirty" )
+
+    def __init__( self, head: str, indexPath: str, indexStat: List[ int ], files: Dict[ str, List[ int ] ], dirty: List[ str ] ):
+        """
+        Creates the fingerprint of a repository at head, files maps each tracked file to its
+        stat or None when it needs to be checked by git, dirty lists the files with local changes
+        """
+        self.head      = head
+        self.indexPath = indexPath
+        self.indexStat = indexStat
+        self.files     = files
+        self.dirty     = dirty
+
+
+    def changedFiles( self, path: str ) -> List[ str ]:
+        """
+        Returns the tracked files whose stat changed, None when HEAD or the git index changed
+        """
+        if ( self.head == None ) or ( git.readHead( path ) != self.head ) or ( _fileStat( self.indexPath ) != self.indexStat ):
+            return None
+        return [ name for name in self.files if _fileStat( os.path.join( path, name ) ) != self.files[ name ] ]
+
+
+    def toData( self ) -> dict:
+        """
+        Returns the entry as JSON compatible data
+        """
+        return { "head": self.head, "index": self.indexPath, "indexStat": self.indexStat, "files": self.files, "dirty": self.dirty }
+
+
+    @staticmethod
+    def fromData( data: dict ) -> '_Entry':
+        """
+        Restore an entry from JSON compatible data
+        """
+        return _Entry( data[ "head" ], str( data[ "index" ] ), data[ "indexStat" ], dict( data[ "files" ] ), list( data[ "dirty" ] ) )
+
+
+
+
+def _fileStats( path: str, files: List[ str ], started: float ) -> Dict[ str, List[ int ] ]:
+    """
+    Returns the stats of files, files modified right before the check started may change without
+    changing their stat and are left to be checked by git again
+    """
+    stats = {}
+    for name in files:
+        st = _fileStat( os.path.join( path, name ) )
+        if ( st != None ) and ( st[1] / 1e9 >= started - RACY_SECONDS ):
+            st = None
+        stats[ name ] = st
+    return stats
+
+
+
+
+# remembers the local change state of repositories by file stat fingerprints
+class StatIndex:
+    def __init__( self, cacheDir: str ):
+        """
+        Creates the stat index stored in cacheDir. A repository is classified by git once, later
+        checks only stat its tracked files and run git for the files whose stat changed. All
+        files are classified again when HEAD or the git index changed.
+        """
+        self.path    = os.path.join( cacheDir, INDEX_FILE )
+        self.lock    = threading.Lock()
+        self.entries = {}
+        self.changed = False
+        self.hits    = 0
+        self.updates = 0
+        self.misses  = 0
+        self._load()
+
+
+    def _load( self ):
+        """
+        Read the index, an unreadable index is treated as empty
+        """
+        try:
+            with open( self.path, "r", encoding = "utf-8" ) as f:
+                content = json.load( f )
+            if content.get( "version" ) == FORMAT_VERSION:
+                for repo in content[ "repositories" ]:
+                    self.entries[ repo ] = _Entry.fromData( content[ "repositories" ][ repo ] )
+        except ( OSError, ValueError, KeyError, TypeError ):
+            self.entries = {}
+
+
+    def isClean( self, path: str ) -> bool:
+        """
+        Returns true when the repository has no local changes, untracked files are ignored.
+        Git is only run when the stat of a tracked file, HEAD or the git index changed.
+        """
+        key = os.path.abspath( path )
+        with self.lock:
+            entry = self.entries.get( key )
+        changed = entry.changedFiles( path ) if entry != None else None
+        if ( changed != None ) and ( len( changed ) == 0 ):
+            with self.lock:
+                self.hits += 1
+            return len( entry.dirty ) == 0
+
+        started = time.time()
+        if changed != None:
+            # classify the changed files only, the other files keep their state
+            if len( changed ) <= PATHSPEC_FILES:
+                dirty = set( entry.dirty ).difference( changed ).union( git.changedFiles( path, changed ) )
+            else:
+                dirty = set( git.changedFiles( path ) )
+            files = dict( entry.files )
+            files.update( _fileStats( path, changed, started ) )
+            indexPath = entry.indexPath
+        else:
+            # classify all files
+            dirty = set( git.changedFiles( path ) )
+            files = _fileStats( path, git.trackedFiles( path ), started )
+            indexPath = git.gitPath( path, "index" )
+
+        # git may refresh the index while classifying
+        entry = _Entry( git.readHead( path ), indexPath, _fileStat( indexPath ), files, sorted( dirty ) )
+        with self.lock:
+            if changed != None:
+                self.updates += 1
+            else:
+                self.misses += 1
+            self.entries[ key ] = entry
+            self.changed = True
+        return len( dirty ) == 0
+
+
+    def save( self ):
+        """
+        Write the index when it changed
+        """
+        with self.lock:
+            if not self.changed:
+                return
+            repositories = {}
+            for repo in self.entries:
+                repositories[ repo ] = self.entries[ repo ].toData()
+            self.changed = False
+        tmpPath = self.path + "." + str( os.getpid() ) + ".tmp"
+        with open( tmpPath, "w", encoding = "utf-8" ) as f:
+            json.dump( { "version": FORMAT_VERSION, "repositories": repositories }, f, separators = ( ",", ":" ) )
+        os.replace( tmpPath, self.path )
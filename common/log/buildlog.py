@@ -0,0 +1,216 @@
+import atexit
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+import weakref
+
+
+from typing import List
+from . import sink as logsink
+
+
+
+# build logs closed when the interpreter exits
+_openBuildLogs = weakref.WeakSet()
+
+
+# marks the end of the queue
+_endOfQueue = None
+
+
+
+
+# sink passing lines to the queue of a build log
+class _QueueSink( logsink.Sink ):
+    def __init__( self, buildLog: 'BuildLog' ):
+        """
+        Creates a sink writing into a build log
+        """
+        super().__init__( logsink.FlushPolicy( maxLines = 1 ) )
+        self.buildLog = buildLog
+
+
+    def _emit( self, lines: List[ str ] ):
+        self.buildLog.write( lines )
+
+
+
+
+# build log written by a background thread
+class BuildLog:
+    def __init__(
+            self,
+            directory: str,
+            runName: str = None,
+            maxBytes: int = 16 * 1024 * 1024,
+            keepSegments: int = None,
+            compress: bool = True,
+            queueSize: int = 4096
+        ):
+        """
+        Creates a build log writing <runName>.log into directory. When the log exceeds maxBytes it is
+        rotated into numbered segments, gzip compressed when compress is set, keeping the newest
+        keepSegments segments or all when None. Producers never wait for the disk, batches arriving
+        while queueSize batches are pending are dropped and counted.
+        """
+        self.directory    = directory
+        self.runName      = runName if runName != None else time.strftime( "%Y%m%d-%H%M%S" ) + "-" + str( os.getpid() )
+        self.path         = os.path.join( directory, self.runName + ".log" )
+        self.maxBytes     = maxBytes
+        self.keepSegments = keepSegments
+        self.compress     = compress
+        self.queue        = queue.Queue( queueSize )
+        self.dropped      = 0
+        self.droppedLock  = threading.Lock()
+        self.segments     = []
+        self.closed       = False
+        self._sinks       = weakref.WeakSet()
+
+        # writer state
+        self._file        = None
+        self._size        = 0
+        self._segmentId   = 0
+        self._reported    = 0
+
+        self._thread = threading.Thread( target = self._run, name = "buildlog-" + self.runName, daemon = True )
+        self._thread.start()
+        _openBuildLogs.add( self )
+
+
+    def write( self, lines: List[ str ] ):
+        """
+        Queue a batch of lines, never blocks
+        """
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait( lines )
+        except queue.Full:
+            with self.droppedLock:
+                self.dropped += len( lines )
+
+
+    def writeLine( self, line: str ):
+        """
+        Queue a single line, never blocks
+        """
+        self.write( [ line ] )
+
+
+    def sink( self ) -> logsink.Sink:
+        """
+        Returns a sink writing into this build log, i.e. to be used by a Formatter
+        """
+        s = _QueueSink( self )
+        self._sinks.add( s )
+        return s
+
+
+    def close( self ):
+        """
+        Write all queued lines and stop the writer thread
+        """
+        if self.closed:
+            return
+        for s in list( self._sinks ):
+            s.flush()
+        self.closed = True
+
+        # a writer thread that died leaves a full queue behind, never wait for space in it
+        while self._thread.is_alive():
+            try:
+                self.queue.put( _endOfQueue, timeout = 0.1 )
+                break
+            except queue.Full:
+                pass
+        self._thread.join()
+        _openBuildLogs.discard( self )
+
+
+    def _open( self ):
+        """
+        Open the current log file
+        """
+        self._file = open( self.path, "a", encoding = "utf-8" )
+        self._size = self._file.tell()
+
+
+    def _rotate( self ):
+        """
+        Move the current log file into the next segment
+        """
+        self._file.close()
+        self._file = None
+        self._segmentId += 1
+        segment = self.path + "." + str( self._segmentId )
+        os.replace( self.path, segment )
+        if self.compress:
+            with open( segment, "rb" ) as src, gzip.open( segment + ".gz", "wb" ) as dst:
+                shutil.copyfileobj( src, dst )
+            os.remove( segment )
+            segment += ".gz"
+        self.segments.append( segment )
+
+        # remove oldest segments
+        while ( self.keepSegments != None ) and ( len( self.segments ) > self.keepSegments ):
+            os.remove( self.segments.pop( 0 ) )
+
+
+    def _writeBatch( self, lines: List[ str ] ):
+        """
+        Write lines into the log file, rotating when the size limit is reached
+        """
+        if self._file == None:
+            self._open()
+
+        # report lines dropped by producers
+        dropped = self.dropped
+        if dropped != self._reported:
+            lines = [ "[" + str( dropped - self._reported ) + " log lines dropped]" ] + lines
+            self._reported = dropped
+
+        text = "\n".join( lines ) + "\n"
+        self._file.write( text )
+        self._size += len( text.encode( "utf-8" ) )
+        if self._size >= self.maxBytes:
+            self._rotate()
+
+
+    def _run( self ):
+        """
+        Writer thread, drains all pending batches before each flush
+        """
+        running = True
+        while running:
+            batches = [ self.queue.get() ]
+            while True:
+                try:
+                    batches.append( self.queue.get_nowait() )
+                except queue.Empty:
+                    break
+            for batch in batches:
+                if batch is _endOfQueue:
+                    running = False
+                    continue
+                self._writeBatch( batch )
+            if self._file != None:
+                self._file.flush()
+        if self._file != None:
+            self._file.close()
+            self._file = None
+
+
+
+
+def _closeOpenBuildLogs():
+    """
+    Close all open build logs on exit
+    """
+    for b in list( _openBuildLogs ):
+        b.close()
+
+
+atexit.register( _closeOpenBuildLogs )
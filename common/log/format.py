@@ -1,26 +1,78 @@
+import collections
+import re
+import threading
+
+
 from typing import List, Union, Tuple
+from . import sink as logsink
 
 
 
 
+# immutable settings for text warping, usable as key
 class TextWarpSettings:
+    __slots__ = (
+        "firstLinePrefix",
+        "firstBreakPrefix",
+        "followLinePrefix",
+        "followBreakPrefix",
+        "spaceChars",
+        "splitChars",
+        "_hash"
+    )
+
     def __init__(
             self,
             firstLinePrefix: str = None,
             firstBreakPrefix: str = None,
             followLinePrefix: str = None,
-            followBreakPrefix: str = None
+            followBreakPrefix: str = None,
+            spaceChars: str = None,
+            splitChars: str = None
         ):
         """
         Settings for text warping
         """
-        self.firstLinePrefix     = str( firstLinePrefix ) if firstLinePrefix != None else ""
-        self.firstBreakPrefix    = str( firstBreakPrefix ) if firstBreakPrefix != None else "  "
-        self.followLinePrefix    = str( followLinePrefix ) if followLinePrefix != None else ""
-        self.followBreakPrefix   = str( followBreakPrefix ) if followBreakPrefix != None else "  "
-        # TODO: add to construtor parameters
-        self.spaceChars          = " "
-        self.splitChars          = ",.:;?!"
+        init = super().__setattr__
+        init( "firstLinePrefix",   str( firstLinePrefix ) if firstLinePrefix != None else "" )
+        init( "firstBreakPrefix",  str( firstBreakPrefix ) if firstBreakPrefix != None else "  " )
+        init( "followLinePrefix",  str( followLinePrefix ) if followLinePrefix != None else "" )
+        init( "followBreakPrefix", str( followBreakPrefix ) if followBreakPrefix != None else "  " )
+        init( "spaceChars",        str( spaceChars ) if spaceChars != None else " " )
+        init( "splitChars",        str( splitChars ) if splitChars != None else ",.:;?!" )
+        init( "_hash",             hash( self.fingerprint() ) )
+
+
+    def __setattr__( self, name, value ):
+        raise AttributeError( "TextWarpSettings is immutable, attribute '" + name + "' can not be set" )
+
+
+    def __delattr__( self, name ):
+        raise AttributeError( "TextWarpSettings is immutable, attribute '" + name + "' can not be deleted" )
+
+
+    def __hash__( self ) -> int:
+        return self._hash
+
+
+    def __eq__( self, other ) -> bool:
+        if not isinstance( other, TextWarpSettings ):
+            return NotImplemented
+        return ( self._hash == other._hash ) and ( self.fingerprint() == other.fingerprint() )
+
+
+    def fingerprint( self ) -> tuple:
+        """
+        Returns a tuple of all settings
+        """
+        return (
+            self.firstLinePrefix,
+            self.firstBreakPrefix,
+            self.followLinePrefix,
+            self.followBreakPrefix,
+            self.spaceChars,
+            self.splitChars
+        )
 
 
     def maxIndent( self ) -> int:
@@ -40,17 +92,40 @@ class TextWarpSettings:
         Returns a copy of the text warp settings with identation
         """
         indent = ""
-        if indent != None:
+        if prefix != None:
             indent = str( prefix )
         return TextWarpSettings(
             indent + self.firstLinePrefix,
             indent + self.firstBreakPrefix,
             indent + self.followLinePrefix,
-            indent + self.followBreakPrefix
+            indent + self.followBreakPrefix,
+            self.spaceChars,
+            self.splitChars
         )
 
 
 
+def _breakPattern( chars: str ):
+    """
+    Returns a pattern matching any of the break chars or None when there are no break chars
+    """
+    if len( chars ) == 0:
+        return None
+    return re.compile( "[" + re.escape( chars ) + "]" )
+
+
+def _findBreak( pattern, line: str, start: int, end: int ) -> int:
+    """
+    Returns the index of the next break char at or after start, or end when there is none
+    """
+    if ( pattern == None ) or ( start >= end ):
+        return end
+    match = pattern.search( line, start )
+    return match.start() if match != None else end
+
+
+
+
 class _TextWarp:
     def __init__(
             self,
@@ -71,7 +146,18 @@ class _TextWarp:
     def _addLine( self, line: str ):
         """
         Adds a single line of text
-        """
+
+        The line is processed by offset, the next break opportunities are searched
+        forward from the current offset only, so each line is wrapped in linear time.
+        """
+        settings         = self.textWarpSettings
+        maximumWidth     = self.maximumWidth
+        lineLength       = len( line )
+        spaceSearch      = _breakPattern( settings.spaceChars )
+        splitSearch      = _breakPattern( settings.splitChars )
+        nextSpace        = -1
+        nextSplit        = -1
+        pos              = 0
         breakMode        = False
         lineBegin        = True
         lineBuffer       = ""
@@ -80,65 +166,57 @@ class _TextWarp:
         while( True ):
             # consume space at front of line?
             if consumeSpace and lineBegin:
-                if line[0:1] in self.textWarpSettings.spaceChars:
-                    line = line[1:]
+                if ( pos < lineLength ) and ( line[ pos ] in settings.spaceChars ):
+                    pos += 1
             consumeSpace = False
 
             # find line prefix
             if lineBegin:
                 if breakMode:
-                    lineBuffer += self.textWarpSettings.firstBreakPrefix if self.processingFirstLine else self.textWarpSettings.followBreakPrefix
+                    lineBuffer += settings.firstBreakPrefix if self.processingFirstLine else settings.followBreakPrefix
                 else:
-                    lineBuffer += self.textWarpSettings.firstLinePrefix if self.processingFirstLine else self.textWarpSettings.followLinePrefix
+                    lineBuffer += settings.firstLinePrefix if self.processingFirstLine else settings.followLinePrefix
                 lineBegin        = False
                 lineHasNoDataYet = True
 
             # content fits into output line buffer?
-            t = lineBuffer + line
-            if len( t ) <= self.maximumWidth:
-                self.lines.append( t )
+            if len( lineBuffer ) + ( lineLength - pos ) <= maximumWidth:
+                self.lines.append( lineBuffer + line[ pos: ] )
                 self.processingFirstLine = False
-                return         
-
-            # split before space char and want to consume it?
-            t = ""
-            for cIndex in range( len( line ) ):
-                c = line[ cIndex ]
-                if( c in self.textWarpSettings.spaceChars ):
-                    if( cIndex == 0 ):
-                        t += c
-                    else:
-                        consumeSpace = True
-                        break
-                else:
-                    t += c
-            if len( lineBuffer + t ) <= self.maximumWidth:
-                line = line[ len( t ) : ]
-                lineBuffer += t
+                return
+
+            # split before space char and want to consume it? a space char at the offset belongs to the word
+            if nextSpace < pos + 1:
+                nextSpace = _findBreak( spaceSearch, line, pos + 1, lineLength )
+            end = nextSpace
+            if end < lineLength:
+                consumeSpace = True
+            if len( lineBuffer ) + ( end - pos ) <= maximumWidth:
+                lineBuffer += line[ pos:end ]
+                pos = end
                 lineHasNoDataYet = False
                 continue
 
             # split after separator char, consuming next space?
-            t = ""
-            for cIndex in range( len( line ) ):
-                c = line[ cIndex ]
-                if( c in self.textWarpSettings.splitChars ):
-                    t += c
-                    consumeSpace = True
-                    break
-                else:
-                    t += c
-            if len( lineBuffer + t ) <= self.maximumWidth:
-                line = line[ len( t ) : ]
-                lineBuffer += t
+            if nextSplit < pos:
+                nextSplit = _findBreak( splitSearch, line, pos, lineLength )
+            end = nextSplit
+            if end < lineLength:
+                end += 1
+                consumeSpace = True
+            if len( lineBuffer ) + ( end - pos ) <= maximumWidth:
+                lineBuffer += line[ pos:end ]
+                pos = end
                 lineHasNoDataYet = False
                 continue
 
             # no preferred split point found, split inbetween
             if lineHasNoDataYet:
-                maxChars = self.maximumWidth - len( lineBuffer )
-                lineBuffer += line[0:maxChars]
-                line = line[maxChars:]
+                maxChars = maximumWidth - len( lineBuffer )
+                rest = lineLength - pos
+                maxChars = min( maxChars, rest ) if maxChars >= 0 else max( rest + maxChars, 0 )
+                lineBuffer += line[ pos:pos + maxChars ]
+                pos += maxChars
 
             # append rest of line
             self.lines.append( lineBuffer )
@@ -182,6 +260,178 @@ class _TextWarp:
 
 
 
+# bounded LRU cache of warped texts
+class WarpCache:
+    def __init__( self, maxEntries: int = 1024, maxTextLength: int = 4096 ):
+        """
+        Creates a cache of up to maxEntries warp results, texts longer than maxTextLength
+        are not cached, a cache without entries is disabled
+        """
+        self.maxEntries    = maxEntries
+        self.maxTextLength = maxTextLength
+        self.entries       = collections.OrderedDict()
+        self.lock          = threading.Lock()
+        self.hits          = 0
+        self.misses        = 0
+
+
+    def warp( self, text: str, maximumWidth: int, settings: TextWarpSettings ) -> Tuple[ str, ... ]:
+        """
+        Returns the lines of text warped to maximumWidth, from the cache when text was warped before
+        """
+        if ( self.maxEntries <= 0 ) or ( len( text ) > self.maxTextLength ):
+            return _warp( text, maximumWidth, settings )
+        key = ( text, maximumWidth, settings )
+        with self.lock:
+            lines = self.entries.get( key )
+            if lines != None:
+                self.entries.move_to_end( key )
+                self.hits += 1
+                return lines
+            self.misses += 1
+        lines = _warp( text, maximumWidth, settings )
+        with self.lock:
+            self.entries[ key ] = lines
+            while len( self.entries ) > self.maxEntries:
+                self.entries.popitem( last = False )
+        return lines
+
+
+    def clear( self ):
+        """
+        Remove all entries and reset the counters
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+
+
+def _warp( text: str, maximumWidth: int, settings: TextWarpSettings ) -> Tuple[ str, ... ]:
+    """
+    Returns the lines of text warped to maximumWidth
+    """
+    warp = _TextWarp( maximumWidth, settings )
+    warp.addLine( text )
+    return tuple( warp.getFormatted() )
+
+
+# cache shared by formatters
+defaultWarpCache = WarpCache()
+
+
+
+
+def _cellText( row: List[ object ], column: int ) -> str:
+    """
+    Returns the text of a table cell, missing cells and None are empty
+    """
+    cell = row[ column ] if column < len( row ) else None
+    if cell == None:
+        return ""
+    return cell if isinstance( cell, str ) else str( cell )
+
+
+
+
+# column widths of a table with any number of columns
+class TableLayout:
+    def __init__(
+            self,
+            maxWidth: int,
+            columnCount: int,
+            weights: List[ float ] = None,
+            warpSettings: List[ TextWarpSettings ] = None,
+            separator: str = "  ",
+            warpCache: WarpCache = None
+        ):
+        """
+        Creates the layout of a table, columns wider than their share of maxWidth are warped
+        with the column's warp settings and share the remaining width by weight
+        """
+        self.maxWidth     = maxWidth
+        self.columnCount  = columnCount
+        self.weights      = list( weights ) if weights != None else [ 1.0 ] * columnCount
+        self.warpSettings = list( warpSettings ) if warpSettings != None else [ TextWarpSettings() ] * columnCount
+        self.separator    = separator
+        self.warpCache    = warpCache if warpCache != None else defaultWarpCache
+        self.natural      = [ 0 ] * columnCount
+        self.widths       = None
+
+
+    def measure( self, rows: List[ List[ object ] ] ):
+        """
+        Collect the natural width of each column in one pass over all rows
+        """
+        natural = self.natural
+        columns = range( self.columnCount )
+        for row in rows:
+            for c in columns:
+                cell = _cellText( row, c )
+                for line in cell.split( "\n" ):
+                    if len( line ) > natural[ c ]:
+                        natural[ c ] = len( line )
+        self.widths = None
+
+
+    def columnWidths( self ) -> List[ int ]:
+        """
+        Returns the width of each column, columns fitting their share keep their natural width
+        """
+        if self.widths != None:
+            return self.widths
+        count = self.columnCount
+        available = self.maxWidth - len( self.separator ) * ( count - 1 )
+        widths = list( self.natural )
+
+        # distribute the width left by narrow columns among the wide columns
+        wide = set( range( count ) )
+        while ( len( wide ) > 0 ) and ( sum( widths[ c ] for c in wide ) > available ):
+            totalWeight = sum( self.weights[ c ] for c in wide )
+            fitting = [ c for c in wide if self.natural[ c ] <= available * self.weights[ c ] / totalWeight ]
+            if len( fitting ) == 0:
+                for c in wide:
+                    minimum = self.warpSettings[ c ].maxIndent() + 1
+                    widths[ c ] = max( int( available * self.weights[ c ] / totalWeight ), minimum )
+                break
+            for c in fitting:
+                wide.discard( c )
+                available -= widths[ c ]
+        self.widths = widths
+        return widths
+
+
+    def formatRows( self, rows: List[ List[ object ] ] ) -> List[ str ]:
+        """
+        Returns the lines of a batch of rows
+        """
+        widths = self.columnWidths()
+        last = self.columnCount - 1
+        lines = []
+        for row in rows:
+            cells = []
+            height = 0
+            for c in range( self.columnCount ):
+                cell = _cellText( row, c )
+                if len( cell ) > widths[ c ] or ( "\n" in cell ):
+                    cellLines = self.warpCache.warp( cell, widths[ c ], self.warpSettings[ c ] )
+                else:
+                    cellLines = ( cell, )
+                cells.append( cellLines )
+                height = max( height, len( cellLines ) )
+            for i in range( height ):
+                parts = []
+                for c in range( self.columnCount ):
+                    text = cells[ c ][ i ] if i < len( cells[ c ] ) else ""
+                    parts.append( text if c == last else text.ljust( widths[ c ] ) )
+                lines.append( self.separator.join( parts ).rstrip() )
+        return lines
+
+
+
+
 class Formatter:
     def __init__(
             self,
@@ -190,10 +440,14 @@ class Formatter:
             tableWarpSettingsLeft: TextWarpSettings = None,
             tableWarpSettingsRight: TextWarpSettings = None,
             leftWeight = 1.0,
-            rightWeight = 1.0
+            rightWeight = 1.0,
+            sink: logsink.Sink = None,
+            warpCache: WarpCache = None
         ):
         """
-        Formatter for printing to the command line
+        Formatter for printing to the command line, formatted lines are written to sink,
+        by default to stdout. Warped texts are memoized in warpCache, by default shared
+        by all formatters
         """
         # TODO:
         self.maxWidth               = maxWidth if maxWidth is not None else 80
@@ -203,15 +457,18 @@ class Formatter:
         self.leftWeight             = leftWeight
         self.rightWeight            = rightWeight
         self.indentStack            = []
+        self.sink                   = sink if sink != None else logsink.StdoutSink()
+        self.pending                = []
+        self.warpCache              = warpCache if warpCache != None else defaultWarpCache
 
         pass
 
 
     def _write( self, line: str ):
         """
-        Write formatted line to console
+        Write formatted line to console, lines are passed to the sink as batch for each write call
         """
-        print( line )
+        self.pending.append( line )
 
 
     def _getIndent( self ):
@@ -230,9 +487,7 @@ class Formatter:
         """
         indent = self._getIndent()
         maxWidth = self.maxWidth - len( indent )
-        warp = _TextWarp( maxWidth, self.defaultWarpSettings )
-        warp.addLine( text )
-        for line in warp.getFormatted():
+        for line in self.warpCache.warp( text, maxWidth, self.defaultWarpSettings ):
             self._write( indent + line )
 
 
@@ -257,18 +512,16 @@ class Formatter:
                 w1 = 1
             if w2 < 1:
                 w2 = 1
-            f1 = _TextWarp( w1 + i1, self.tableWarpSettingsLeft )
-            f2 = _TextWarp( w2 + i2, self.tableWarpSettingsLeft )
+            ww1 = w1 + i1
+            ww2 = w2 + i2
             fw = w1 + i1
         else:
-            f1 = _TextWarp( None, self.tableWarpSettingsLeft )
-            f2 = _TextWarp( None, self.tableWarpSettingsLeft )
+            ww1 = None
+            ww2 = None
 
         # format table
-        f1.addLine( str( left ) )
-        f2.addLine( str( right ) )
-        s1 = f1.getFormatted()
-        s2 = f2.getFormatted()
+        s1 = self.warpCache.warp( str( left ), ww1, self.tableWarpSettingsLeft )
+        s2 = self.warpCache.warp( str( right ), ww2, self.tableWarpSettingsRight )
 
         # check for longest line of left column
         if fw == None:
@@ -328,7 +581,51 @@ class Formatter:
         Write text lines or a table
         """
         if content != None:
-            if isinstance( content, ( tuple, list ) ):
-                if self._writeTuple( content ) == True:
-                    return
-            self._writeLine( str( content ) )
+            if not ( isinstance( content, ( tuple, list ) ) and ( self._writeTuple( content ) == True ) ):
+                self._writeLine( str( content ) )
+            if len( self.pending ) > 0:
+                lines = self.pending
+                self.pending = []
+                self.sink.write( lines )
+
+
+    def writeTable(
+            self,
+            rows: List[ List[ object ] ],
+            header: List[ str ] = None,
+            weights: List[ float ] = None,
+            warpSettings: List[ TextWarpSettings ] = None,
+            separator: str = "  ",
+            batchRows: int = 256
+        ):
+        """
+        Write a table with any number of columns, cells are converted by str() and None is written
+        as empty cell. Column widths are computed in one pass over all rows, rows are warped and passed to the sink in batches of batchRows
+        """
+        if not isinstance( rows, list ):
+            rows = list( rows )
+        columnCount = len( header ) if header != None else max( ( len( r ) for r in rows ), default = 0 )
+        if columnCount == 0:
+            return
+        indent = self._getIndent()
+        layout = TableLayout( self.maxWidth - len( indent ), columnCount, weights, warpSettings, separator, self.warpCache )
+        if header != None:
+            layout.measure( [ header ] )
+        layout.measure( rows )
+
+        # header and underline
+        if header != None:
+            lines = layout.formatRows( [ header ] )
+            lines.append( separator.join( "-" * w for w in layout.columnWidths() ) )
+            self.sink.write( [ indent + l for l in lines ] )
+
+        for first in range( 0, len( rows ), batchRows ):
+            lines = layout.formatRows( rows[ first:first + batchRows ] )
+            self.sink.write( [ indent + l for l in lines ] )
+
+
+    def flush( self ):
+        """
+        Flush lines buffered by the sink
+        """
+        self.sink.flush()
@@ -0,0 +1,108 @@
+from typing import Callable
+from . import format
+from . import records
+from . import sink as logsink
+
+
+
+# level used when none is configured
+DEFAULT_LEVEL = "info"
+
+
+# level prefixes of formatted lines
+_levelPrefixes = {
+    "debug":   "debug: ",
+    "info":    "",
+    "warning": "warning: ",
+    "error":   "error: "
+}
+
+
+
+
+# argument evaluated only when a record is written
+class Lazy:
+    __slots__ = ( "function", "args" )
+
+    def __init__( self, function: Callable, *args ):
+        """
+        Defers function( *args ) until the argument is converted to a string
+        """
+        self.function = function
+        self.args     = args
+
+
+    def __str__( self ) -> str:
+        return str( self.function( *self.args ) )
+
+
+
+
+def _disabled( *args, **kwargs ):
+    """
+    Logging method of a disabled level
+    """
+    pass
+
+
+
+
+# level filtered logger with lazily formatted messages
+class Logger:
+    def __init__(
+            self,
+            level: str = DEFAULT_LEVEL,
+            module: str = None,
+            phase: str = None,
+            formatter: format.Formatter = None,
+            buildLog = None,
+            recordLog: records.RecordLog = None
+        ):
+        """
+        Creates a logger writing records of at least level to the formatter, the build log and
+        the structured record log. Messages are built as message % args only for enabled levels,
+        the methods of disabled levels do nothing.
+        """
+        self.module    = module if module != None else ""
+        self.phase     = phase if phase != None else ""
+        self.formatter = formatter if formatter != None else format.Formatter( 80, sink = logsink.StdoutSink() )
+        self.buildLog  = buildLog
+        self.recordLog = recordLog
+        self.setLevel( level )
+
+
+    def setLevel( self, level: str ):
+        """
+        Enable all levels of at least the severity of level, raises ValueError for unknown levels
+        """
+        minSeverity = records.levelId( level )
+        self.level = level
+        for severity, name in enumerate( records.LEVELS ):
+            if severity >= minSeverity:
+                setattr( self, name, self._writer( name ) )
+            else:
+                setattr( self, name, _disabled )
+
+
+    def isEnabled( self, level: str ) -> bool:
+        """
+        Returns true when records of level are written, i.e. to skip preparing expensive arguments
+        """
+        return records.levelId( level ) >= records.levelId( self.level )
+
+
+    def _writer( self, level: str ) -> Callable:
+        """
+        Returns the logging method of an enabled level
+        """
+        prefix = _levelPrefixes[ level ]
+
+        def write( message: str, *args ):
+            text = ( message % args ) if len( args ) > 0 else str( message )
+            self.formatter.write( prefix + text )
+            if self.buildLog != None:
+                self.buildLog.writeLine( prefix + text )
+            if self.recordLog != None:
+                self.recordLog.record( self.module, self.phase, level, text )
+
+        return write
@@ -0,0 +1,225 @@
+import collections
+import os
+import re
+import threading
+
+
+from typing import List
+from . import format
+from . import sink as logsink
+
+
+
+# marks the end of a job stream
+_endOfJob = None
+
+
+# characters replaced in job file names
+_unsafeFileChars = re.compile( r"[^A-Za-z0-9._-]" )
+
+
+
+
+# output stream of a single job
+class JobStream:
+    def __init__( self, multiplexer: 'Multiplexer', name: str ):
+        """
+        Creates the stream of a job, to be written by a single producer
+        """
+        self.multiplexer = multiplexer
+        self.name        = name
+        self.lines       = collections.deque()
+        self.partial     = ""
+        self.ended       = False
+
+
+    def write( self, text: str ):
+        """
+        Write text, lines are passed to the consumer when they are complete
+        """
+        if self.ended:
+            return
+        parts = ( self.partial + text ).split( "\n" )
+        self.partial = parts.pop()
+        # deque appends are atomic, producers never wait for each other
+        self.lines.extend( parts )
+
+
+    def writeLine( self, line: str ):
+        """
+        Write a complete line
+        """
+        self.write( line + "\n" )
+
+
+    def end( self ):
+        """
+        End the job, an incomplete last line is written as a line
+        """
+        if self.ended:
+            return
+        if self.partial != "":
+            self.lines.append( self.partial )
+            self.partial = ""
+        self.ended = True
+        self.lines.append( _endOfJob )
+        self.multiplexer.wakeup.set()
+
+
+
+
+# per job state of the consumer
+class _JobOutput:
+    def __init__( self, stream: JobStream, path: str ):
+        """
+        Creates the consumer state of a job
+        """
+        self.stream = stream
+        self.file   = logsink.FileSink( path, append = False ) if path != None else None
+        self.block  = []
+
+
+
+
+# emits the output of concurrent jobs through one formatter
+class Multiplexer:
+    def __init__(
+            self,
+            formatter: format.Formatter,
+            directory: str = None,
+            runName: str = None,
+            blocks: bool = False,
+            interval: float = 0.05
+        ):
+        """
+        Creates a multiplexer writing whole lines of each job prefixed by the job name, or the
+        whole output of a job as one block when it ends if blocks is set. When directory is set
+        the full output of each job is also written to <runName>.<job>.log in directory.
+        A single consumer thread collects the lines every interval seconds.
+        """
+        self.formatter = formatter
+        self.directory = directory
+        self.runName   = runName
+        self.blocks    = blocks
+        self.interval  = interval
+        self.lock      = threading.Lock()
+        self.wakeup    = threading.Event()
+        self.added     = []
+        self.outputs   = []
+        self.closed    = False
+        self._thread   = threading.Thread( target = self._run, name = "log-multiplexer", daemon = True )
+        self._thread.start()
+
+
+    def _jobPath( self, name: str ) -> str:
+        """
+        Returns the log file path of a job or None
+        """
+        if self.directory == None:
+            return None
+        fileName = _unsafeFileChars.sub( "_", name ) + ".log"
+        if self.runName != None:
+            fileName = self.runName + "." + fileName
+        return os.path.join( self.directory, fileName )
+
+
+    def job( self, name: str ) -> JobStream:
+        """
+        Returns a new stream for a job
+        """
+        stream = JobStream( self, name )
+        with self.lock:
+            assert not self.closed, "multiplexer is closed"
+            self.added.append( stream )
+        return stream
+
+
+    def close( self ):
+        """
+        Stop the consumer, jobs not ended by their producer are ended by the consumer after
+        emitting their remaining output. Producers must not write after close.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.wakeup.set()
+        self._thread.join()
+        self.formatter.flush()
+
+
+    def _emit( self, output: _JobOutput, lines: List[ str ] ):
+        """
+        Write lines of a job to its file and to the formatter
+        """
+        if output.file != None:
+            output.file.write( lines )
+        if self.blocks:
+            output.block.extend( lines )
+        else:
+            prefix = "[" + output.stream.name + "] "
+            for line in lines:
+                self.formatter.write( prefix + line )
+
+
+    def _finish( self, output: _JobOutput ):
+        """
+        Write the block of an ended job and close its file
+        """
+        if self.blocks:
+            self.formatter.write( "[" + output.stream.name + "]" )
+            self.formatter.pushIndent( "  " )
+            for line in output.block:
+                self.formatter.write( line )
+            self.formatter.popIndent()
+            output.block = []
+        if output.file != None:
+            output.file.close()
+
+
+    def _drain( self ) -> bool:
+        """
+        Emit the complete lines of all jobs, returns true when jobs are pending
+        """
+        with self.lock:
+            added = self.added
+            self.added = []
+            closed = self.closed
+        for stream in added:
+            self.outputs.append( _JobOutput( stream, self._jobPath( stream.name ) ) )
+
+        running = []
+        for output in self.outputs:
+            queue = output.stream.lines
+            lines = []
+            ended = False
+            while len( queue ) > 0:
+                line = queue.popleft()
+                if line is _endOfJob:
+                    ended = True
+                    break
+                lines.append( line )
+            if closed and not ended:
+                # producers are done, the consumer ends the job with its incomplete last line
+                if output.stream.partial != "":
+                    lines.append( output.stream.partial )
+                    output.stream.partial = ""
+                output.stream.ended = True
+                ended = True
+            if len( lines ) > 0:
+                self._emit( output, lines )
+            if ended:
+                self._finish( output )
+            else:
+                running.append( output )
+        self.outputs = running
+        return ( not closed ) or ( len( self.outputs ) > 0 )
+
+
+    def _run( self ):
+        """
+        Consumer thread
+        """
+        while self._drain():
+            self.wakeup.wait( self.interval )
+            self.wakeup.clear()
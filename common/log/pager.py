@@ -0,0 +1,57 @@
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+
+
+from typing import Iterable
+
+
+
+# pager used when PAGER is not set
+DEFAULT_PAGER = "less -FRX"
+
+
+
+
+def _pagerCommand():
+    """
+    Returns the pager command line or None when output is not paged
+    """
+    if not sys.stdout.isatty():
+        return None
+    command = os.environ.get( "PAGER", DEFAULT_PAGER )
+    if command.strip() == "":
+        return None
+    return shlex.split( command )
+
+
+def page( lines: Iterable[ str ] ):
+    """
+    Stream lines to a pager while they are produced, print them when stdout is not a terminal
+    """
+    command = _pagerCommand()
+    if command != None:
+        try:
+            process = subprocess.Popen( command, stdin = subprocess.PIPE, universal_newlines = True )
+        except OSError:
+            process = None
+        if process != None:
+            try:
+                # flush the first screen line by line, buffer the rest
+                screenLines = shutil.get_terminal_size().lines
+                for line in lines:
+                    process.stdin.write( line + "\n" )
+                    if screenLines > 0:
+                        process.stdin.flush()
+                        screenLines -= 1
+                process.stdin.close()
+            except BrokenPipeError:
+                # pager closed before all lines were written
+                pass
+            process.wait()
+            return
+
+    for line in lines:
+        print( line )
@@ -0,0 +1,275 @@
+import atexit
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import weakref
+
+
+from typing import Dict, Iterator, List
+
+
+
+# record logs closed when the interpreter exits
+_openRecordLogs = weakref.WeakSet()
+
+
+# record levels, ordered by severity
+LEVELS = ( "debug", "info", "warning", "error" )
+
+
+# index entry: log offset, record length, timestamp, module symbol, phase symbol, level
+_indexEntry = struct.Struct( "<QIdIIB" )
+
+
+# index entries unpacked at once by queries
+_chunkEntries = 4096
+
+
+# file extensions of a structured log
+LOG_EXTENSION    = ".jsonl"
+INDEX_EXTENSION  = ".idx"
+SYMBOL_EXTENSION = ".sym"
+
+
+
+
+def levelId( level: str ) -> int:
+    """
+    Returns the severity of a level, raises ValueError for unknown levels
+    """
+    try:
+        return LEVELS.index( level )
+    except ValueError:
+        raise ValueError( "unknown log level '" + str( level ) + "'" )
+
+
+def runs( directory: str ) -> List[ str ]:
+    """
+    Returns the names of all runs with a structured log in directory, oldest first
+    """
+    try:
+        names = os.listdir( directory )
+    except OSError:
+        return []
+    result = [ n[ 0:-len( INDEX_EXTENSION ) ] for n in names if n.endswith( INDEX_EXTENSION ) ]
+    result.sort()
+    return result
+
+
+
+
+# writes records as JSON lines with a sidecar index
+class RecordLog:
+    def __init__( self, directory: str, runName: str ):
+        """
+        Creates a structured log writing <runName>.jsonl into directory. Each record is indexed
+        in <runName>.idx by offset, length, timestamp, module, phase and level, module and phase
+        names are stored once in the symbol table <runName>.sym
+        """
+        self.directory = directory
+        self.runName   = runName
+        base = os.path.join( directory, runName )
+        self.lock      = threading.Lock()
+        self.logFile   = open( base + LOG_EXTENSION, "ab" )
+        self.indexFile = open( base + INDEX_EXTENSION, "ab" )
+        self.symFile   = open( base + SYMBOL_EXTENSION, "a", encoding = "utf-8" )
+        self.offset    = self.logFile.tell()
+        self.symbols   = {}
+        for name in _readSymbols( base + SYMBOL_EXTENSION ):
+            self.symbols.setdefault( name, len( self.symbols ) )
+        self.closed    = False
+        _openRecordLogs.add( self )
+
+
+    def _symbol( self, name: str ) -> int:
+        """
+        Returns the symbol id of a name, adding it to the symbol table when new
+        """
+        symbol = self.symbols.get( name )
+        if symbol == None:
+            symbol = len( self.symbols )
+            self.symbols[ name ] = symbol
+            self.symFile.write( json.dumps( name ) + "\n" )
+        return symbol
+
+
+    def record( self, module: str, phase: str, level: str, message: str, **fields ):
+        """
+        Write a record, additional fields are stored in the JSON line only
+        """
+        severity = levelId( level )
+        timestamp = time.time()
+        data = { "time": timestamp, "module": module, "phase": phase, "level": level, "message": message }
+        data.update( fields )
+        line = ( json.dumps( data, separators = ( ",", ":" ) ) + "\n" ).encode( "utf-8" )
+        with self.lock:
+            if self.closed:
+                return
+            moduleId = self._symbol( module )
+            phaseId = self._symbol( phase )
+            self.logFile.write( line )
+            self.indexFile.write( _indexEntry.pack( self.offset, len( line ), timestamp, moduleId, phaseId, severity ) )
+            self.offset += len( line )
+
+
+    def flush( self ):
+        """
+        Write buffered records, symbols first so index entries never reference unknown symbols
+        """
+        with self.lock:
+            if not self.closed:
+                self.symFile.flush()
+                self.logFile.flush()
+                self.indexFile.flush()
+
+
+    def close( self ):
+        """
+        Flush and close the log
+        """
+        self.flush()
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.symFile.close()
+                self.logFile.close()
+                self.indexFile.close()
+        _openRecordLogs.discard( self )
+
+
+
+
+def _readSymbols( path: str ) -> List[ str ]:
+    """
+    Returns the names of a symbol table, a missing table is empty
+    """
+    names = []
+    try:
+        with open( path, "r", encoding = "utf-8" ) as f:
+            for line in f:
+                if line.endswith( "\n" ):
+                    names.append( json.loads( line ) )
+    except OSError:
+        pass
+    return names
+
+
+def _mapFile( path: str ):
+    """
+    Memory map a file read only, returns None for empty files
+    """
+    with open( path, "rb" ) as f:
+        if os.fstat( f.fileno() ).st_size == 0:
+            return None
+        return mmap.mmap( f.fileno(), 0, access = mmap.ACCESS_READ )
+
+
+
+
+# queries records of a structured log through its index
+class RecordReader:
+    def __init__( self, directory: str, runName: str ):
+        """
+        Opens the structured log of a run, the log and its index are memory mapped
+        and only records matching a query are read from the log
+        """
+        base = os.path.join( directory, runName )
+        self.runName = runName
+        self.names   = _readSymbols( base + SYMBOL_EXTENSION )
+        self.symbols = {}
+        for i, name in enumerate( self.names ):
+            self.symbols.setdefault( name, i )
+        self.log     = _mapFile( base + LOG_EXTENSION )
+        self.index   = _mapFile( base + INDEX_EXTENSION )
+
+        # ignore entries of records not completely written
+        logSize = len( self.log ) if self.log != None else 0
+        entries = ( len( self.index ) // _indexEntry.size ) if self.index != None else 0
+        while entries > 0:
+            offset, length = _indexEntry.unpack_from( self.index, ( entries - 1 ) * _indexEntry.size )[ 0:2 ]
+            if offset + length <= logSize:
+                break
+            entries -= 1
+        self.count = entries
+
+
+    def __len__( self ) -> int:
+        return self.count
+
+
+    def close( self ):
+        """
+        Release the mapped files
+        """
+        if self.log != None:
+            self.log.close()
+            self.log = None
+        if self.index != None:
+            self.index.close()
+            self.index = None
+
+
+    def query(
+            self,
+            module: str = None,
+            phase: str = None,
+            level: str = None,
+            minLevel: str = None,
+            since: float = None,
+            until: float = None
+        ) -> Iterator[ Dict ]:
+        """
+        Yields the records matching all given conditions in log order, level matches a single
+        level and minLevel all levels of at least its severity
+        """
+        if self.count == 0:
+            return
+
+        # names not in the symbol table match no record
+        moduleId = None
+        if module != None:
+            moduleId = self.symbols.get( module )
+            if moduleId == None:
+                return
+        phaseId = None
+        if phase != None:
+            phaseId = self.symbols.get( phase )
+            if phaseId == None:
+                return
+        severity = levelId( level ) if level != None else None
+        minSeverity = levelId( minLevel ) if minLevel != None else None
+
+        # unpack the index in chunks, no view on the map outlives the generator
+        for first in range( 0, self.count, _chunkEntries ):
+            last = min( first + _chunkEntries, self.count )
+            chunk = self.index[ first * _indexEntry.size:last * _indexEntry.size ]
+            for offset, length, timestamp, mId, pId, lId in _indexEntry.iter_unpack( chunk ):
+                if ( moduleId != None ) and ( mId != moduleId ):
+                    continue
+                if ( phaseId != None ) and ( pId != phaseId ):
+                    continue
+                if ( severity != None ) and ( lId != severity ):
+                    continue
+                if ( minSeverity != None ) and ( lId < minSeverity ):
+                    continue
+                if ( since != None ) and ( timestamp < since ):
+                    continue
+                if ( until != None ) and ( timestamp >= until ):
+                    continue
+                yield json.loads( self.log[ offset:offset + length ] )
+
+
+
+
+def _closeOpenRecordLogs():
+    """
+    Close all open record logs on exit
+    """
+    for l in list( _openRecordLogs ):
+        l.close()
+
+
+atexit.register( _closeOpenRecordLogs )
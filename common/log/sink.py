@@ -0,0 +1,293 @@
+import atexit
+import sys
+import threading
+import time
+import weakref
+
+
+from typing import List
+
+
+
+# sinks flushed when the interpreter exits
+_openSinks = weakref.WeakSet()
+
+
+# sinks with a time based flush policy, flushed by a shared background thread
+_delayedSinks = weakref.WeakSet()
+
+
+# guards _delayedSinks, notified when a delayed sink starts buffering
+_delayedCondition = threading.Condition()
+
+
+# background thread flushing delayed sinks, started with the first delayed sink
+_delayedThread = None
+
+
+
+
+# decides when buffered lines of a sink are written
+class FlushPolicy:
+    def __init__(
+            self,
+            maxLines: int = None,
+            maxBytes: int = None,
+            maxDelay: float = None
+        ):
+        """
+        Flush when at least maxLines lines or maxBytes characters are buffered, or when
+        maxDelay seconds passed since the last flush. Conditions are checked on write, maxDelay
+        is also checked by a background thread so idle buffers are flushed in time. Without any
+        condition lines are written on explicit flush only.
+        """
+        self.maxLines = maxLines
+        self.maxBytes = maxBytes
+        self.maxDelay = maxDelay
+
+
+    def isDue( self, lineCount: int, byteCount: int, lastFlush: float ) -> bool:
+        """
+        Returns true when buffered lines need to be flushed
+        """
+        if ( self.maxLines != None ) and ( lineCount >= self.maxLines ):
+            return True
+        if ( self.maxBytes != None ) and ( byteCount >= self.maxBytes ):
+            return True
+        if ( self.maxDelay != None ) and ( time.monotonic() - lastFlush >= self.maxDelay ):
+            return True
+        return False
+
+
+
+
+# buffered output of formatted lines
+class Sink:
+    def __init__( self, policy: FlushPolicy = None ):
+        """
+        Creates a sink buffering lines according to the flush policy
+        """
+        self.policy    = policy if policy != None else FlushPolicy( maxLines = 1 )
+        self.lock      = threading.Lock()
+        self.buffer    = []
+        self.byteCount = 0
+        self.lastFlush = time.monotonic()
+        self.closed    = False
+        _openSinks.add( self )
+        if self.policy.maxDelay != None:
+            _registerDelayed( self )
+
+
+    def _emit( self, lines: List[ str ] ):
+        """
+        Write a batch of lines to the output
+        """
+        assert False, "To be implemented by base class"
+
+
+    def write( self, lines: List[ str ] ):
+        """
+        Write a batch of lines
+        """
+        with self.lock:
+            wasEmpty = ( len( self.buffer ) == 0 )
+            self.buffer.extend( lines )
+            for line in lines:
+                self.byteCount += len( line ) + 1
+            if self.policy.isDue( len( self.buffer ), self.byteCount, self.lastFlush ):
+                self._flushLocked()
+            wake = wasEmpty and ( len( self.buffer ) > 0 ) and ( self.policy.maxDelay != None )
+
+        # let the background thread schedule the flush of a buffer not empty anymore
+        if wake:
+            with _delayedCondition:
+                _delayedCondition.notify()
+
+
+    def writeLine( self, line: str ):
+        """
+        Write a single line
+        """
+        self.write( [ line ] )
+
+
+    def _flushLocked( self ):
+        """
+        Emit buffered lines, lock needs to be held
+        """
+        if len( self.buffer ) > 0:
+            lines = self.buffer
+            self.buffer = []
+            self.byteCount = 0
+            self._emit( lines )
+        self.lastFlush = time.monotonic()
+
+
+    def flush( self ):
+        """
+        Emit buffered lines
+        """
+        with self.lock:
+            self._flushLocked()
+
+
+    def close( self ):
+        """
+        Flush and close the sink
+        """
+        with self.lock:
+            if not self.closed:
+                self._flushLocked()
+                self.closed = True
+                self._close()
+        _openSinks.discard( self )
+        with _delayedCondition:
+            _delayedSinks.discard( self )
+
+
+    def _close( self ):
+        """
+        Release resources of the sink
+        """
+        pass
+
+
+
+
+# sink writing to standard output
+class StdoutSink( Sink ):
+    def _emit( self, lines: List[ str ] ):
+        sys.stdout.write( "\n".join( lines ) + "\n" )
+        sys.stdout.flush()
+
+
+
+
+# sink appending to a file
+class FileSink( Sink ):
+    def __init__( self, path: str, policy: FlushPolicy = None, append: bool = True ):
+        """
+        Creates a sink writing to a file, buffered until 64 KiB by default
+        """
+        super().__init__( policy if policy != None else FlushPolicy( maxBytes = 64 * 1024 ) )
+        self.path = path
+        self.file = open( path, "a" if append else "w", encoding = "utf-8" )
+
+
+    def _emit( self, lines: List[ str ] ):
+        self.file.write( "\n".join( lines ) + "\n" )
+        self.file.flush()
+
+
+    def _close( self ):
+        self.file.close()
+
+
+
+
+# sink collecting lines in memory
+class MemorySink( Sink ):
+    def __init__( self, policy: FlushPolicy = None ):
+        """
+        Creates a sink collecting lines, written lines are available immediately by default
+        """
+        super().__init__( policy )
+        self.lines = []
+
+
+    def _emit( self, lines: List[ str ] ):
+        self.lines.extend( lines )
+
+
+    def takeLines( self ) -> List[ str ]:
+        """
+        Returns and removes the collected lines
+        """
+        with self.lock:
+            lines = self.lines
+            self.lines = []
+        return lines
+
+
+
+
+# sink forwarding lines to multiple sinks
+class TeeSink( Sink ):
+    def __init__( self, sinks: List[ Sink ] ):
+        """
+        Creates a sink forwarding each batch to all sinks, buffering is done by the target sinks
+        """
+        super().__init__( FlushPolicy( maxLines = 1 ) )
+        self.sinks = sinks
+
+
+    def _emit( self, lines: List[ str ] ):
+        for s in self.sinks:
+            s.write( lines )
+
+
+    def flush( self ):
+        super().flush()
+        for s in self.sinks:
+            s.flush()
+
+
+    def _close( self ):
+        for s in self.sinks:
+            s.close()
+
+
+
+
+def _registerDelayed( sink: Sink ):
+    """
+    Add a sink with a time based flush policy to the background flusher
+    """
+    global _delayedThread
+    with _delayedCondition:
+        _delayedSinks.add( sink )
+        if _delayedThread == None:
+            _delayedThread = threading.Thread( target = _flushDelayedSinks, name = "sink-flusher", daemon = True )
+            _delayedThread.start()
+
+
+def _flushDelayedSinks():
+    """
+    Flush delayed sinks holding lines longer than their maxDelay, runs on the background thread
+    """
+    while True:
+        due = []
+        with _delayedCondition:
+            now = time.monotonic()
+            timeout = None
+            for s in list( _delayedSinks ):
+                if s.closed or ( len( s.buffer ) == 0 ):
+                    continue
+                remaining = s.lastFlush + s.policy.maxDelay - now
+                if remaining <= 0:
+                    due.append( s )
+                elif ( timeout == None ) or ( remaining < timeout ):
+                    timeout = remaining
+            if len( due ) == 0:
+                _delayedCondition.wait( timeout )
+        for s in due:
+            try:
+                s.flush()
+            except Exception:
+                pass
+
+
+
+
+def _flushOpenSinks():
+    """
+    Flush all open sinks on exit
+    """
+    for s in list( _openSinks ):
+        try:
+            s.flush()
+        except Exception:
+            pass
+
+
+atexit.register( _flushOpenSinks )
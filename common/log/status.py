@@ -0,0 +1,216 @@
+import shutil
+import sys
+import threading
+import time
+
+
+from typing import List
+
+
+
+# ANSI sequences used to redraw the status region
+_cursorUp   = "\x1b[%dF"
+_clearBelow = "\x1b[J"
+
+
+
+
+# state of a running task
+class _Task:
+    __slots__ = ( "name", "detail", "started" )
+
+    def __init__( self, name: str, detail: str ):
+        """
+        Creates a running task
+        """
+        self.name    = name
+        self.detail  = detail
+        self.started = time.monotonic()
+
+
+
+
+# live status of queued, running and finished tasks
+class StatusBoard:
+    def __init__(
+            self,
+            title: str = None,
+            stream = None,
+            isTerminal: bool = None,
+            maxRate: float = 10.0,
+            summaryInterval: float = 5.0,
+            maxTasks: int = 8
+        ):
+        """
+        Creates a status board. On a terminal a fixed region showing the counters and up to
+        maxTasks running tasks is redrawn at most maxRate times per second, otherwise a summary
+        line is written every summaryInterval seconds. Events only update counters, the cost
+        of rendering does not depend on the event rate.
+        """
+        self.title           = title
+        self.stream          = stream if stream != None else sys.stdout
+        self.isTerminal      = isTerminal if isTerminal != None else self.stream.isatty()
+        self.period          = 1.0 / maxRate if self.isTerminal else summaryInterval
+        self.maxTasks        = maxTasks
+        self.lock            = threading.Lock()
+        self.queued          = 0
+        self.done            = 0
+        self.failed          = 0
+        self.running         = {}
+        self.changed         = False
+        self.height          = 0
+        self.renderCount     = 0
+        self.closed          = False
+        self._stop           = threading.Event()
+        self._thread         = threading.Thread( target = self._run, name = "status-board", daemon = True )
+        self._thread.start()
+
+
+    def queue( self, count: int = 1 ):
+        """
+        Add queued tasks
+        """
+        with self.lock:
+            self.queued += count
+            self.changed = True
+
+
+    def start( self, name: str, detail: str = "" ):
+        """
+        Mark a task as running, a queued task leaves the queue
+        """
+        with self.lock:
+            if self.queued > 0:
+                self.queued -= 1
+            self.running[ name ] = _Task( name, detail )
+            self.changed = True
+
+
+    def update( self, name: str, detail: str ):
+        """
+        Update the detail text of a running task
+        """
+        with self.lock:
+            task = self.running.get( name )
+            if task != None:
+                task.detail = detail
+                self.changed = True
+
+
+    def finish( self, name: str, failed: bool = False ):
+        """
+        Mark a running task as done or failed
+        """
+        with self.lock:
+            if self.running.pop( name, None ) != None:
+                if failed:
+                    self.failed += 1
+                else:
+                    self.done += 1
+                self.changed = True
+
+
+    def write( self, line: str ):
+        """
+        Write a line above the status region
+        """
+        with self.lock:
+            if self.isTerminal:
+                self._clearLocked()
+                self.stream.write( line + "\n" )
+                self._drawLocked()
+            else:
+                self.stream.write( line + "\n" )
+            self.stream.flush()
+
+
+    def close( self ):
+        """
+        Stop redrawing, the final state is left on a terminal or written as summary
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self._stop.set()
+        self._thread.join()
+        with self.lock:
+            self.changed = True
+            self._renderLocked()
+
+
+    def summary( self ) -> str:
+        """
+        Returns a single line describing the counters
+        """
+        text = str( len( self.running ) ) + " running, " + str( self.queued ) + " queued, " + str( self.done ) + " done"
+        if self.failed > 0:
+            text += ", " + str( self.failed ) + " failed"
+        if self.title != None:
+            text = self.title + ": " + text
+        return text
+
+
+    def _lines( self ) -> List[ str ]:
+        """
+        Returns the lines of the status region
+        """
+        width = shutil.get_terminal_size().columns
+        now = time.monotonic()
+        lines = [ self.summary() ]
+        shown = 0
+        for task in self.running.values():
+            if shown == self.maxTasks:
+                lines.append( "  ... " + str( len( self.running ) - shown ) + " more" )
+                break
+            line = "  " + task.name + " (" + str( int( now - task.started ) ) + "s)"
+            if task.detail != "":
+                line += " " + task.detail
+            lines.append( line )
+            shown += 1
+        return [ l[ 0:width - 1 ] for l in lines ]
+
+
+    def _clearLocked( self ):
+        """
+        Remove the status region from the terminal, lock needs to be held
+        """
+        if self.height > 0:
+            self.stream.write( ( _cursorUp % self.height ) + _clearBelow )
+            self.height = 0
+
+
+    def _drawLocked( self ):
+        """
+        Draw the status region below the cursor, lock needs to be held
+        """
+        lines = self._lines()
+        self.stream.write( "\n".join( lines ) + "\n" )
+        self.height = len( lines )
+
+
+    def _renderLocked( self ):
+        """
+        Redraw the region or write a summary when the state changed, lock needs to be held
+        """
+        if not self.changed:
+            return
+        self.changed = False
+        self.renderCount += 1
+        if self.isTerminal:
+            self._clearLocked()
+            self._drawLocked()
+        else:
+            self.stream.write( self.summary() + "\n" )
+        self.stream.flush()
+
+
+    def _run( self ):
+        """
+        Render thread
+        """
+        while not self._stop.wait( self.period ):
+            with self.lock:
+                # keep elapsed times of running tasks current
+                if self.isTerminal and ( len( self.running ) > 0 ):
+                    self.changed = True
+                self._renderLocked()
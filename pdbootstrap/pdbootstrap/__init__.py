@@ -1,7 +1,10 @@
-import sys, os
-from .cmdline import parser, exceptions
+import sys, os, itertools, shutil
+from typing import List
+from .cmdline import parser, exceptions, frozen, layers, argindex, interpolate
+from . import globalargs
+from .librarian import librarian as liblibrarian, manifest, resolver, origincache, mirror, lockfile, statindex
 from .globalargs import GlobalArgs
-from .log import format
+from .log import format, pager, sink, buildlog, records, logger
 
 
 
@@ -18,6 +21,30 @@ initialModulePath = None
 workspacePath = None
 
 
+# build log of this run
+buildLog = None
+
+
+# structured log of this run
+recordLog = None
+
+
+# logger of pd build bootstrap
+log = None
+
+
+# librarian checking out dependencies
+librarian = None
+
+
+# dependency graph of the initial module
+dependencies = None
+
+
+# argument metadata of the modules loaded by this and previous runs, for build help
+argumentIndex = None
+
+
 
 
 # setup command line parser for global build arguments
@@ -42,6 +69,82 @@ def _createDirectory( path: str ):
 
 
 
+def _settingsDump( parsedArgs: parser.ParserRegistry ) -> str:
+    """
+    Returns all resolved settings, one per line
+    """
+    return "\n".join( key + " = " + str( parsedArgs.resolve( key ) ) for key in parsedArgs.valueKeys() )
+
+
+
+
+def _projectDependencies( moduleDir: str ) -> List[ str ]:
+    """
+    Returns the dependencies of the module in moduleDir without checking out anything, all
+    modules recorded by the lock file or the direct dependencies of the manifest
+    """
+    lock = lockfile.Lockfile.load( moduleDir )
+    if not lock.isEmpty():
+        return list( lock.modules )
+    try:
+        return [ d.module for d in manifest.read( moduleDir ) ]
+    except manifest.ManifestError:
+        return []
+
+
+
+
+def _resolveCacheDir( defaultWorkspacePath: str ) -> str:
+    """
+    Returns the cache directory set by command line, environment or workspace settings, resolved
+    by the workspace and cache directory arguments only to locate the cached grammar of all
+    arguments, None when it can not be resolved without the other arguments
+    """
+    ctx = parser.ParserRegistry()
+    globalargs.CacheLocationArgs( defaultWorkspacePath ).addToParser( ctx )
+    try:
+        parsedArgs = parser.Parser.parse( ctx, ignoreUnknown = True )
+        parsedArgs.setLayer( layers.fromEnvironment( parsedArgs.values ) )
+        workspaceDir = os.path.abspath( parsedArgs.resolve( "general.workspace-dir" ) )
+        parsedArgs.overwrite( "general.workspace-dir", workspaceDir )
+        parsedArgs.setLayer( layers.fromConfigFile( os.path.join( workspaceDir, "settings.json" ) ) )
+        cacheDir = parsedArgs.resolve( "general.cache-dir" )
+    except ( exceptions.CmdLineException, ValueError, TypeError ):
+        # reported when parsing all arguments
+        return None
+    if interpolate.hasReferences( cacheDir ):
+        return None
+    return os.path.abspath( cacheDir )
+
+
+
+
+def indexModuleArguments( module: str, ctx: parser.ParserRegistry, sources: List, *extra: str ):
+    """
+    Store the arguments a module registered into ctx in the argument index. The index only
+    knows the modules passed here, every module registering arguments needs to be indexed
+    when it is loaded. sources are the python modules registering the arguments, the grammar
+    is stored again when they or extra key strings changed.
+    """
+    assert argumentIndex != None, "init needs to be called before calling indexModuleArguments"
+    argumentIndex.store( module, frozen.grammarKey( sources, *extra ), ctx )
+
+
+
+
+def _exit( code: int ):
+    """
+    Close the logs of this run and exit
+    """
+    if recordLog != None:
+        recordLog.close()
+    if buildLog != None:
+        buildLog.close()
+    sys.exit( code )
+
+
+
+
 # load and setup pd build system
 def init( buildModuleFile: str, requiredVersion: str ):
 
@@ -49,6 +152,12 @@ def init( buildModuleFile: str, requiredVersion: str ):
     global initialized
     global initialModulePath
     global workspacePath
+    global buildLog
+    global recordLog
+    global log
+    global librarian
+    global dependencies
+    global argumentIndex
 
     # already initialized?
     if( initialized == False ):
@@ -58,9 +167,16 @@ def init( buildModuleFile: str, requiredVersion: str ):
         if initialModulePath == None:
             initialModulePath = os.path.dirname( buildModuleFile )
 
-        # setup argument parser
-        ctx = parser.ParserRegistry()
-        setupCommandlineParser( ctx )
+        # setup argument parser, reuse the grammar compiled by a previous run when the cache directory holds it
+        defaultWorkspacePath = os.path.dirname( initialModulePath )
+        grammarKey = frozen.grammarKey( [ globalargs ], defaultWorkspacePath )
+        grammarCacheDir = _resolveCacheDir( defaultWorkspacePath )
+        grammar = frozen.load( grammarCacheDir, grammarKey ) if grammarCacheDir != None else None
+        if grammar != None:
+            ctx = grammar.createRegistry()
+        else:
+            ctx = parser.ParserRegistry()
+            setupCommandlineParser( ctx )
 
         # parse global command line arguments
         parsedArgs = None
@@ -71,6 +187,13 @@ def init( buildModuleFile: str, requiredVersion: str ):
             print( "run with commandline argument '--general-help' for more informations." )
             sys.exit( 1 )
 
+        # apply PDBUILD_* environment variables below command line arguments
+        try:
+            parsedArgs.setLayer( layers.fromEnvironment( parsedArgs.values ) )
+        except ValueError as e:
+            print( "invalid environment setting: " + str( e ) )
+            sys.exit( 1 )
+
         # setup initial module path
         parsedArgs.overwrite( "general.initialmodule-dir", initialModulePath )
 
@@ -78,26 +201,31 @@ def init( buildModuleFile: str, requiredVersion: str ):
         parsedArgs.overwrite( "general.localrepos-dir", os.path.dirname( initialModulePath ) )
 
         # setup absolute workspace path
-        workspacePath = parsedArgs.resolve( "general.workspace-dir" )
+        try:
+            workspacePath = parsedArgs.resolve( "general.workspace-dir" )
+        except exceptions.CmdLineException as e:
+            print( "invalid command line argument: " + str( e ) )
+            sys.exit( 1 )
         workspacePath = os.path.abspath( workspacePath )
         parsedArgs.overwrite( "general.workspace-dir", str( workspacePath ) )
 
-        # setup buildlog dir
-        buildlogDefaultDir = workspacePath + '/.buildlog'
-        buildlogDir = parsedArgs.resolve( "general.buildlog-dir" ) if parsedArgs.isSet( "general.buildlog-dir" ) else buildlogDefaultDir
-        buildlogDir = os.path.abspath( buildlogDir )
-        parsedArgs.overwrite( "general.buildlog-dir", buildlogDir )
+        # apply workspace config file below environment and command line arguments
+        try:
+            parsedArgs.setLayer( layers.fromConfigFile( os.path.join( workspacePath, "settings.json" ) ) )
+        except ValueError as e:
+            print( "invalid workspace setting: " + str( e ) )
+            sys.exit( 1 )
 
-        # setup fetched dir
-        fetchedDefaultDir = workspacePath + '/.fetched'
-        fetchedDir = parsedArgs.resolve( "general.fetched-dir" ) if parsedArgs.isSet( "general.fetched-dir" ) else fetchedDefaultDir
-        fetchedDir = os.path.abspath( fetchedDir )
+        # setup directories, by default derived from the workspace directory
+        try:
+            buildlogDir = os.path.abspath( parsedArgs.resolve( "general.buildlog-dir" ) )
+            fetchedDir = os.path.abspath( parsedArgs.resolve( "general.fetched-dir" ) )
+            cacheDir = os.path.abspath( parsedArgs.resolve( "general.cache-dir" ) )
+        except exceptions.CmdLineException as e:
+            print( "invalid command line argument: " + str( e ) )
+            sys.exit( 1 )
+        parsedArgs.overwrite( "general.buildlog-dir", buildlogDir )
         parsedArgs.overwrite( "general.fetched-dir", fetchedDir )
-
-        # setup cache dir
-        cacheDefaultDir = workspacePath + '/.cache'
-        cacheDir = parsedArgs.resolve( "general.cache-dir" ) if parsedArgs.isSet( "general.cache-dir" ) else cacheDefaultDir
-        cacheDir = os.path.abspath( cacheDir )
         parsedArgs.overwrite( "general.cache-dir", cacheDir )
 
         # create directories required to run the build script
@@ -106,26 +234,125 @@ def init( buildModuleFile: str, requiredVersion: str ):
         _createDirectory( fetchedDir )
         _createDirectory( cacheDir )
 
-        # TODO: do not emit parsed settings
-        for key in parsedArgs.valueKeys():
-            print( key + " = " + str( parsedArgs.resolve( key ) ) )
+        # start build log of this run
+        buildLog = buildlog.BuildLog( buildlogDir )
+        recordLog = records.RecordLog( buildlogDir, buildLog.runName )
+        log = logger.Logger(
+            level     = parsedArgs.resolve( "general.log-level" ),
+            module    = "pdbootstrap",
+            phase     = "init",
+            formatter = format.Formatter( shutil.get_terminal_size().columns ),
+            buildLog  = buildLog,
+            recordLog = recordLog
+        )
+
+        # store compiled grammar for the next run, where it is loaded from
+        if ( grammarCacheDir == cacheDir ) and ( grammar == None ):
+            frozen.store( cacheDir, grammarKey, ctx.freeze() )
+
+        # index argument metadata of loaded modules for build help, modules loaded later index their arguments on load
+        argumentIndex = argindex.ArgumentIndex.load( cacheDir )
+        indexModuleArguments( "pdbootstrap", ctx, [ globalargs ], defaultWorkspacePath )
+
+        # report arguments not handled by pdbootstrap, they are expected when modules of the project were not indexed yet
+        if len( parsedArgs.unknownCommands ) > 0:
+            projectMissing = argumentIndex.missing( _projectDependencies( initialModulePath ) )
+            owners = argumentIndex.modulesOfCommands( parsedArgs.unknownCommands )
+            for cmd in owners:
+                if len( owners[ cmd ] ) > 0:
+                    log.debug( "argument '--%s' is handled by module %s", cmd, ", ".join( owners[ cmd ] ) )
+                elif len( projectMissing ) > 0:
+                    log.debug( "argument '--%s' is unknown, it may belong to a module not loaded yet: %s", cmd, ", ".join( projectMissing ) )
+                else:
+                    log.warning( "argument '--%s' is not handled by any module of the project", cmd )
+
+        # emit parsed settings, only built when debug messages are enabled
+        log.debug( "parsed settings:\n%s", logger.Lazy( _settingsDump, parsedArgs ) )
 
         # show global command line help and exit?
         if( parsedArgs.resolve( "general.help" ) == True ):
-            ctx.printHelp()
-            fmt = format.Formatter()
+            width = shutil.get_terminal_size().columns
+            footer = sink.MemorySink()
+            fmt = format.Formatter( width, sink = footer )
             fmt.write( "" )
             fmt.write( "For build dependent help run with flag '--build-help'." )
-            fmt.write( "Note: this will checkout all required dependencies in order to render help within the context of the project to build." )
-            sys.exit( 0 )
+            fmt.write( "Note: build dependent help only shows arguments of modules loaded by a previous run." )
+            pager.page( itertools.chain( ctx.renderHelp( width, cacheDir ), footer.takeLines() ) )
+            _exit( 0 )
+
+        # show help of the project to build from the argument index and exit?
+        if( parsedArgs.resolve( "general.buildhelp" ) == True ):
+            projectModules = [ "pdbootstrap" ] + _projectDependencies( initialModulePath )
+            helpCtx = argumentIndex.createRegistry( projectModules )
+            width = shutil.get_terminal_size().columns
+            footer = sink.MemorySink()
+            missing = argumentIndex.missing( projectModules )
+            if len( missing ) > 0:
+                fmt = format.Formatter( width, sink = footer )
+                fmt.write( "" )
+                fmt.write( "Note: arguments of modules not loaded by a previous run are not shown: " + ", ".join( missing ) )
+            pager.page( itertools.chain( helpCtx.renderHelp( width, cacheDir ), footer.takeLines() ) )
+            _exit( 0 )
 
         # initialize bootstrap librarian
-        # TODO:
+        try:
+            librarianJobs = int( parsedArgs.resolve( "general.librarian.jobs" ) )
+        except ValueError:
+            print( "invalid setting: general.librarian.jobs needs to be a number" )
+            _exit( 1 )
+        origins = parsedArgs.resolve( "general.librarian.origins" )
+        mirrorStore = None
+        mirrorDir = parsedArgs.resolve( "general.librarian.mirror-dir" )
+        if mirrorDir != "":
+            mirrorStore = mirror.MirrorStore( os.path.abspath( mirrorDir ) )
+        librarian = liblibrarian.Librarian(
+            fetchedDir    = fetchedDir,
+            localReposDir = parsedArgs.resolve( "general.localrepos-dir" ),
+            origins       = origins,
+            mode          = parsedArgs.resolve( "general.librarian.mode" ),
+            jobs          = librarianJobs,
+            originCache   = origincache.OriginCache( cacheDir, origins ),
+            mirrorStore   = mirrorStore,
+            statIndex     = statindex.StatIndex( cacheDir )
+        )
+
+        # check out dependencies of the initial module, git is not run when all checkouts are at their locked commit
+        rootModule = os.path.basename( initialModulePath )
+        lock = lockfile.Lockfile.load( initialModulePath )
+        relock = ( librarian.mode == "relock" )
+        if ( not relock ) and lock.matches( librarian, initialModulePath ):
+            log.debug( "all dependencies are checked out at their locked commit" )
+            dependencies = lock.graph( librarian, rootModule )
+        else:
+            dependencies = resolver.Resolver( librarian ).resolve( rootModule, initialModulePath, None if relock else lock.commits() )
+            for module in dependencies.conflicts:
+                log.warning( "dependency '%s' requested at different refs, using '%s'", module, dependencies.conflicts[ module ][0] )
+            for module in dependencies.modules():
+                result = dependencies.result( module )
+                if ( result != None ) and result.isAvailable() and ( result.message != None ):
+                    log.warning( "dependency '%s': %s", module, result.message )
+            failed = dependencies.failed()
+            for module in failed:
+                log.error( "dependency '%s' not available: %s", module, dependencies.error( module ) )
+            try:
+                dependencies.buildOrder()
+            except resolver.DependencyCycle as e:
+                log.error( "%s", e )
+                failed.append( e.cycle[0] )
+            if len( failed ) > 0:
+                _exit( 1 )
+
+            # lock the resolved commits, modes not updating checkouts only create a missing lock file
+            if ( lockfile.manifestDigest( initialModulePath ) != None ) and ( lock.isEmpty() or ( librarian.mode in ( "update", "force", "relock" ) ) ):
+                if lock.update( dependencies, initialModulePath ):
+                    lock.save()
+                    log.info( "updated lock file '%s'", lock.path )
 
         # TODO: setup pdbuild
         # load pdbuild library
         # initialize pd build librarian
         # initialize pd build command line arguments
+        # index arguments of each loaded module by indexModuleArguments
 
         # TODO: checkout or accept ( add to search path ) pdbuild module
         print( "CONTINUE" )
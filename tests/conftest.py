@@ -0,0 +1,6 @@
+import os
+import sys
+
+
+# make the common package importable by the tests
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
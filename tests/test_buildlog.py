@@ -0,0 +1,38 @@
+import os
+import time
+import pytest
+
+
+from common.log import buildlog
+
+
+
+def test_rotateByEncodedSize( tmp_path ):
+    """
+    Rotation counts bytes written, not characters
+    """
+    log = buildlog.BuildLog( str( tmp_path ), "run", maxBytes = 1000, compress = False )
+    log.write( [ "ä" * 300 ] * 2 )
+    log.close()
+    assert log.segments == [ os.path.join( str( tmp_path ), "run.log.1" ) ]
+
+
+@pytest.mark.filterwarnings( "ignore::pytest.PytestUnhandledThreadExceptionWarning" )
+def test_closeAfterWriterDied( tmp_path ):
+    """
+    close() returns when the writer thread died with a full queue
+    """
+    log = buildlog.BuildLog( str( tmp_path ), "run", queueSize = 2 )
+
+    def failingBatch( lines ):
+        raise OSError( "disk gone" )
+
+    log._writeBatch = failingBatch
+    log.writeLine( "first" )
+    log._thread.join( 5 )
+    for line in ( "a", "b", "c" ):
+        log.writeLine( line )
+    start = time.monotonic()
+    log.close()
+    assert time.monotonic() - start < 5
+    assert log.dropped == 1
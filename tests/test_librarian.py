@@ -0,0 +1,49 @@
+import os
+import subprocess
+
+
+from common.librarian import librarian as liblibrarian
+
+
+
+def gitRun( cwd: str, *args: str ):
+    """
+    Run git in cwd with a fixed identity
+    """
+    subprocess.run( [ "git", "-c", "user.name=test", "-c", "user.email=test@test", *args ], cwd = cwd, check = True, capture_output = True )
+
+
+def createOrigin( directory: str, module: str, tag: str = None ) -> str:
+    """
+    Create a bare repository of module in directory with a single commit, tagged when tag is set
+    """
+    work = os.path.join( directory, module + ".work" )
+    os.makedirs( work )
+    gitRun( work, "init", "--quiet" )
+    with open( os.path.join( work, "file.txt" ), "w" ) as f:
+        f.write( directory )
+    gitRun( work, "add", "file.txt" )
+    gitRun( work, "commit", "--quiet", "-m", "initial" )
+    if tag != None:
+        gitRun( work, "tag", tag )
+    gitRun( directory, "clone", "--quiet", "--bare", work, module + ".git" )
+    return os.path.join( directory, "${module}.git" )
+
+
+def test_cloneFromOriginProvidingRef( tmp_path ):
+    """
+    A clone of an origin without the requested ref is removed before the next origin is tried
+    """
+    first = createOrigin( str( tmp_path / "first" ), "dep" )
+    second = createOrigin( str( tmp_path / "second" ), "dep", tag = "v2" )
+    librarian = liblibrarian.Librarian(
+        fetchedDir    = str( tmp_path / "fetched" ),
+        localReposDir = str( tmp_path / "local" ),
+        origins       = [ first, second ],
+        jobs          = 1
+    )
+    result = librarian.fetchModule( "dep", "v2" )
+    assert result.action == "cloned"
+    assert result.origin == second.replace( "${module}", "dep" )
+    with open( os.path.join( result.path, "file.txt" ) ) as f:
+        assert f.read() == str( tmp_path / "second" )
@@ -0,0 +1,52 @@
+import threading
+import time
+
+
+from common.log import format, multiplex, sink
+
+
+
+def test_closeWhileConsumerAddsJob( monkeypatch ):
+    """
+    close() while the consumer creates the output of a new job ends the job and returns
+    """
+    started = threading.Event()
+    createOutput = multiplex._JobOutput.__init__
+
+    def slowOutput( self, stream, path ):
+        started.set()
+        time.sleep( 0.3 )
+        createOutput( self, stream, path )
+
+    monkeypatch.setattr( multiplex._JobOutput, "__init__", slowOutput )
+    memory = sink.MemorySink()
+    mux = multiplex.Multiplexer( format.Formatter( 120, sink = memory ), interval = 0.01 )
+    stream = mux.job( "a" )
+    stream.writeLine( "first" )
+    stream.write( "incomplete" )
+    assert started.wait( 5 )
+
+    closer = threading.Thread( target = mux.close )
+    closer.start()
+    closer.join( 5 )
+    assert not closer.is_alive()
+    assert not mux._thread.is_alive()
+    assert memory.takeLines() == [ "[a] first", "[a] incomplete" ]
+    assert stream.ended
+
+
+def test_closeEmitsAllJobs():
+    """
+    close() emits the output of ended and running jobs
+    """
+    memory = sink.MemorySink()
+    mux = multiplex.Multiplexer( format.Formatter( 120, sink = memory ), blocks = True )
+    ended = mux.job( "ended" )
+    ended.writeLine( "done" )
+    ended.end()
+    running = mux.job( "running" )
+    running.writeLine( "still running" )
+    mux.close()
+    lines = memory.takeLines()
+    assert lines[ lines.index( "[ended]" ) + 1 ] == "  done"
+    assert lines[ lines.index( "[running]" ) + 1 ] == "  still running"
@@ -0,0 +1,137 @@
+import concurrent.futures
+
+
+from common.cmdline import cmdarg, cmdvalue, exceptions, frozen, parser
+
+
+
+# values of the test grammar
+VALUE_COUNT = 50
+
+
+def createGrammar() -> parser.ParserRegistry:
+    """
+    Returns a grammar of string values set by --opt-<i> and a list value set by --origin
+    """
+    grammar = parser.ParserRegistry()
+    for i in range( VALUE_COUNT ):
+        value = cmdvalue.Value( "test.value" + str( i ), "Test value.", "test", defaultValue = "" )
+        grammar.addValue( value )
+        grammar.addArgument( cmdarg.StringArgument( value, "opt-" + str( i ), "<value>" ) )
+    origins = cmdvalue.ListValue( "test.origins", "Test list value.", "test", initialValue = [ "default" ] )
+    grammar.addValue( origins )
+    grammar.addArgument( cmdarg.StringArgument( origins, "origin", "<URL>" ) )
+    return grammar
+
+
+def commandLine( tag: str ) -> list:
+    """
+    Returns a command line setting all values of the test grammar to tag
+    """
+    args = []
+    for i in range( VALUE_COUNT ):
+        args += [ "--opt-" + str( i ), tag ]
+    return args + [ "--origin", tag ]
+
+
+def parseJob( grammar: parser.ParserRegistry, job: int ) -> list:
+    """
+    Parse a command line unique to job with a nested override context, returns the mismatches
+    """
+    tag = "job" + str( job )
+    ctx = parser.Parser.parse( grammar, commandLine( tag ) )
+    override = ctx.createContext()
+    override.overwrite( "test.value0", tag + "-override" )
+
+    errors = [ i for i in range( VALUE_COUNT ) if ctx.resolve( "test.value" + str( i ) ) != tag ]
+    if ctx.resolve( "test.origins" ) != [ "default", tag ]:
+        errors.append( "origins" )
+    if ( override.resolve( "test.value0" ) != tag + "-override" ) or ( override.resolve( "test.value1" ) != tag ):
+        errors.append( "override" )
+    if ctx.resolve( "test.value0" ) != tag:
+        errors.append( "override leaked" )
+    return errors
+
+
+def test_parseFromThreads():
+    """
+    Contexts parsed concurrently from one grammar stay isolated, the grammar is never written
+    """
+    grammar = createGrammar()
+    with concurrent.futures.ThreadPoolExecutor( max_workers = 16 ) as pool:
+        results = list( pool.map( lambda j: parseJob( grammar, j ), range( 256 ) ) )
+    assert all( len( errors ) == 0 for errors in results )
+    for i in range( VALUE_COUNT ):
+        value = grammar.get( "test.value" + str( i ) )
+        assert not value.isSet() and ( value.get() == "" )
+    assert grammar.get( "test.origins" ).get() == [ "default" ]
+
+
+def test_parseOverrideInChildContext():
+    """
+    Commands parsed on a parsed context override its values for the child context only
+    """
+    grammar = createGrammar()
+    ctx = parser.Parser.parse( grammar, [ "--opt-0", "base", "--opt-1", "kept", "--origin", "a" ] )
+    job = parser.Parser.parse( ctx, [ "--opt-0", "job", "--origin", "b" ] )
+    assert job.resolve( "test.value0" ) == "job"
+    assert job.resolve( "test.value1" ) == "kept"
+    assert job.resolve( "test.origins" ) == [ "default", "a", "b" ]
+    assert ctx.resolve( "test.value0" ) == "base"
+    assert ctx.resolve( "test.origins" ) == [ "default", "a" ]
+
+
+def test_parseCommandTwice():
+    """
+    A unique value may be set once within a single parse
+    """
+    grammar = createGrammar()
+    ctx = parser.Parser.parse( grammar, [ "--opt-0", "base" ] )
+    try:
+        parser.Parser.parse( ctx, [ "--opt-0", "a", "--opt-0", "b" ] )
+    except exceptions.CmdLineCommandTwice:
+        return
+    assert False, "second --opt-0 accepted"
+
+
+def test_parseFrozenGrammar():
+    """
+    A registry running off a cached grammar parses like the registered grammar and creates
+    only the values and arguments in use
+    """
+    grammar = createGrammar()
+    cached = frozen.FrozenGrammar.deserialize( grammar.freeze().serialize() ).createRegistry()
+    ctx = parser.Parser.parse( cached, [ "--opt-3", "a", "--origin", "b" ] )
+    assert ctx.resolve( "test.value3" ) == "a"
+    assert ctx.resolve( "test.origins" ) == [ "default", "b" ]
+    assert sorted( cached.values.entries ) == [ "test.origins", "test.value3" ]
+    assert sorted( cached.commands.entries ) == [ "opt-3", "origin" ]
+    assert cached.commandTrie == None
+
+    # error paths and help use the whole grammar
+    try:
+        parser.Parser.parse( cached, [ "--opt-", "a" ] )
+        assert False, "ambiguous --opt- accepted"
+    except exceptions.CmdLineAmbiguousCommand:
+        pass
+    assert list( cached.renderHelp( 80 ) ) == list( grammar.renderHelp( 80 ) )
+
+
+def test_errorsReportTokenAndPosition( tmp_path ):
+    """
+    Parse errors carry the offending token and its position in the expanded command line
+    """
+    responseFile = tmp_path / "args.txt"
+    responseFile.write_text( "--opt-1 b\n--opt-2\n" )
+    cases = [
+        ( [ "stray" ], exceptions.CmdLineNoArgumentExpected, 0, "stray" ),
+        ( [ "--opt-0", "a", "--unknown" ], exceptions.CmdLineUnknownCommand, 2, "--unknown" ),
+        ( [ "--opt-0", "a", "@" + str( responseFile ) ], exceptions.CmdLineUnexpectedArgumentCount, 4, "--opt-2" )
+    ]
+    for args, error, argumentId, argument in cases:
+        try:
+            parser.Parser.parse( createGrammar(), args )
+            assert False, "invalid command line accepted: " + " ".join( args )
+        except error as e:
+            assert ( e.argumentId, e.argument ) == ( argumentId, argument )
+            assert ( "@" + str( argumentId ) ) in str( e )
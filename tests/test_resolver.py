@@ -0,0 +1,30 @@
+import json
+
+
+from common.librarian import librarian as liblibrarian
+from common.librarian import manifest, resolver
+
+
+
+def test_fetchErrorsFailModule( tmp_path, monkeypatch ):
+    """
+    Any error fetching a module or reading its manifest fails that module, the other modules are resolved
+    """
+    root = tmp_path / "root"
+    root.mkdir()
+    ( root / manifest.MANIFEST_FILE ).write_text( json.dumps( { "dependencies": [ "good", "disk", "broken" ] } ) )
+    for module in ( "good", "broken" ):
+        ( tmp_path / "fetched" / module ).mkdir( parents = True )
+    ( tmp_path / "fetched" / "broken" / manifest.MANIFEST_FILE ).write_bytes( b"\xff\xfe" )
+
+    def fetchModule( module: str, ref: str ) -> liblibrarian.FetchResult:
+        if module == "disk":
+            raise OSError( 28, "No space left on device" )
+        return liblibrarian.FetchResult( module, str( tmp_path / "fetched" / module ), "unchanged" )
+
+    librarian = liblibrarian.Librarian( str( tmp_path / "fetched" ), None, [], jobs = 2 )
+    monkeypatch.setattr( librarian, "fetchModule", fetchModule )
+    graph = resolver.Resolver( librarian ).resolve( "root", str( root ) )
+    assert sorted( graph.failed() ) == [ "broken", "disk" ]
+    assert "No space left on device" in graph.error( "disk" )
+    assert graph.error( "good" ) == None
@@ -0,0 +1,86 @@
+import os
+import subprocess
+import time
+
+
+from common.librarian import statindex
+
+
+
+def gitRun( cwd: str, *args: str ):
+    """
+    Run git in cwd with a fixed identity
+    """
+    subprocess.run( [ "git", "-c", "user.name=test", "-c", "user.email=test@test", *args ], cwd = cwd, check = True, capture_output = True )
+
+
+def writeFile( path: str, text: str ):
+    """
+    Write a file with a modification time old enough to be fingerprinted
+    """
+    with open( path, "w" ) as f:
+        f.write( text )
+    past = time.time() - 10 * statindex.RACY_SECONDS
+    os.utime( path, ( past, past ) )
+
+
+def createRepository( path: str, files: dict ):
+    """
+    Create a repository at path committing files
+    """
+    os.makedirs( path )
+    gitRun( path, "init", "--quiet" )
+    for name in files:
+        writeFile( os.path.join( path, name ), files[ name ] )
+    gitRun( path, "add", "." )
+    gitRun( path, "commit", "--quiet", "-m", "initial" )
+
+
+def test_classifyChangedFilesOnly( tmp_path, monkeypatch ):
+    """
+    Only files whose stat changed are passed to git, other files keep their state
+    """
+    repo = str( tmp_path / "repo" )
+    createRepository( repo, { "a.txt": "a", "b.txt": "b" } )
+    index = statindex.StatIndex( str( tmp_path ) )
+    assert index.isClean( repo )
+    assert index.isClean( repo )
+    assert ( index.misses, index.updates, index.hits ) == ( 1, 0, 1 )
+
+    classified = []
+    changedFiles = statindex.git.changedFiles
+
+    def recordChangedFiles( path: str, files = None ):
+        classified.append( files )
+        return changedFiles( path, files )
+
+    monkeypatch.setattr( statindex.git, "changedFiles", recordChangedFiles )
+    writeFile( os.path.join( repo, "a.txt" ), "changed" )
+    assert not index.isClean( repo )
+    writeFile( os.path.join( repo, "a.txt" ), "a" )
+    assert index.isClean( repo )
+    assert classified == [ [ "a.txt" ], [ "a.txt" ] ]
+    assert ( index.misses, index.updates ) == ( 1, 2 )
+
+    # state survives saving
+    index.save()
+    assert not statindex.StatIndex( str( tmp_path ) ).entries[ os.path.abspath( repo ) ].dirty
+
+
+def test_linkedWorktree( tmp_path ):
+    """
+    The git index of a worktree whose .git is a file is found by git
+    """
+    repo = str( tmp_path / "repo" )
+    createRepository( repo, { "a.txt": "a" } )
+    worktree = str( tmp_path / "worktree" )
+    gitRun( repo, "worktree", "add", "--quiet", "-b", "work", worktree )
+    assert os.path.isfile( os.path.join( worktree, ".git" ) )
+    writeFile( os.path.join( worktree, "a.txt" ), "a" )
+
+    index = statindex.StatIndex( str( tmp_path ) )
+    assert index.isClean( worktree )
+    assert index.isClean( worktree )
+    assert index.hits == 1
+    writeFile( os.path.join( worktree, "a.txt" ), "changed" )
+    assert not index.isClean( worktree )